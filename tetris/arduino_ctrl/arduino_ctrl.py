@@ -1,4 +1,5 @@
 # 아두이노 통합 제어 시스템 - 멀티 아두이노 시리얼 통신 관리
+import threading
 import time
 
 import readchar
@@ -28,36 +29,47 @@ manual_key_map = {
 }
 
 # 아두이노 연결 관리
-def connect_to_arduinos():
-    """시리얼 번호를 기반으로 아두이노에 연결"""
+def _connect_one(i, sn, device):
+    """셀 하나 연결 (재시도 후 보드 리셋 대기)"""
+    try:
+        last_exc = None
+        for attempt in range(3):
+            try:
+                ser = serial.Serial(device, BAUD_RATE, timeout=1)
+                break
+            except serial.SerialException as e:
+                last_exc = e
+                time.sleep(0.5 * (attempt + 1))
+        else:
+            raise serial.SerialException(f"연결 재시도 초과: {last_exc}")
+
+        time.sleep(2)
+        arduino_connections[sn] = ser
+        print(f"  [성공] 셀 {i+1}번 연결 성공 (SN: {sn}, Port: {device})")
+    except serial.SerialException as e:
+        print(f"  [에러] 셀 {i+1}번 연결 실패 (SN: {sn}). {e}")
+
+def connect_to_arduinos(parallel=True):
+    """시리얼 번호를 기반으로 아두이노에 연결 (parallel이면 보드별 리셋 대기를 동시에 진행)"""
     print("아두이노 연결을 시작합니다...")
     found_ports = list(serial.tools.list_ports.comports())
+    targets = []
     for i, sn in enumerate(ARDUINO_SERIAL_NUMBERS):
-        port_found = False
-        for p in found_ports:
-            if p.serial_number and p.serial_number == sn:
-                try:
-                    last_exc = None
-                    for attempt in range(3):
-                        try:
-                            ser = serial.Serial(p.device, BAUD_RATE, timeout=1)
-                            break
-                        except serial.SerialException as e:
-                            last_exc = e
-                            time.sleep(0.5 * (attempt + 1))
-                    else:
-                        raise serial.SerialException(f"연결 재시도 초과: {last_exc}")
-
-                    time.sleep(2)
-                    arduino_connections[sn] = ser
-                    print(f"  [성공] 셀 {i+1}번 연결 성공 (SN: {sn}, Port: {p.device})")
-                    port_found = True
-                    break
-                except serial.SerialException as e:
-                    print(f"  [에러] 셀 {i+1}번 연결 실패 (SN: {sn}). {e}")
-                    break
-        if not port_found:
+        port = next((p for p in found_ports if p.serial_number and p.serial_number == sn), None)
+        if port is None:
             print(f"  [경고] 셀 {i+1}번 아두이노를 찾을 수 없습니다 (SN: {sn}).")
+        else:
+            targets.append((i, sn, port.device))
+
+    if parallel and len(targets) > 1:
+        threads = [threading.Thread(target=_connect_one, args=target, daemon=True) for target in targets]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        for target in targets:
+            _connect_one(*target)
 
 # 수동 제어 모드
 def run_manual_mode(cell_number):
@@ -39,11 +39,144 @@ UPLOAD_CONFIG = {
     'MAX_PEOPLE_COUNT': 4
 }
 
+# 이미지 전처리 설정 (모델 입력 크기 및 업로드 시간 절감용)
+PREPROCESS_CONFIG = {
+    'ENABLED': True,
+    'MAX_LONG_EDGE': 1536,  # 긴 변 최대 픽셀
+    'FORMAT': 'JPEG',  # 'JPEG' 또는 'WEBP'
+    'QUALITY': 85
+}
+
+# 지각 해시 유사 이미지 조회 설정 (재촬영된 동일 짐 사진 감지용)
+PHASH_CONFIG = {
+    'ENABLED': True,
+    'INDEX_FILE': BASE_DIR / 'tetris_IO' / 'uploads' / 'phash_index.jsonl',
+    'HASH_SIZE': 8,  # dHash 크기 (8 → 64비트)
+    'MAX_DISTANCE': 6  # 유사 판정 해밍 거리 임계값
+}
+
 # AI 체인 설정
 AI_CONFIG = {
     'SECRETS_JSON': BASE_DIR / 'tetris_secrets.json',  # Google API 키 저장용
-    'CHAIN_TIMEOUT': 300,  # 5분
-    'MAX_RETRIES': 3
+    'CHAIN_TIMEOUT': 300,  # 5분 - 한 번의 파이프라인 실행 전체 예산
+    'MAX_RETRIES': 3,  # 단계별 최대 재시도 횟수
+    'CHAIN3_PLANNER': 'local',  # 'local': 로컬 시트 동작 플래너 (LLM 폴백), 'llm': Gemini Chain 3
+    'EXECUTION_MODE': 'async',  # 'async': ainvoke + 중지 시 진행 중 호출 취소, 'sync': 기존 invoke
+    'CANCEL_POLL_INTERVAL': 0.1,  # 중지 요청 확인 주기(초) - 취소 지연 상한
+    'STREAM_TOKENS': True,  # async 모드에서 체인 출력 토큰을 SSE(/desktop/api/token_stream)로 중계
+    'TOKEN_STREAM_BUFFER': 256,  # SSE 클라이언트별 최대 대기 이벤트 수 (초과 시 오래된 것부터 버림)
+    'EARLY_STOP_JSON': True,  # 응답을 스트리밍으로 받아 첫 완성 JSON 객체에서 생성 중단
+    'CHAIN2_OPTION_SLICING': True,  # Chain 2 프롬프트에 탑승 인원의 option cases만 전송
+    'PLAN_VERIFY': True,  # Serial Encoder 전에 task_sequence를 시뮬레이션하여 Chain 2 목표 배치와 비교
+    'PLAN_REPAIR_MAX_EDITS': 2,  # 셀별 로컬 수리 허용 편집 거리 (초과 시 Chain 3 단계 실패)
+    'PIPELINE_TOPOLOGY': 'staged'  # 'staged': Chain 1 → 2 → 3 순차 호출, 'fused': Chain 1+2를 JSON 출력 단일 멀티모달 호출로 (Chain 3는 로컬 플래너)
+}
+
+# 시작 성능 설정
+STARTUP_CONFIG = {
+    'WARM_UP': True,  # 웹 서버 시작 후 AI 체인(프롬프트/LLM 클라이언트)을 백그라운드에서 미리 생성
+    'IMPORT_BUDGET_MS': {  # python -X importtime 누적 임포트 시간 예산 (utils/import_report.py)
+        'tetris': 400,
+        'web_interface.web': 900,
+    }
+}
+
+# 체인 실행 정책 설정 (단계 마감, 재시도 백오프, 서킷 브레이커, 모델 폴백)
+CHAIN_POLICY_CONFIG = {
+    'STAGE_TIMEOUTS': {'chain1': 120, 'chain2': 90, 'chain3': 60, 'fused': 150},  # 단계별 시도당 마감 시간(초)
+    'BACKOFF_BASE': 1.0,  # 재시도 대기 기본값(초) - 0 ~ BASE × 2^시도 범위에서 무작위
+    'BACKOFF_MAX': 20.0,  # 재시도 대기 상한(초)
+    'BREAKER_FAILURE_THRESHOLD': 3,  # 연속 실패 시 서킷 열림
+    'BREAKER_RESET_SECONDS': 60,  # 서킷 열림 후 시험 호출까지 대기(초)
+    'FALLBACK_MODELS': {'gemini-2.5-pro': 'gemini-2.5-flash'},
+    'MIN_BUDGET_SECONDS': {'gemini-2.5-pro': 90}  # 남은 예산이 이보다 적으면 폴백 모델 사용
+}
+
+# AI 체인 결과 캐시 설정 (동일 이미지 재업로드/재시도용)
+CACHE_CONFIG = {
+    'ENABLED': True,
+    'CACHE_DIR': BASE_DIR / 'tetris_IO' / 'cache' / 'results',
+    'MEMORY_ENTRIES': 32,  # 메모리 LRU 항목 수
+    'DISK_ENTRIES': 500,  # 디스크 최대 항목 수
+    'DISK_MAX_BYTES': 50 * 1024 * 1024,  # 50MB
+    'TTL_SECONDS': 7 * 24 * 3600  # 7일
+}
+
+# 단계별 메모 설정 (Chain 2/3 입력 정규화 해시 → 출력)
+STAGE_MEMO_CONFIG = {
+    'ENABLED': True,
+    'CACHE_DIR': BASE_DIR / 'tetris_IO' / 'cache' / 'stages',
+    'MEMORY_ENTRIES': 64,
+    'DISK_ENTRIES': 1000,
+    'DISK_MAX_BYTES': 20 * 1024 * 1024,  # 20MB
+    'TTL_SECONDS': 30 * 24 * 3600  # 30일
+}
+
+# 단계별 체크포인트 설정 (실패한 실행을 마지막 완료 단계 다음부터 재개)
+CHECKPOINT_CONFIG = {
+    'ENABLED': True,
+    'CHECKPOINT_DIR': BASE_DIR / 'tetris_IO' / 'checkpoints',
+    'TTL_SECONDS': 7 * 24 * 3600  # 7일
+}
+
+# 컨텍스트 캐시 설정 (정적 프롬프트 접두부를 Gemini cachedContents로 재사용)
+CONTEXT_CACHE_CONFIG = {
+    'ENABLED': True,
+    'BACKEND': 'gemini',  # 'gemini': 제공자 측 캐시, 'local': 오프라인 대체 (캐시 생성/갱신 동작만 모사)
+    'STAGES': ('chain1', 'chain2', 'chain3', 'fused'),
+    'TTL_SECONDS': 3600,  # 1시간
+    'REFRESH_MARGIN_SECONDS': 60,  # 만료 이 시간 전부터 재생성
+    'RETRY_AFTER_SECONDS': 600  # 캐시 생성 실패 후 이 시간 동안 전체 프롬프트 전송
+}
+
+# LLM 녹화/재생 대역 설정 (네트워크 없이 파이프라인/상태/SSE 오버헤드 측정용)
+LLM_STANDIN_CONFIG = {
+    'MODE': os.getenv('TETRIS_LLM_MODE', 'off'),  # 'off': Gemini 호출, 'record': Gemini 응답을 카세트에 저장, 'replay': 카세트 재생
+    'CASSETTE_DIR': BASE_DIR / 'tetris_IO' / 'cassettes',
+    'MISSING': 'error',  # 재생 시 카세트 없음: 'error', 'any'(같은 단계의 최근 카세트), 'synthetic'(단계별 최소 유효 응답)
+    # 지연 분포: recorded(scale) | fixed(seconds) | uniform(low, high) | normal(mean, stddev) | lognormal(median, sigma)
+    'LATENCY': {'distribution': 'recorded', 'scale': 1.0},
+    'STAGE_LATENCY': {},  # 실행 이름별 지연 분포, 예: {'chain1_llm': {'distribution': 'lognormal', 'median': 8.0, 'sigma': 0.3}}
+    'FIRST_TOKEN_RATIO': 0.3,  # 스트리밍 재생 시 전체 지연 중 첫 청크까지의 비율
+    'CHUNK_CHARS': 32,  # 스트리밍 재생 청크 크기(문자)
+    'SEED': None  # 지연 샘플링 시드 (재현 가능한 부하 테스트용)
+}
+
+# 체인 계측 설정 (콜백 기반 단계별 소요 시간/첫 토큰 지연/토큰 수 히스토그램)
+METRICS_CONFIG = {
+    'ENABLED': True,
+    'WINDOW': 200,  # 단계·측정값별 최근 표본 수 (p50/p95/p99 계산 범위)
+    'MAX_AGE_SECONDS': 24 * 3600  # 이보다 오래된 표본은 제외
+}
+
+# 사용량 집계/예산 설정 (실행별·체인별 프롬프트 문자, 이미지 바이트, 토큰 - 초과 시 경고)
+USAGE_CONFIG = {
+    'ENABLED': True,
+    'LEDGER_FILE': BASE_DIR / 'tetris_IO' / 'log_data' / 'usage.jsonl',  # 실행별 요약 누적 기록
+    'PER_RUN': {  # 실행 합계 예산 (0이면 검사 안 함)
+        'input_tokens': 20000,
+        'output_tokens': 4000,
+        'prompt_chars': 40000,
+        'image_bytes': 3 * 1024 * 1024
+    },
+    'PER_CHAIN': {  # 체인별 예산, 예: {'chain3': {'input_tokens': 8000}}
+        'chain2': {'image_bytes': 1536 * 1024}
+    }
+}
+
+# 추측 실행 설정 (업로드 직후 Chain 1 사전 실행)
+SPECULATIVE_CONFIG = {
+    'ENABLED': True,
+    'TTL_SECONDS': 600  # 분석 시작 없이 이 시간이 지나면 사전 실행 결과 폐기
+}
+
+# 분석 작업 큐 설정 (동시 분석 수 제한 - 작업 1건당 Gemini 호출 약 3회이므로 API 분당 할당량에 맞춰 조정)
+JOB_QUEUE_CONFIG = {
+    'MAX_WORKERS': 3,  # 동시에 실행할 분석 수
+    'MAX_QUEUED': 20,  # 대기열 최대 길이 (초과 시 분석 요청 거절)
+    'RETENTION_SECONDS': 3600,  # 끝난 작업 기록 보관 시간
+    'MAX_FINISHED': 100,  # 보관할 끝난 작업 최대 수
+    'SSE_HEARTBEAT_SECONDS': 15  # 작업 SSE에서 변경이 없을 때 keep-alive 간격
 }
 
 # 하드웨어 설정 (아두이노 모터 제어용)
@@ -57,7 +190,9 @@ HARDWARE_CONFIG = {
     'BAUD_RATE': 9600,  # 시리얼 통신 속도
     'AUTOMATION_COMMAND_LENGTH': 16,  # AI 생성 배치 코드 길이
     'CONNECTION_TIMEOUT': 5.0,  # 연결 대기 시간 (초)
-    'OPERATION_TIMEOUT': 30.0   # 작업 완료 대기 시간 (초)
+    'OPERATION_TIMEOUT': 30.0,  # 작업 완료 대기 시간 (초)
+    'ORCHESTRATION': 'concurrent',  # 'concurrent': AI 체인 실행과 동시에 아두이노 연결, 'sequential': 체인 완료 후 연결
+    'PARALLEL_CONNECT': True  # 보드별 연결(리셋 대기 2초)을 동시에 진행
 }
 
 # 출력 설정 (AI 분석 결과 저장용)
@@ -114,7 +249,20 @@ def get_config(env=None):
     config = {
         'web': WEB_CONFIG.copy(),
         'upload': UPLOAD_CONFIG.copy(),
+        'preprocess': PREPROCESS_CONFIG.copy(),
+        'phash': PHASH_CONFIG.copy(),
         'ai': AI_CONFIG.copy(),
+        'chain_policy': CHAIN_POLICY_CONFIG.copy(),
+        'startup': STARTUP_CONFIG.copy(),
+        'cache': CACHE_CONFIG.copy(),
+        'stage_memo': STAGE_MEMO_CONFIG.copy(),
+        'speculative': SPECULATIVE_CONFIG.copy(),
+        'jobs': JOB_QUEUE_CONFIG.copy(),
+        'checkpoint': CHECKPOINT_CONFIG.copy(),
+        'context_cache': CONTEXT_CACHE_CONFIG.copy(),
+        'llm_standin': LLM_STANDIN_CONFIG.copy(),
+        'metrics': METRICS_CONFIG.copy(),
+        'usage': USAGE_CONFIG.copy(),
         'hardware': HARDWARE_CONFIG.copy(),
         'output': OUTPUT_CONFIG.copy(),
         'logging': LOGGING_CONFIG.copy(),
@@ -135,6 +283,10 @@ def get_config(env=None):
         config['web']['PORT'] = 5003
         config['logging']['LEVEL'] = 'WARNING'
         config['upload']['MAX_FILE_SIZE'] = 1024 * 1024  # 1MB for testing
+        config['context_cache']['BACKEND'] = 'local'
+        if config['llm_standin']['MODE'] == 'off':
+            config['llm_standin']['MODE'] = 'replay'
+            config['llm_standin']['MISSING'] = 'synthetic'
         
     # 프로덕션 환경 설정
     elif env == 'production':
@@ -0,0 +1,235 @@
+# 체인 실행 정책 - 단계별 마감 시간, 지터 지수 백오프, 모델별 서킷 브레이커, 예산 기반 모델 폴백
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+
+class StageTimeoutError(TimeoutError):
+    """단계 마감 시간 또는 전체 실행 예산 초과"""
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 있고 사용할 폴백 모델도 없음"""
+
+
+class CircuitBreaker:
+    """모델별 서킷 브레이커 (closed → 연속 실패 시 open → 일정 시간 후 half_open 시험 호출)"""
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return 'half_open'
+            return 'open'
+
+    def allow(self) -> bool:
+        return self.state != 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RunBudget:
+    """한 번의 파이프라인 실행에 대한 전체 시간 예산과 정책 결정 기록"""
+
+    def __init__(self, total_seconds: float):
+        self.total_seconds = total_seconds
+        self.started_at = time.monotonic()
+        self.decisions: List[Dict[str, Any]] = []
+
+    def remaining(self) -> float:
+        return self.total_seconds - (time.monotonic() - self.started_at)
+
+    def record(self, stage: str, decision: str, **details):
+        self.decisions.append({
+            'stage': stage,
+            'decision': decision,
+            'at': round(time.monotonic() - self.started_at, 3),
+            **details,
+        })
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'budget_seconds': self.total_seconds,
+            'elapsed': round(time.monotonic() - self.started_at, 3),
+            'decisions': list(self.decisions),
+        }
+
+
+class StagePolicy:
+    """단계 하나의 재시도/폴백 실행기 (동기·비동기 공통 결정 로직)"""
+
+    def __init__(self, policy: "ChainPolicy", stage: str, primary: "Runnable", model: str,
+                 fallback: Optional["Runnable"] = None, fallback_model: Optional[str] = None):
+        self.policy = policy
+        self.stage = stage
+        self.primary = primary
+        self.model = model
+        self.fallback = fallback
+        self.fallback_model = fallback_model
+
+    def _choose(self, run: RunBudget):
+        """남은 예산과 브레이커 상태로 이번 시도에 사용할 (runnable, 모델) 결정"""
+        if self.fallback is None:
+            if not self.policy.breaker(self.model).allow():
+                run.record(self.stage, 'circuit_open', model=self.model)
+                raise CircuitOpenError(f"{self.model} 서킷 브레이커 열림 ({self.stage})")
+            return self.primary, self.model
+
+        reason = None
+        if not self.policy.breaker(self.model).allow():
+            reason = 'circuit_open'
+        elif run.remaining() < self.policy.min_budget(self.model):
+            reason = 'low_budget'
+        if reason is None:
+            return self.primary, self.model
+        run.record(self.stage, 'fallback', model=self.fallback_model, replaced=self.model,
+                   reason=reason, remaining=round(run.remaining(), 3))
+        return self.fallback, self.fallback_model
+
+    def _timeout(self, run: RunBudget) -> float:
+        timeout = min(self.policy.stage_timeout(self.stage), run.remaining())
+        if timeout <= 0:
+            run.record(self.stage, 'budget_exhausted')
+            raise StageTimeoutError(f"{self.stage}: 전체 실행 예산({run.total_seconds}s) 소진")
+        return timeout
+
+    def _after_failure(self, run: RunBudget, model: str, attempt: int, error: Exception, elapsed: float) -> float:
+        """실패 기록 후 다음 시도까지 대기 시간 반환 (재시도 불가 시 예외 재발생)"""
+        self.policy.breaker(model).record_failure()
+        outcome = 'timeout' if isinstance(error, StageTimeoutError) else 'error'
+        run.record(self.stage, outcome, model=model, attempt=attempt, elapsed=round(elapsed, 3),
+                   error=f"{type(error).__name__}: {error}"[:200])
+        if attempt >= self.policy.max_retries:
+            raise error
+        delay = self.policy.backoff(attempt)
+        if delay >= run.remaining():
+            run.record(self.stage, 'give_up', reason='no_budget_for_retry')
+            raise error
+        run.record(self.stage, 'retry', attempt=attempt + 1, delay=round(delay, 3))
+        return delay
+
+    def _on_success(self, run: RunBudget, model: str, attempt: int, elapsed: float):
+        self.policy.breaker(model).record_success()
+        run.record(self.stage, 'ok', model=model, attempt=attempt, elapsed=round(elapsed, 3))
+
+    @staticmethod
+    def _call(started: threading.Event, runnable: "Runnable", inputs: dict, config):
+        started.set()
+        return runnable.invoke(inputs, config)
+
+    def invoke(self, inputs: dict, config=None):
+        run = inputs['_policy']
+        for attempt in range(self.policy.max_retries + 1):
+            runnable, model = self._choose(run)
+            self._timeout(run)
+            call_started = threading.Event()
+            future = self.policy.executor.submit(self._call, call_started, runnable, inputs, config)
+            # 실행기 대기 시간은 단계 마감 시간에서 제외 (시작 대기는 전체 예산 안에서만)
+            if not call_started.wait(max(run.remaining(), 0)):
+                future.cancel()
+            timeout = self._timeout(run)
+            started = time.monotonic()
+            try:
+                try:
+                    result = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    future.cancel()
+                    raise StageTimeoutError(f"{self.stage}: {timeout:.1f}s 마감 초과")
+            except Exception as e:
+                time.sleep(self._after_failure(run, model, attempt, e, time.monotonic() - started))
+                continue
+            self._on_success(run, model, attempt, time.monotonic() - started)
+            return result
+
+    async def ainvoke(self, inputs: dict, config=None):
+        run = inputs['_policy']
+        for attempt in range(self.policy.max_retries + 1):
+            runnable, model = self._choose(run)
+            timeout = self._timeout(run)
+            started = time.monotonic()
+            try:
+                try:
+                    result = await asyncio.wait_for(runnable.ainvoke(inputs, config), timeout=timeout)
+                except asyncio.TimeoutError:
+                    raise StageTimeoutError(f"{self.stage}: {timeout:.1f}s 마감 초과")
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(run, model, attempt, e, time.monotonic() - started))
+                continue
+            self._on_success(run, model, attempt, time.monotonic() - started)
+            return result
+
+
+class ChainPolicy:
+    """AI_CONFIG(CHAIN_TIMEOUT, MAX_RETRIES)와 CHAIN_POLICY_CONFIG 기반 단계 실행 정책"""
+
+    def __init__(self, ai_config: Dict[str, Any], policy_config: Dict[str, Any], max_workers: int = 4):
+        self.total_timeout = float(ai_config.get('CHAIN_TIMEOUT', 300))
+        self.max_retries = int(ai_config.get('MAX_RETRIES', 3))
+        self.config = policy_config
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        # 마감 초과로 버려진 호출도 끝날 때까지 스레드를 점유하므로 동시 분석 수 × 단계 수만큼 확보
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='chain-policy')
+
+    def new_run(self, _=None) -> RunBudget:
+        return RunBudget(self.total_timeout)
+
+    def stage_timeout(self, stage: str) -> float:
+        return float(self.config.get('STAGE_TIMEOUTS', {}).get(stage, self.total_timeout))
+
+    def min_budget(self, model: str) -> float:
+        return float(self.config.get('MIN_BUDGET_SECONDS', {}).get(model, 0))
+
+    def fallback_model(self, model: str) -> Optional[str]:
+        return self.config.get('FALLBACK_MODELS', {}).get(model)
+
+    def backoff(self, attempt: int) -> float:
+        """지터 지수 백오프 (full jitter: 0 ~ min(상한, 기본값 × 2^attempt))"""
+        base = float(self.config.get('BACKOFF_BASE', 1.0))
+        cap = float(self.config.get('BACKOFF_MAX', 20.0))
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    failure_threshold=int(self.config.get('BREAKER_FAILURE_THRESHOLD', 3)),
+                    reset_seconds=float(self.config.get('BREAKER_RESET_SECONDS', 60)),
+                )
+            return self._breakers[model]
+
+    def breaker_states(self) -> Dict[str, str]:
+        with self._lock:
+            models = list(self._breakers)
+        return {model: self.breaker(model).state for model in models}
+
+    def wrap(self, stage: str, primary: "Runnable", model: str,
+             fallback: Optional["Runnable"] = None, fallback_model: Optional[str] = None) -> "Runnable":
+        """runnable을 정책 실행기로 감싼 RunnableLambda 반환 (입력 dict의 '_policy'에 실행 예산 필요)"""
+        from langchain_core.runnables import RunnableLambda
+        stage_policy = StagePolicy(self, stage, primary, model, fallback, fallback_model)
+        return RunnableLambda(stage_policy.invoke, afunc=stage_policy.ainvoke, name=f"{stage}_policy")
@@ -0,0 +1,258 @@
+# 컨텍스트 캐시 - 정적 프롬프트 접두부(시스템/역할/환경 등)를 제공자 측 캐시(cached_content)로 재사용
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_core.runnables import Runnable
+
+
+def _message_text(message: "BaseMessage") -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def prefix_digest(model: str, messages: Sequence["BaseMessage"]) -> str:
+    """모델 + 접두 메시지(역할/내용) 해시 - 프롬프트 파일이 바뀌면 달라짐"""
+    h = hashlib.sha256(model.encode("utf-8"))
+    for message in messages:
+        h.update(b"\0" + message.type.encode("utf-8") + b"\0" + _message_text(message).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class PromptPrefix:
+    """프롬프트 파일로 만든 정적 접두 메시지 (파일 mtime/크기가 바뀌면 다시 읽음)"""
+
+    def __init__(self, files: Sequence[Tuple[str, Path]], render: Callable[[Sequence[Tuple[str, Path]]], List["BaseMessage"]]):
+        self.files = list(files)
+        self.render = render
+        self._signature = None
+        self._messages: List["BaseMessage"] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def _stat_signature(self):
+        return tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for _, p in self.files)
+
+    def messages(self) -> List["BaseMessage"]:
+        signature = self._stat_signature()
+        with self._lock:
+            if signature != self._signature:
+                self._messages = self.render(self.files)
+                self._signature = signature
+            return self._messages
+
+
+class CacheEntry:
+    """생성된 캐시 하나 (백엔드 이름, 만료 시각, 접두 토큰 근사치)"""
+
+    def __init__(self, name: str, digest: str, expires_at: float, prefix_tokens: int):
+        self.name = name
+        self.digest = digest
+        self.expires_at = expires_at
+        self.prefix_tokens = prefix_tokens
+
+
+class LocalContextBackend:
+    """오프라인 대체 백엔드 - 접두 메시지를 메모리에 보관하고 호출 시 다시 붙여 전송 (캐시 수명/갱신 동작만 모사)"""
+
+    name = "local"
+
+    def __init__(self):
+        self._store: Dict[str, List["BaseMessage"]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, model: str, messages: List["BaseMessage"], ttl_seconds: float, digest: str) -> Tuple[str, float]:
+        name = f"cachedContents/local-{digest}"
+        with self._lock:
+            self._store[name] = list(messages)
+        return name, time.time() + ttl_seconds
+
+    def delete(self, name: str):
+        with self._lock:
+            self._store.pop(name, None)
+
+    def expand(self, entry: CacheEntry, tail: List["BaseMessage"]) -> List["BaseMessage"]:
+        with self._lock:
+            prefix = self._store.get(entry.name)
+        if prefix is None:
+            raise KeyError(f"로컬 캐시 없음: {entry.name}")
+        return prefix + list(tail)
+
+
+class GeminiContextBackend:
+    """Gemini cachedContents API 백엔드 (google-generativeai 필요)"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Callable[[], str]):
+        self._api_key = api_key
+        self._configured = False
+
+    def _caching(self):
+        import google.generativeai as genai
+        from google.generativeai import caching
+        if not self._configured:
+            genai.configure(api_key=self._api_key())
+            self._configured = True
+        return caching
+
+    def create(self, model: str, messages: List["BaseMessage"], ttl_seconds: float, digest: str) -> Tuple[str, float]:
+        caching = self._caching()
+        system = "\n\n".join(_message_text(m) for m in messages if m.type == "system")
+        contents = [{"role": "user", "parts": [_message_text(m)]} for m in messages if m.type != "system"]
+        cached = caching.CachedContent.create(
+            model=model if model.startswith("models/") else f"models/{model}",
+            display_name=f"tetris-{digest}",
+            system_instruction=system or None,
+            contents=contents or None,
+            ttl=timedelta(seconds=ttl_seconds),
+        )
+        expire_time = getattr(cached, "expire_time", None)
+        expires_at = expire_time.timestamp() if expire_time else time.time() + ttl_seconds
+        return cached.name, expires_at
+
+    def delete(self, name: str):
+        self._caching().CachedContent.get(name).delete()
+
+    expand = None
+
+
+class ContextCache:
+    """(단계, 모델)별 접두부 캐시 관리 - 만료 임박/파일 변경 시 재생성, 생성 실패 시 일정 시간 캐시 없이 호출"""
+
+    def __init__(self, backend, ttl_seconds: float = 3600, refresh_margin_seconds: float = 60,
+                 retry_after_seconds: float = 600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._entries: Dict[Tuple[str, str], CacheEntry] = {}
+        self._unavailable: Dict[str, float] = {}  # digest → 재시도 가능 시각
+        self._creating: Dict[Tuple[str, str], threading.Event] = {}  # 생성 중인 슬롯 (같은 슬롯의 다른 호출은 대기)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'creates': 0, 'refreshes': 0, 'fallbacks': 0, 'errors': 0, 'cached_tokens': 0}
+
+    def _retire(self, entry: CacheEntry):
+        try:
+            self.backend.delete(entry.name)
+        except Exception as e:
+            print(f"[컨텍스트 캐시] 이전 캐시 삭제 실패 (만료 시 자동 삭제): {e}")
+
+    def lookup(self, stage: str, model: str, prefix: List["BaseMessage"]) -> Optional[CacheEntry]:
+        """유효한 캐시 반환 (없거나 만료 임박이면 생성, 불가하면 None)"""
+        digest = prefix_digest(model, prefix)
+        slot = (stage, model)
+        while True:
+            with self._lock:
+                entry = self._entries.get(slot)
+                if entry is not None and entry.digest == digest and entry.expires_at - self.refresh_margin_seconds > time.time():
+                    self.stats['hits'] += 1
+                    self.stats['cached_tokens'] += entry.prefix_tokens
+                    return entry
+                if self._unavailable.get(digest, 0) > time.time():
+                    self.stats['fallbacks'] += 1
+                    return None
+                pending = self._creating.get(slot)
+                if pending is None:
+                    # 이 호출이 생성 담당 (백엔드 호출은 잠금 밖에서)
+                    pending = self._creating[slot] = threading.Event()
+                    break
+                # 다른 호출이 갱신 중이면 아직 만료되지 않은 이전 캐시 사용
+                if entry is not None and entry.digest == digest and entry.expires_at > time.time():
+                    self.stats['hits'] += 1
+                    self.stats['cached_tokens'] += entry.prefix_tokens
+                    return entry
+            # 다른 호출이 생성 중 - 끝나면 결과를 다시 확인
+            pending.wait()
+        try:
+            return self._create(stage, model, prefix, digest)
+        finally:
+            with self._lock:
+                self._creating.pop(slot, None)
+            pending.set()
+
+    def _create(self, stage: str, model: str, prefix: List["BaseMessage"], digest: str) -> Optional[CacheEntry]:
+        """백엔드에 캐시 생성 후 슬롯에 기록 (실패 시 retry_after_seconds 동안 캐시 없이 호출)"""
+        slot = (stage, model)
+        try:
+            name, expires_at = self.backend.create(model, prefix, self.ttl_seconds, digest)
+        except Exception as e:
+            with self._lock:
+                self._unavailable[digest] = time.time() + self.retry_after_seconds
+                self.stats['errors'] += 1
+                self.stats['fallbacks'] += 1
+            print(f"[컨텍스트 캐시] {stage} ({model}) 캐시 생성 실패 - {self.retry_after_seconds:.0f}s 동안 전체 프롬프트 전송: {e}")
+            return None
+        prefix_tokens = (sum(len(_message_text(m)) for m in prefix) + 3) // 4
+        new_entry = CacheEntry(name, digest, expires_at, prefix_tokens)
+        with self._lock:
+            previous = self._entries.get(slot)
+            self._entries[slot] = new_entry
+            self.stats['creates' if previous is None else 'refreshes'] += 1
+        if previous is not None and previous.name != name:
+            self._retire(previous)
+        print(f"[컨텍스트 캐시] {stage} ({model}) 접두부 캐시 {'생성' if previous is None else '갱신'}: {name} (약 {prefix_tokens} 토큰)")
+        return new_entry
+
+    def invalidate(self, stage: str, model: str, entry: CacheEntry):
+        """호출 실패한 캐시 폐기 (다음 호출에서 재생성)"""
+        with self._lock:
+            if self._entries.get((stage, model)) is entry:
+                del self._entries[(stage, model)]
+                self.stats['errors'] += 1
+                self.stats['fallbacks'] += 1
+        print(f"[컨텍스트 캐시] {stage} ({model}) 캐시 호출 실패 - 전체 프롬프트로 재호출")
+
+    def _route(self, stage: str, model: str, llm, prefix: PromptPrefix, prompt_value) -> "Runnable":
+        from langchain_core.messages import HumanMessage
+        from langchain_core.runnables import RunnableLambda
+        messages = prompt_value.to_messages()
+        try:
+            static = prefix.messages()
+        except Exception as e:
+            print(f"[컨텍스트 캐시] {stage} 프롬프트 파일 읽기 실패 - 캐시 없이 호출: {e}")
+            return RunnableLambda(lambda _: messages) | llm
+        tail = messages[len(prefix):]
+        entry = self.lookup(stage, model, static)
+        full_prompt = RunnableLambda(lambda _: static + tail) | llm
+        if entry is None:
+            return full_prompt
+        if self.backend.expand is not None:
+            cached_call = RunnableLambda(lambda _: self.backend.expand(entry, tail)) | llm
+        else:
+            # cached_content와 system_instruction은 함께 보낼 수 없으므로 남은 시스템 메시지는 사용자 메시지로 전달
+            cached_tail = [HumanMessage(content=m.content) if m.type == "system" else m for m in tail]
+            cached_call = RunnableLambda(lambda _: cached_tail) | llm.bind(cached_content=entry.name)
+
+        def _invalidate(_):
+            self.invalidate(stage, model, entry)
+            return static + tail
+
+        # 제공자 측에서 캐시가 사라진 경우 등: 캐시를 버리고 전체 프롬프트로 재호출
+        return cached_call.with_fallbacks([RunnableLambda(_invalidate) | llm])
+
+    def wrap(self, stage: str, model: str, llm, prefix: PromptPrefix) -> "Runnable":
+        """prompt 뒤에 둘 라우터 - 프롬프트 앞부분 len(prefix)개 메시지를 캐시로 대체하여 llm 호출"""
+        from langchain_core.runnables import RunnableLambda
+
+        def _invoke(prompt_value):
+            return self._route(stage, model, llm, prefix, prompt_value)
+
+        async def _ainvoke(prompt_value):
+            return await asyncio.to_thread(self._route, stage, model, llm, prefix, prompt_value)
+
+        return RunnableLambda(_invoke, afunc=_ainvoke, name=f"{stage}_context_cache")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'backend': self.backend.name, 'active': len(self._entries)}
@@ -0,0 +1,141 @@
+# 증분 JSON 추출기 - 스트리밍 청크에서 첫 완성 최상위 객체를 찾고, 찾는 즉시 모델 생성 중단
+import json
+import re
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+_SPECIAL = re.compile(r'[{}"\\]')
+
+Predicate = Callable[[Any], bool]
+
+
+class JSONObjectStream:
+    """청크를 받을 때마다 이어서 스캔하여 predicate를 만족하는 첫 완성 JSON 객체를 인식"""
+
+    def __init__(self, predicate: Optional[Predicate] = None):
+        self.predicate = predicate
+        self.buffer = ""
+        self.result: Any = None
+        self.end: Optional[int] = None  # 결과 객체 끝 위치 (buffer 기준)
+        self.fallback: Any = None  # predicate를 만족하지 않은 첫 dict
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    def feed(self, chunk: str) -> Any:
+        """청크 추가 후 스캔 - 객체가 완성되면 반환, 아니면 None"""
+        if self.done:
+            return self.result
+        self.buffer += chunk or ""
+        buf = self.buffer
+        while True:
+            if self._escape:
+                if self._pos >= len(buf):
+                    return None
+                self._escape = False
+                self._pos += 1
+            m = _SPECIAL.search(buf, self._pos)
+            if m is None:
+                self._pos = len(buf)
+                return None
+            ch, i = m.group(), m.start()
+            self._pos = i + 1
+            if self._start is None:
+                if ch == "{":
+                    self._start, self._depth, self._in_string = i, 1, False
+                continue
+            if self._in_string:
+                if ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._complete(buf, i):
+                    return self.result
+
+    def _complete(self, buf: str, close: int) -> bool:
+        """괄호가 닫힌 후보 검사 - 파싱 실패 시 여는 괄호 다음부터 다시 스캔"""
+        start, self._start = self._start, None
+        try:
+            obj = json.loads(buf[start:close + 1])
+        except ValueError:
+            self._pos = start + 1
+            return False
+        if self.predicate is None or self.predicate(obj):
+            self.result, self.end = obj, close + 1
+            return True
+        if self.fallback is None and isinstance(obj, dict):
+            self.fallback = obj
+        return False
+
+
+def extract_json_object(text: str, predicate: Optional[Predicate] = None, use_fallback: bool = True) -> Any:
+    """전체 텍스트에서 첫 JSON 객체 추출 (predicate 불만족 시 첫 dict, 없으면 None)"""
+    stream = JSONObjectStream(predicate)
+    stream.feed(text or "")
+    if stream.done:
+        return stream.result
+    return stream.fallback if use_fallback else None
+
+
+def chunk_text(chunk) -> str:
+    """스트리밍 청크(AIMessageChunk 등)에서 텍스트만 추출"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, str) else ""
+
+
+def stream_until_json(runnable: "Runnable", predicate: Optional[Predicate] = None, label: str = "") -> "Runnable":
+    """runnable(프롬프트 | LLM)을 스트리밍 실행하여 JSON 객체가 완성되면 생성을 중단하고 그때까지의 텍스트 반환"""
+    from langchain_core.runnables import RunnableLambda
+
+    def _finish(stream: JSONObjectStream, chunks: int) -> str:
+        if stream.done:
+            print(f"[스트림] {label} JSON 객체 완성 - {chunks}개 청크에서 생성 조기 종료")
+            return stream.buffer[:stream.end]
+        return stream.buffer
+
+    def _invoke(inputs: dict, config=None) -> str:
+        stream = JSONObjectStream(predicate)
+        chunks = 0
+        iterator = runnable.stream(inputs, config)
+        try:
+            for chunk in iterator:
+                chunks += 1
+                stream.feed(chunk_text(chunk))
+                if stream.done:
+                    break
+        finally:
+            iterator.close()  # 남은 생성 취소
+        return _finish(stream, chunks)
+
+    async def _ainvoke(inputs: dict, config=None) -> str:
+        stream = JSONObjectStream(predicate)
+        chunks = 0
+        iterator = runnable.astream(inputs, config)
+        try:
+            async for chunk in iterator:
+                chunks += 1
+                stream.feed(chunk_text(chunk))
+                if stream.done:
+                    break
+        finally:
+            await iterator.aclose()  # 남은 생성 취소
+        return _finish(stream, chunks)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=f"{label}_json_stream" if label else "json_stream")
@@ -0,0 +1,270 @@
+# LLM 녹화/재생 대역 - Gemini 응답을 프롬프트 해시별 카세트 파일로 저장하고, 네트워크 없이 합성 지연과 함께 재생
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+# 카세트가 없을 때 MISSING='synthetic'이면 사용할 단계별 최소 유효 응답 (실행 이름 기준)
+SYNTHETIC_RESPONSES = {
+    "chain1_llm": json.dumps({
+        "total_luggage_count": 2,
+        "luggage_details": {
+            "luggage_1": {"object": "중형 캐리어", "color": "검은색", "material": "플라스틱", "shape": "직육면체"},
+            "luggage_2": {"object": "백팩", "color": "회색", "material": "폴리에스터", "shape": "비정형"},
+        },
+        "luggage_amount": "S",
+    }, ensure_ascii=False, indent=2),
+    "chain2_llm": json.dumps({
+        "instruction": {"seats": {"1": ["x", "M", "F", "chair"], "2": ["x", "M", "F", "chair"],
+                                  "3": ["x", "M", "F", "chair"], "4": ["x", "M", "F", "chair"]}},
+        "option_no": 1,
+    }, ensure_ascii=False, indent=2),
+    "chain3_llm": json.dumps({
+        "task_sequence": {"1": "unchanged", "2": "unchanged", "3": "unchanged", "4": "unchanged"},
+    }, ensure_ascii=False, indent=2),
+}
+SYNTHETIC_RESPONSES["fused_llm"] = json.dumps({
+    "analysis": json.loads(SYNTHETIC_RESPONSES["chain1_llm"]),
+    **json.loads(SYNTHETIC_RESPONSES["chain2_llm"]),
+}, ensure_ascii=False, indent=2)
+
+
+def _content_parts(content) -> List[str]:
+    if isinstance(content, str):
+        return [content]
+    parts = []
+    for part in content:
+        if isinstance(part, dict) and part.get("type") == "image_url":
+            url = part["image_url"]["url"] if isinstance(part["image_url"], dict) else part["image_url"]
+            parts.append("image:" + hashlib.sha256(url.encode("utf-8")).hexdigest())
+        else:
+            parts.append(json.dumps(part, ensure_ascii=False, sort_keys=True) if isinstance(part, dict) else str(part))
+    return parts
+
+
+def prompt_hash(model: str, messages: List[BaseMessage]) -> str:
+    """모델 + 메시지(역할/내용, 이미지는 해시) 키"""
+    h = hashlib.sha256(model.encode("utf-8"))
+    for message in messages:
+        h.update(b"\0" + message.type.encode("utf-8"))
+        for part in _content_parts(message.content):
+            h.update(b"\1" + part.encode("utf-8"))
+    return h.hexdigest()[:24]
+
+
+def sample_latency(spec: Dict[str, Any], recorded: float, rng: random.Random) -> float:
+    """지연 분포 설정으로 응답 시간(초) 샘플링"""
+    distribution = spec.get("distribution", "recorded")
+    if distribution == "fixed":
+        value = float(spec.get("seconds", 0.0))
+    elif distribution == "uniform":
+        value = rng.uniform(float(spec.get("low", 0.0)), float(spec.get("high", 0.0)))
+    elif distribution == "normal":
+        value = rng.gauss(float(spec.get("mean", 0.0)), float(spec.get("stddev", 0.0)))
+    elif distribution == "lognormal":
+        value = float(spec.get("median", 1.0)) * rng.lognormvariate(0.0, float(spec.get("sigma", 0.0)))
+    elif distribution == "recorded":
+        value = recorded
+    else:
+        raise ValueError(f"알 수 없는 지연 분포: {distribution}")
+    return max(0.0, value * float(spec.get("scale", 1.0)))
+
+
+class CassetteStore:
+    """카세트 디렉토리 ({프롬프트 해시}.json - 응답 텍스트, 실행 이름, 모델, 녹화 당시 지연)"""
+
+    def __init__(self, cassette_dir: Path):
+        self.cassette_dir = Path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cassette_dir / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def latest(self, name: str) -> Optional[Dict[str, Any]]:
+        """같은 실행 이름으로 가장 최근에 녹화된 카세트"""
+        for path in sorted(self.cassette_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+            data = self.load(path.stem)
+            if data and data.get("name") == name:
+                return data
+        return None
+
+    def save(self, key: str, data: Dict[str, Any]):
+        path = self._path(key)
+        tmp = path.with_suffix(".json.tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, path)
+
+
+class CassetteChatModel(BaseChatModel):
+    """chain1_llm/chain2_llm/chain3_llm 대역 - record: 실제 모델 호출 후 저장, replay: 저장된 응답을 합성 지연으로 재생"""
+
+    model: str
+    mode: str = "replay"
+    store: CassetteStore
+    inner: Optional[BaseChatModel] = None
+    latency: Dict[str, Any] = {}
+    first_token_ratio: float = 0.3
+    chunk_chars: int = 32
+    missing: str = "error"
+    seed: Optional[int] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    # 재생
+    def _lookup(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        key = prompt_hash(self.model, messages)
+        data = self.store.load(key)
+        if data is None and self.missing == "any":
+            data = self.store.latest(self.name)
+        if data is None and self.missing == "synthetic" and self.name in SYNTHETIC_RESPONSES:
+            data = {"response": SYNTHETIC_RESPONSES[self.name], "latency": 0.0}
+        if data is None:
+            raise KeyError(f"카세트 없음: {self.name} ({self.model}) {key} - record 모드로 먼저 녹화하세요.")
+        return data
+
+    def _chunks(self, text: str) -> List[str]:
+        size = max(1, self.chunk_chars)
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _schedule(self, data: Dict[str, Any], count: int):
+        """(첫 청크까지 지연, 이후 청크 간격)"""
+        total = sample_latency(self.latency, float(data.get("latency", 0.0)), self._rng)
+        first = total * self.first_token_ratio
+        return first, (total - first) / max(1, count - 1)
+
+    # 녹화
+    def _record(self, messages: List[BaseMessage], text: str, started: float):
+        key = prompt_hash(self.model, messages)
+        self.store.save(key, {
+            "name": self.name,
+            "model": self.model,
+            "response": text,
+            "latency": round(time.perf_counter() - started, 4),
+            "recorded_at": time.time(),
+        })
+
+    def _require_inner(self) -> BaseChatModel:
+        if self.inner is None:
+            raise RuntimeError("record 모드에는 실제 모델(inner)이 필요합니다.")
+        return self.inner
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            started = time.perf_counter()
+            text = self._require_inner().invoke(messages, stop=stop, **kwargs).content
+            self._record(messages, text, started)
+        else:
+            data = self._lookup(messages)
+            time.sleep(sum(self._schedule(data, 2)))
+            text = data["response"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            started = time.perf_counter()
+            text = (await self._require_inner().ainvoke(messages, stop=stop, **kwargs)).content
+            self._record(messages, text, started)
+        else:
+            data = self._lookup(messages)
+            await asyncio.sleep(sum(self._schedule(data, 2)))
+            text = data["response"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.mode == "record":
+            started, parts = time.perf_counter(), []
+            try:
+                for chunk in self._require_inner().stream(messages, stop=stop, **kwargs):
+                    parts.append(chunk.content)
+                    yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+            except GeneratorExit:
+                # JSON 조기 종료로 닫힌 경우 - 그때까지 받은 응답으로 녹화
+                self._record(messages, "".join(parts), started)
+                raise
+            self._record(messages, "".join(parts), started)
+            return
+        data = self._lookup(messages)
+        chunks = self._chunks(data["response"])
+        first, gap = self._schedule(data, len(chunks))
+        for i, text in enumerate(chunks):
+            time.sleep(first if i == 0 else gap)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.mode == "record":
+            started, parts = time.perf_counter(), []
+            try:
+                async for chunk in self._require_inner().astream(messages, stop=stop, **kwargs):
+                    parts.append(chunk.content)
+                    yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+            except GeneratorExit:
+                self._record(messages, "".join(parts), started)
+                raise
+            self._record(messages, "".join(parts), started)
+            return
+        data = self._lookup(messages)
+        chunks = self._chunks(data["response"])
+        first, gap = self._schedule(data, len(chunks))
+        for i, text in enumerate(chunks):
+            await asyncio.sleep(first if i == 0 else gap)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+# 전역 카세트 저장소 인스턴스
+_cassette_store = None
+_cassette_store_lock = threading.Lock()
+
+def get_cassette_store(cassette_dir: Path) -> CassetteStore:
+    global _cassette_store
+    if _cassette_store is None:
+        with _cassette_store_lock:
+            if _cassette_store is None:
+                _cassette_store = CassetteStore(cassette_dir)
+    return _cassette_store
+
+
+def make_cassette_llm(name: str, model: str, standin_config: Dict[str, Any], inner: Optional[BaseChatModel] = None) -> CassetteChatModel:
+    """LLM_STANDIN_CONFIG로 대역 모델 생성 (실행 이름별 STAGE_LATENCY가 있으면 LATENCY 대신 사용)"""
+    return CassetteChatModel(
+        name=name,
+        model=model,
+        mode=standin_config['MODE'],
+        store=get_cassette_store(standin_config['CASSETTE_DIR']),
+        inner=inner,
+        latency=standin_config.get('STAGE_LATENCY', {}).get(name, standin_config.get('LATENCY', {})),
+        first_token_ratio=standin_config.get('FIRST_TOKEN_RATIO', 0.3),
+        chunk_chars=standin_config.get('CHUNK_CHARS', 32),
+        missing=standin_config.get('MISSING', 'error'),
+        seed=standin_config.get('SEED'),
+    )
@@ -1,14 +1,12 @@
 # TETRIS AI Chain - 4단계 LangChain 파이프라인
-import os, json, re
+# LangChain/Gemini 클라이언트와 프롬프트는 첫 사용(또는 warm_up) 시점에 지연 생성
+import os, json, hashlib, threading
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import TYPE_CHECKING, List, Dict
 from time import perf_counter
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import HumanMessage
+if TYPE_CHECKING:
+    from langchain_core.messages import HumanMessage
 
 # 경로 설정
 ROOT = Path(__file__).resolve().parent
@@ -17,9 +15,21 @@ TETRIS_ROOT = ROOT.parent
 # 설정 로드
 import sys
 sys.path.insert(0, str(TETRIS_ROOT))
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 from config import get_config
 config = get_config()
 SECRETS_JSON = config['ai']['SECRETS_JSON']
+CHAIN3_PLANNER = config['ai'].get('CHAIN3_PLANNER', 'local')
+PIPELINE_TOPOLOGY = config['ai'].get('PIPELINE_TOPOLOGY', 'staged')
+
+from seat_planner import extract_seats, plan_from_instruction, repair_plan
+from serial_codec import get_serial_codec
+from chain_policy import ChainPolicy
+from stage_memo import StageMemo, canonical_json
+from json_stream import extract_json_object, stream_until_json
+from option_table import OptionTable, luggage_amount_from_chain1
+from context_cache import ContextCache, GeminiContextBackend, LocalContextBackend, PromptPrefix
 
 # 프롬프트 파일 경로
 CHAIN1_PROMPT_TXT = ROOT / "chain1_prompt" / "chain1_prompt.txt"
@@ -34,6 +44,53 @@ C3_ENV_TXT = CHAIN3_DIR / "chain3_prompt_environment.txt"
 C3_FUNC_TXT = CHAIN3_DIR / "chain3_prompt_function.txt"
 C3_OUTFMT_TXT = CHAIN3_DIR / "chain3_prompt_output_format.txt"
 C3_EXAMPLE_TXT = CHAIN3_DIR / "chain3_prompt_example.txt"
+FUSED_PROMPT_TXT = ROOT / "fused_prompt" / "fused_prompt.txt"
+
+# 지연 초기화 싱글톤 - 모듈 속성 접근(MC.tetris_chain 등) 시 스레드 안전하게 1회 생성
+_LAZY_BUILDERS = {}
+_lazy_values = {}
+_lazy_lock = threading.RLock()
+
+def _lazy(name: str):
+    def register(builder):
+        _LAZY_BUILDERS[name] = builder
+        return builder
+    return register
+
+def _get(name: str):
+    try:
+        return _lazy_values[name]
+    except KeyError:
+        pass
+    with _lazy_lock:
+        if name not in _lazy_values:
+            _lazy_values[name] = _LAZY_BUILDERS[name]()
+        return _lazy_values[name]
+
+def __getattr__(name: str):
+    if name in _LAZY_BUILDERS:
+        return _get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def is_ready() -> bool:
+    """AI 체인 생성 완료 여부"""
+    return "tetris_chain" in _lazy_values
+
+def warm_up(background: bool = True):
+    """프롬프트/LLM 클라이언트/파이프라인을 미리 생성 (background=True면 데몬 스레드에서)"""
+    def _build():
+        t0 = perf_counter()
+        try:
+            _get("tetris_chain")
+            print(f"[준비] AI 체인 초기화 완료 ({perf_counter() - t0:.3f}s)")
+        except Exception as e:
+            print(f"[경고] AI 체인 사전 초기화 실패 (첫 분석 시 재시도): {e}")
+    if not background:
+        _build()
+        return None
+    thread = threading.Thread(target=_build, name="main-chain-warm-up", daemon=True)
+    thread.start()
+    return thread
 
 # 유틸리티 함수들
 def _read_text(p: Path) -> str:
@@ -59,69 +116,175 @@ for p, label in [
     (C3_FUNC_TXT, "chain3_prompt_function.txt"),
     (C3_OUTFMT_TXT, "chain3_prompt_output_format.txt"),
     (C3_EXAMPLE_TXT, "chain3_prompt_example.txt"),
+    (FUSED_PROMPT_TXT, "fused_prompt.txt"),
 ]:
     _require_exists(p, label)
 
-# Google API 키 로드
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-if not GOOGLE_API_KEY and SECRETS_JSON.exists():
-    GOOGLE_API_KEY = json.loads(_read_text(SECRETS_JSON))["google"]["GOOGLE_API_KEY"]
-    os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
-if not GOOGLE_API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY가 설정되어야 합니다.")
+def _prompt_fingerprint(paths) -> str:
+    """프롬프트 파일 내용 + 파이프라인 토폴로지 지문 (결과 캐시 키에 사용)"""
+    h = hashlib.sha256(f"topology={PIPELINE_TOPOLOGY}".encode("utf-8"))
+    for p in paths:
+        h.update(p.name.encode("utf-8"))
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+@_lazy("PROMPT_FINGERPRINT")
+def _build_prompt_fingerprint() -> str:
+    return _prompt_fingerprint([
+        CHAIN1_PROMPT_TXT, CHAIN2_PROMPT_TXT, CHAIN2_OPTION_TXT, C3_SYSTEM_TXT, C3_QUERY_TXT,
+        C3_ROLE_TXT, C3_ENV_TXT, C3_FUNC_TXT, C3_OUTFMT_TXT, C3_EXAMPLE_TXT, FUSED_PROMPT_TXT,
+    ])
+
+# Google API 키 로드 (LLM 클라이언트 생성 시점에 확인)
+@_lazy("GOOGLE_API_KEY")
+def _load_google_api_key() -> str:
+    api_key = os.getenv("GOOGLE_API_KEY", "")
+    if not api_key and SECRETS_JSON.exists():
+        api_key = json.loads(_read_text(SECRETS_JSON))["google"]["GOOGLE_API_KEY"]
+        os.environ["GOOGLE_API_KEY"] = api_key
+    if not api_key:
+        raise RuntimeError("GOOGLE_API_KEY가 설정되어야 합니다.")
+    return api_key
 
 # LLM 모델 초기화
-chain1_llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-pro",
-    temperature=0.2,
-    api_key=GOOGLE_API_KEY
-)
-chain2_llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-image",
-    temperature=0.2,
-    api_key=GOOGLE_API_KEY
-)
-chain3_llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-image",
-    temperature=0.2,
-    api_key=GOOGLE_API_KEY
+EARLY_STOP_JSON = config['ai'].get('EARLY_STOP_JSON', True)
+CHAIN2_OPTION_SLICING = config['ai'].get('CHAIN2_OPTION_SLICING', True)
+PLAN_VERIFY = config['ai'].get('PLAN_VERIFY', True)
+PLAN_REPAIR_MAX_EDITS = int(config['ai'].get('PLAN_REPAIR_MAX_EDITS', 2))
+CHAIN1_MODEL = "gemini-2.5-pro"
+CHAIN2_MODEL = CHAIN3_MODEL = "gemini-2.5-flash-image"
+FUSED_MODEL = CHAIN1_MODEL
+CHAIN_POLICY = ChainPolicy(
+    config['ai'], config['chain_policy'],
+    max_workers=config['jobs']['MAX_WORKERS'] * len(config['chain_policy']['STAGE_TIMEOUTS']),
 )
+# 예산 부족/서킷 열림 시 Chain 1 폴백 모델
+CHAIN1_FALLBACK_MODEL = CHAIN_POLICY.fallback_model(CHAIN1_MODEL)
+
+# LLM 녹화/재생 대역 ('record': Gemini 응답 저장, 'replay': 네트워크 없이 카세트 재생)
+LLM_STANDIN_MODE = config['llm_standin'].get('MODE', 'off')
+
+def _make_gemini_llm(name: str, model: str):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        name=name,
+        model=model,
+        temperature=0.2,
+        api_key=_get("GOOGLE_API_KEY")
+    )
 
-# Chain 1: 사용자 입력 분석
-_chain1_system = _escape_braces(_read_text(CHAIN1_PROMPT_TXT))
-chain1_prompt = ChatPromptTemplate.from_messages([
-    ("system", _chain1_system),
-    MessagesPlaceholder(variable_name="user_input"),
-])
+def _make_llm(name: str, model: str):
+    if LLM_STANDIN_MODE not in ("record", "replay"):
+        return _make_gemini_llm(name, model)
+    from llm_cassette import make_cassette_llm
+    inner = _make_gemini_llm(name, model) if LLM_STANDIN_MODE == "record" else None
+    return make_cassette_llm(name, model, config['llm_standin'], inner)
+
+@_lazy("chain1_llm")
+def _build_chain1_llm():
+    return _make_llm("chain1_llm", CHAIN1_MODEL)
+
+@_lazy("chain1_fallback_llm")
+def _build_chain1_fallback_llm():
+    # 토큰 스트림 구분을 위해 Chain 1과 같은 실행 이름 사용
+    return _make_llm("chain1_llm", CHAIN1_FALLBACK_MODEL) if CHAIN1_FALLBACK_MODEL else None
+
+@_lazy("fused_llm")
+def _build_fused_llm():
+    return _make_fused_llm(FUSED_MODEL)
+
+@_lazy("fused_fallback_llm")
+def _build_fused_fallback_llm():
+    return _make_fused_llm(CHAIN1_FALLBACK_MODEL) if CHAIN1_FALLBACK_MODEL else None
+
+def _make_fused_llm(model: str):
+    """통합 호출용 LLM - 응답을 JSON 모드(application/json)로 강제"""
+    return _make_llm("fused_llm", model).bind(generation_config={"response_mime_type": "application/json"})
+
+@_lazy("chain2_llm")
+def _build_chain2_llm():
+    return _make_llm("chain2_llm", CHAIN2_MODEL)
+
+@_lazy("chain3_llm")
+def _build_chain3_llm():
+    return _make_llm("chain3_llm", CHAIN3_MODEL)
+
+# 컨텍스트 캐시: 프롬프트 앞부분의 정적 메시지를 제공자 측 캐시로 대체
+CONTEXT_CACHE_STAGES = tuple(config['context_cache'].get('STAGES', ()))
+
+@_lazy("CONTEXT_CACHE")
+def _build_context_cache():
+    cache_config = config['context_cache']
+    # 대역 모델은 전체 프롬프트 해시로 카세트를 찾으므로 접두부 캐시와 함께 쓰지 않음
+    if not cache_config.get('ENABLED', True) or LLM_STANDIN_MODE in ("record", "replay"):
+        return None
+    if cache_config.get('BACKEND') == 'local':
+        backend = LocalContextBackend()
+    else:
+        backend = GeminiContextBackend(lambda: _get("GOOGLE_API_KEY"))
+    return ContextCache(
+        backend,
+        ttl_seconds=cache_config['TTL_SECONDS'],
+        refresh_margin_seconds=cache_config['REFRESH_MARGIN_SECONDS'],
+        retry_after_seconds=cache_config['RETRY_AFTER_SECONDS'],
+    )
 
-def make_chain1_user_input(people_count: int, image_data_url: str) -> List[HumanMessage]:
+def _render_static(files) -> list:
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(
+        [(role, _escape_braces(_read_text(p))) for role, p in files]).format_messages()
+
+# 단계별 정적 접두부 (각 프롬프트 템플릿의 앞부분 메시지와 같은 순서)
+@_lazy("CACHE_PREFIXES")
+def _build_cache_prefixes():
+    files = {
+        "chain1": [("system", CHAIN1_PROMPT_TXT)],
+        "chain2": [("system", CHAIN2_PROMPT_TXT)],
+        "chain3": [("system", C3_SYSTEM_TXT), ("human", C3_ROLE_TXT), ("human", C3_ENV_TXT),
+                   ("human", C3_FUNC_TXT), ("human", C3_OUTFMT_TXT), ("human", C3_EXAMPLE_TXT)],
+        "fused": [("system", CHAIN1_PROMPT_TXT), ("system", CHAIN2_PROMPT_TXT)],
+    }
+    return {stage: PromptPrefix(stage_files, _render_static) for stage, stage_files in files.items()}
+
+def _text_chain(prompt, llm, predicate, label: str, model: str = ""):
+    """prompt | llm 텍스트 체인 (정적 접두부는 컨텍스트 캐시 사용, EARLY_STOP_JSON이면 JSON 객체 완성 즉시 생성 중단)"""
+    cache = _get("CONTEXT_CACHE")
+    if cache is not None and model and label in CONTEXT_CACHE_STAGES:
+        llm = cache.wrap(label, model, llm, _get("CACHE_PREFIXES")[label])
+    if EARLY_STOP_JSON:
+        return stream_until_json(prompt | llm, predicate, label)
+    from langchain_core.output_parsers import StrOutputParser
+    return prompt | llm | StrOutputParser()
+
+# 토큰 스트리밍 이벤트의 실행 이름 → 단계 번호
+LLM_STEP_NAMES = {"chain1_llm": 1, "chain2_llm": 2, "chain3_llm": 3, "fused_llm": 1}
+
+# Chain 1: 사용자 입력 분석
+@_lazy("chain1_prompt")
+def _build_chain1_prompt():
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    return ChatPromptTemplate.from_messages([
+        ("system", _escape_braces(_read_text(CHAIN1_PROMPT_TXT))),
+        MessagesPlaceholder(variable_name="user_input"),
+    ])
+
+def make_chain1_user_input(people_count: int, image_data_url: str) -> "List[HumanMessage]":
+    from langchain_core.messages import HumanMessage
     return [
         HumanMessage(content=f"people_count = {people_count}"),
         HumanMessage(content=[{"type":"image_url","image_url":{"url":image_data_url}}]),
     ]
 
 def _inject_people_into_json(result_text: str, people_count: int) -> str:
-    text = (result_text or "").strip()
-    m = re.search(r"```(?:json)?\s*(.*?)```", text, re.S | re.I)
-    if m:
-        text = m.group(1).strip()
-    if not (text.startswith("{") and text.endswith("}")):
-        first = text.find("{"); last = text.rfind("}")
-        if first != -1 and last != -1 and first < last:
-            text = text[first:last+1]
-    try:
-        data = json.loads(text)
-        out = {"people": int(people_count or 0)}
-        if isinstance(data, dict):
-            out.update(data)
-        else:
-            out["model_output"] = data
-        return json.dumps(out, ensure_ascii=False, indent=2)
-    except Exception:
+    data = extract_json_object(result_text)
+    if not isinstance(data, dict):
         return json.dumps(
             {"people": int(people_count or 0), "raw_model_output": result_text},
             ensure_ascii=False, indent=2,
         )
+    out = {"people": int(people_count or 0)}
+    out.update(data)
+    return json.dumps(out, ensure_ascii=False, indent=2)
 
 def _inject_people_value(inputs: dict) -> str:
     return _inject_people_into_json(
@@ -130,14 +293,29 @@ def _inject_people_value(inputs: dict) -> str:
     )
 
 # Chain 2: 최적 배치 생성
-_chain2_system = _escape_braces(_read_text(CHAIN2_PROMPT_TXT))
-_chain2_option = _escape_braces(_read_text(CHAIN2_OPTION_TXT))
-chain2_prompt = ChatPromptTemplate.from_messages([
-    ("system", _chain2_system),
-    ("system", _chain2_option),
-    ("human", "{chain1_out}"),
-    MessagesPlaceholder(variable_name="chain2_image"),
-])
+@_lazy("chain2_prompt")
+def _build_chain2_prompt():
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    return ChatPromptTemplate.from_messages([
+        ("system", _escape_braces(_read_text(CHAIN2_PROMPT_TXT))),
+        ("system", "{chain2_options}"),
+        ("human", "{chain1_out}"),
+        MessagesPlaceholder(variable_name="chain2_image"),
+    ])
+
+def _estimate_tokens(text: str) -> int:
+    """토큰 수 근사치 (문자 4개 ≈ 1토큰)"""
+    return (len(text) + 3) // 4
+
+def _chain2_options_value(inputs: dict) -> str:
+    """Chain 2 프롬프트에 넣을 option_list - 탑승 인원의 cases만 압축 직렬화"""
+    if not CHAIN2_OPTION_SLICING:
+        return _read_text(CHAIN2_OPTION_TXT)
+    people_count = inputs.get("people_count", 0)
+    table = _get("OPTION_TABLE")
+    sliced = table.option_list_json(people_count)
+    print(f"[프롬프트] chain2 option_list: 약 {table.full_tokens} → {_estimate_tokens(sliced)} 토큰 (people_count={people_count})")
+    return sliced
 
 def _extract_chain2_image(inputs: dict) -> dict:
     msgs = inputs["user_input"]
@@ -149,163 +327,66 @@ def _extract_chain2_image(inputs: dict) -> dict:
 def _chain2_image_value(inputs: dict):
     return _extract_chain2_image(inputs)["chain2_image"]
 
+def _is_chain2_json(obj) -> bool:
+    return isinstance(obj, dict) and ("instruction" in obj or "seats" in obj)
+
 def _extract_instruction_json(result_text: str) -> str:
     """Chain2 결과에서 instruction 딕셔너리 추출"""
-    text = (result_text or "").strip()
-    m = re.search(r"```(?:json)?\s*(.*?)```", text, re.S | re.I)
-    if m:
-        text = m.group(1).strip()
-    if not (text.startswith("{") and text.endswith("}")):
-        first = text.find("{"); last = text.rfind("}")
-        if first != -1 and last != -1 and first < last:
-            text = text[first:last+1]
-
     def _wrap(instr_obj: dict) -> str:
         return json.dumps({"instruction": instr_obj}, ensure_ascii=False, indent=2, separators=(",", ":"))
 
-    try:
-        data = json.loads(text)
-        if isinstance(data, dict) and "instruction" in data:
-            instr = data["instruction"]
-            if isinstance(instr, dict):
-                return _wrap(instr)
-            else:
-                return _wrap({"raw_model_output": instr})
-        if isinstance(data, dict) and ("seats" in data or "1" in data or "2" in data):
-            return _wrap(data)
-        if isinstance(data, dict):
-            return _wrap(data)
-        return _wrap({"raw_model_output": data})
-
-    except Exception:
-        m2 = re.search(r'"instruction"\s*:\s*(\{.*\})', text, re.S | re.I)
-        if m2:
-            block = m2.group(1)
-            try:
-                instr = json.loads(block)
-                if isinstance(instr, dict):
-                    return _wrap(instr)
-                else:
-                    return _wrap({"raw_model_output": instr})
-            except Exception:
-                pass
+    data = extract_json_object(result_text, _is_chain2_json)
+    if not isinstance(data, dict):
         return _wrap({"raw_model_output": result_text})
+    if "instruction" in data:
+        instr = data["instruction"]
+        return _wrap(instr if isinstance(instr, dict) else {"raw_model_output": instr})
+    return _wrap(data)
 
 def _inject_instruction_value(inputs: dict) -> str:
     return _extract_instruction_json(inputs.get("chain2_out_raw", ""))
 
+@_lazy("_chain2_llm_chain")
+def _build_chain2_llm_chain():
+    return CHAIN_POLICY.wrap(
+        "chain2", _text_chain(_get("chain2_prompt"), _get("chain2_llm"), _is_chain2_json, "chain2", CHAIN2_MODEL), CHAIN2_MODEL)
+
 
 # Chain 3: 시트 동작 계획 생성
-_chain3_system = _escape_braces(_read_text(C3_SYSTEM_TXT))
-_chain3_role = _escape_braces(_read_text(C3_ROLE_TXT))
-_chain3_env = _escape_braces(_read_text(C3_ENV_TXT))
-_chain3_func = _escape_braces(_read_text(C3_FUNC_TXT))
-_chain3_outfmt = _escape_braces(_read_text(C3_OUTFMT_TXT))
-_chain3_example = _escape_braces(_read_text(C3_EXAMPLE_TXT))
-_chain3_query = _escape_braces(_read_text(C3_QUERY_TXT))
-
-chain3_prompt = ChatPromptTemplate.from_messages([
-    ("system", _chain3_system),
-    ("human", _chain3_role),
-    ("human", _chain3_env),
-    ("human", _chain3_func),
-    ("human", _chain3_outfmt),
-    ("human", _chain3_example),
-    ("human", "{chain2_out}"),
-    ("human", _chain3_query),
-])
-
-
-# Serial Encoder: 16자리 제어 코드 변환
-class serial_encoder:
-    def __init__(self):
-        self.encoding_rules = {
-            'disk_rotate': {0: '0000', 90: '0010'},
-            'move_on_rail': {'M': '0000', 'A': '0100', 'C': '0200'},
-            'seat_rotate': {0: '0000', 90: '1000', 180: '2000', 270: '3000'},
-            'unfold': '0000',
-            'fold': '0001',
-            'unchanged': '0000'
-        }
-    
-    def parse_function_call(self, func_call: str) -> Dict[str, Union[str, int, None]]:
-        if not func_call or not isinstance(func_call, str):
-            raise ValueError(f"Invalid function call (empty): {func_call}")
-        s = func_call.strip()
-        if not s:
-            raise ValueError(f"Invalid function call (blank): {func_call}")
-        if "(" not in s and ")" not in s:
-            return {"function": s, "param": None}
-        m = re.match(r"^\s*(\w+)\s*\(\s*(.*?)\s*\)\s*$", s)
-        if not m:
-            raise ValueError(f"Invalid function call format: {func_call}")
-        func_name, arg_str = m.group(1), m.group(2)
-        if arg_str == "":
-            param = None
-        else:
-            param_raw = arg_str.strip().strip('\'"')
-            param = int(param_raw) if param_raw.isdigit() else param_raw
-        return {"function": func_name, "param": param}
-    
-    def process_cell(self, function_calls: Union[str, List[str]]) -> str:
-        if function_calls is None:
-            return "0000"
-        if isinstance(function_calls, str):
-            raw = function_calls.strip()
-            if not raw:
-                calls = []
-            elif ";" in raw or "\n" in raw:
-                calls = [x.strip() for x in re.split(r"[;\n]", raw) if x.strip()]
-            else:
-                calls = [raw]
-        elif isinstance(function_calls, list):
-            calls = [str(x).strip() for x in function_calls if str(x).strip()]
-        else:
-            raise ValueError(f"Cell actions must be list or str, got: {type(function_calls)}")
-        
-        total_sum = 0
-        unfold_count = 0
-        for func_call in calls:
-            parsed = self.parse_function_call(func_call)
-            func_name = parsed["function"]; param = parsed["param"]
-            if func_name == "unchanged":
-                encoded_pin = '0000'
-            elif func_name == "disk_rotate":
-                if param not in self.encoding_rules["disk_rotate"]:
-                    raise ValueError(f"Invalid degree value for disk_rotate: {param}")
-                encoded_pin = self.encoding_rules["disk_rotate"][param]
-            elif func_name == "move_on_rail":
-                if param not in self.encoding_rules["move_on_rail"]:
-                    raise ValueError(f"Invalid target value for move_on_rail: {param}")
-                encoded_pin = self.encoding_rules["move_on_rail"][param]
-            elif func_name == "seat_rotate":
-                if param not in self.encoding_rules["seat_rotate"]:
-                    raise ValueError(f"Invalid degree value for seat_rotate: {param}")
-                encoded_pin = self.encoding_rules["seat_rotate"][param]
-            elif func_name == "unfold":
-                encoded_pin = '0000'; unfold_count += 1
-            elif func_name == "fold":
-                encoded_pin = '0001'
-            else:
-                raise ValueError(f"Unknown function: {func_name}")
-            total_sum += int(encoded_pin)
-        final_result = total_sum - unfold_count
-        return f"{final_result:04d}"
-    
-    def convert_to_16_digit(self, task_sequence: Dict[str, Union[str, List[str]]]) -> str:
-        if not isinstance(task_sequence, dict):
-            raise ValueError(f"task_sequence must be dict, got: {type(task_sequence)}")
-        return ''.join(self.process_cell(task_sequence.get(cell, "unchanged")) for cell in ['1','2','3','4'])
-    
-    def convert_from_json_string(self, json_string: str) -> str:
-        try:
-            data = json.loads(json_string)
-            if 'task_sequence' in data:
-                return self.convert_to_16_digit(data['task_sequence'])
-            else:
-                return self.convert_to_16_digit(data)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON format: {e}")
+@_lazy("chain3_prompt")
+def _build_chain3_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ("system", _escape_braces(_read_text(C3_SYSTEM_TXT))),
+        ("human", _escape_braces(_read_text(C3_ROLE_TXT))),
+        ("human", _escape_braces(_read_text(C3_ENV_TXT))),
+        ("human", _escape_braces(_read_text(C3_FUNC_TXT))),
+        ("human", _escape_braces(_read_text(C3_OUTFMT_TXT))),
+        ("human", _escape_braces(_read_text(C3_EXAMPLE_TXT))),
+        ("human", "{chain2_out}"),
+        ("human", _escape_braces(_read_text(C3_QUERY_TXT))),
+    ])
+
+@_lazy("_chain3_llm_chain")
+def _build_chain3_llm_chain():
+    return CHAIN_POLICY.wrap(
+        "chain3", _text_chain(_get("chain3_prompt"), _get("chain3_llm"), _is_chain3_json, "chain3", CHAIN3_MODEL), CHAIN3_MODEL)
+
+def _run_local_planner(inputs: dict) -> str:
+    """Chain2 instruction.seats를 로컬 플래너로 task_sequence 변환 (LLM 호출 없음)"""
+    return plan_from_instruction(inputs.get("chain2_out", ""))
+
+# 로컬 플래너 우선, instruction 파싱 실패 시 LLM Chain 3로 폴백
+@_lazy("chain3_runnable")
+def _build_chain3_runnable():
+    from langchain_core.runnables import RunnableLambda
+    if CHAIN3_PLANNER == "local":
+        return RunnableLambda(_run_local_planner).with_fallbacks([_get("_chain3_llm_chain")])
+    return _get("_chain3_llm_chain")
+
+
+def _is_chain3_json(obj) -> bool:
+    return isinstance(obj, dict) and ("task_sequence" in obj or any(k in obj for k in ("1", "2", "3", "4")))
 
 def _extract_json_str_for_serial_encoder(text: str) -> str:
     if not text or text.strip() == "":
@@ -320,17 +401,34 @@ def _extract_json_str_for_serial_encoder(text: str) -> str:
         }
         return json.dumps(fallback_json, ensure_ascii=False, indent=2)
     
-    t = text.strip()
-    m = re.search(r"```(?:json)?\s*(.*?)```", t, re.S | re.I)
-    if m:
-        return m.group(1).strip()
-    if not (t.startswith("{") and t.endswith("}")):
-        first = t.find("{"); last = t.rfind("}")
-        if first != -1 and last != -1 and first < last:
-            t = t[first:last+1]
-    return t
-
-_serial_encoder_converter = serial_encoder()
+    data = extract_json_object(text, _is_chain3_json)
+    if data is None:
+        return text.strip()
+    return json.dumps(data, ensure_ascii=False)
+
+# Serial Encoder: 16자리 제어 코드 변환 (표 기반 코덱)
+_serial_encoder_converter = get_serial_codec()
+
+def _check_chain3_plan(inputs: dict) -> dict:
+    """Chain 3 task_sequence를 Chain 2 목표 배치로 시뮬레이션 검증하고 작은 편차는 로컬 수리"""
+    text = inputs.get("chain3_out", "")
+    if not PLAN_VERIFY:
+        return {"chain3_out": text, "report": {"verified": False, "reason": "disabled"}}
+    try:
+        seats = extract_seats(inputs.get("chain2_out", ""))
+    except Exception as e:
+        return {"chain3_out": text, "report": {"verified": False, "reason": f"목표 배치 없음: {e}"}}
+
+    data = extract_json_object(text, _is_chain3_json) if text.strip() else {}
+    if not isinstance(data, dict):
+        return {"chain3_out": text, "report": {"verified": False, "reason": "task_sequence 없음"}}
+    task_sequence = data.get("task_sequence", data)
+    repaired, report = repair_plan(task_sequence, seats, PLAN_REPAIR_MAX_EDITS)
+    if report["repairs"]:
+        for repair in report["repairs"]:
+            print(f"[계획 검증] 셀 {repair['cell']} 수리: {repair['before']} → {repair['after']} (편집 {repair['edits']})")
+        text = json.dumps({"task_sequence": repaired}, ensure_ascii=False, indent=2)
+    return {"chain3_out": text, "report": report}
 
 def _run_serial_encoder_transform(inputs: dict) -> dict:
     raw = inputs.get("chain3_out", "")
@@ -346,25 +444,196 @@ def _run_serial_encoder_transform(inputs: dict) -> dict:
     return {"serial_encoder_out": result16}
 
 
+# Chain 2 옵션 테이블: 첫 사용 시 1회 컴파일
+@_lazy("OPTION_TABLE")
+def _build_option_table():
+    return OptionTable.load(CHAIN2_OPTION_TXT, encode=_serial_encoder_converter.convert_from_json_string)
+
+def _resolve_chain2_option(inputs: dict):
+    """Chain1 결과에 luggage_amount가 있으면 옵션 테이블에서 바로 조회"""
+    amount = luggage_amount_from_chain1(inputs.get("chain1_out", ""))
+    if amount is None:
+        return None
+    return _get("OPTION_TABLE").lookup(inputs.get("people_count", 0), amount)
+
+def _has_chain2_option(inputs: dict) -> bool:
+    return inputs.get("chain2_option") is not None
+
+
+# 단계별 메모: Chain 2/3 입력 정규화 해시 → 출력 재사용
+@_lazy("STAGE_MEMO")
+def _build_stage_memo():
+    memo_config = config['stage_memo']
+    if not memo_config.get('ENABLED', True):
+        return None
+    from utils.result_cache import TieredCache
+    cache = TieredCache(
+        cache_dir=memo_config['CACHE_DIR'],
+        memory_entries=memo_config['MEMORY_ENTRIES'],
+        disk_entries=memo_config['DISK_ENTRIES'],
+        disk_max_bytes=memo_config['DISK_MAX_BYTES'],
+        ttl_seconds=memo_config['TTL_SECONDS'],
+    )
+    return StageMemo(cache, namespace=_get("PROMPT_FINGERPRINT"))
+
+def _chain2_memo_input(inputs: dict):
+    """Chain 2 실제 입력: 정규화된 Chain 1 JSON + 이미지 해시 + 모델"""
+    from utils.result_cache import image_digest
+    image_url = _chain2_image_value(inputs)[0].content[0]["image_url"]["url"]
+    return f"{CHAIN2_MODEL}|{canonical_json(inputs.get('chain2_options', ''))}|{canonical_json(inputs.get('chain1_out', ''))}|{image_digest(image_url)}"
+
+def _chain3_memo_input(inputs: dict):
+    """Chain 3 실제 입력: 정규화된 instruction JSON (파싱 실패 출력은 메모하지 않음)"""
+    instruction = json.loads(inputs.get("chain2_out", ""))["instruction"]
+    if not isinstance(instruction, dict) or "seats" not in instruction:
+        return None
+    return f"{CHAIN3_PLANNER}|{CHAIN3_MODEL}|{canonical_json(instruction)}"
+
+def _is_valid_chain2_output(text: str) -> bool:
+    return "seats" in json.loads(_extract_instruction_json(text))["instruction"]
+
+def _is_valid_chain3_output(text: str) -> bool:
+    try:
+        _run_serial_encoder_transform({"chain3_out": text})
+        return True
+    except Exception:
+        return False
+
+def _memoized(stage: str, runnable, key_fn, validate):
+    memo = _get("STAGE_MEMO")
+    return memo.wrap(stage, runnable, key_fn, validate) if memo is not None else runnable
+
+def _stage_memo_report(d: dict) -> dict:
+    memo = _get("STAGE_MEMO")
+    if memo is None:
+        return {}
+    return {"run": dict(d.get("_memo") or {}), "totals": memo.get_stats()}
+
+# Chain 1: 정책 실행기 (마감/재시도/폴백)
+@_lazy("_chain1_llm_chain")
+def _build_chain1_llm_chain():
+    chain1_prompt = _get("chain1_prompt")
+    fallback_llm = _get("chain1_fallback_llm")
+    return CHAIN_POLICY.wrap(
+        "chain1", _text_chain(chain1_prompt, _get("chain1_llm"), None, "chain1", CHAIN1_MODEL), CHAIN1_MODEL,
+        fallback=_text_chain(chain1_prompt, fallback_llm, None, "chain1", CHAIN1_FALLBACK_MODEL) if fallback_llm else None,
+        fallback_model=CHAIN1_FALLBACK_MODEL,
+    )
+
+def _has_chain1_seed(inputs: dict) -> bool:
+    return bool((inputs.get("chain1_seed") or {}).get("chain1_out_raw"))
+
+def _resumed(key: str):
+    """체크포인트 재개 입력('_resume')에 해당 단계 출력이 있는지 검사하는 predicate"""
+    return lambda inputs: bool((inputs.get("_resume") or {}).get(key))
+
+def _resumed_value(key: str):
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(lambda inputs: inputs["_resume"][key], name=f"resume_{key}")
+
+def _save_checkpoint(d: dict, stage: str, **outputs):
+    """실행별 체크포인트('_checkpoint')가 있으면 단계 출력 기록"""
+    checkpoint = d.get("_checkpoint")
+    if checkpoint is None:
+        return
+    try:
+        checkpoint.save_stage(stage, **outputs)
+    except Exception as e:
+        print(f"[경고] {stage} 체크포인트 저장 실패: {e}")
+
+def _chain1_inputs(people_count: int, image_data_url: str) -> dict:
+    return {
+        "user_input": make_chain1_user_input(people_count, image_data_url),
+        "people_count": people_count,
+        "_policy": CHAIN_POLICY.new_run(),
+    }
+
+async def arun_chain1(people_count: int, image_data_url: str) -> dict:
+    """Chain 1만 단독 실행 (추측 실행용, 상태 저장/진행률 콜백 없음) - chain1_seed 형식 반환"""
+    started = perf_counter()
+    inputs = _chain1_inputs(people_count, image_data_url)
+    raw = await _get("_chain1_llm_chain").ainvoke(inputs)
+    return {
+        "chain1_out_raw": raw,
+        "run_time": perf_counter() - started,
+        "chain_policy": inputs["_policy"].report(),
+    }
+
+
+# Fused: Chain 1 분석 + Chain 2 배치를 단일 멀티모달 호출로 (Chain 3는 로컬 플래너)
+@_lazy("fused_prompt")
+def _build_fused_prompt():
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    return ChatPromptTemplate.from_messages([
+        ("system", _escape_braces(_read_text(CHAIN1_PROMPT_TXT))),
+        ("system", _escape_braces(_read_text(CHAIN2_PROMPT_TXT))),
+        ("system", "{chain2_options}"),
+        ("system", _escape_braces(_read_text(FUSED_PROMPT_TXT))),
+        MessagesPlaceholder(variable_name="user_input"),
+    ])
+
+def _is_fused_json(obj) -> bool:
+    return isinstance(obj, dict) and "analysis" in obj and "instruction" in obj
+
+@_lazy("_fused_llm_chain")
+def _build_fused_llm_chain():
+    fused_prompt = _get("fused_prompt")
+    fallback_llm = _get("fused_fallback_llm")
+    return CHAIN_POLICY.wrap(
+        "fused", _text_chain(fused_prompt, _get("fused_llm"), _is_fused_json, "fused", FUSED_MODEL), FUSED_MODEL,
+        fallback=_text_chain(fused_prompt, fallback_llm, _is_fused_json, "fused", CHAIN1_FALLBACK_MODEL) if fallback_llm else None,
+        fallback_model=CHAIN1_FALLBACK_MODEL,
+    )
+
+def _split_fused_output(inputs: dict) -> dict:
+    """통합 응답을 Chain 1/Chain 2 원본 출력 형식으로 분리 (파싱 실패 시 원문을 그대로 전달)"""
+    raw = inputs.get("fused_out_raw", "")
+    data = extract_json_object(raw, _is_fused_json)
+    if not _is_fused_json(data):
+        return {"chain1_out_raw": raw, "chain2_out_raw": raw}
+    analysis = data["analysis"]
+    return {
+        "chain1_out_raw": json.dumps(analysis, ensure_ascii=False, indent=2) if isinstance(analysis, dict) else raw,
+        "chain2_out_raw": json.dumps(
+            {k: data[k] for k in ("instruction", "option_no") if k in data}, ensure_ascii=False, indent=2),
+    }
+
+def _topology(inputs: dict) -> str:
+    """실행 토폴로지 (입력의 topology가 있으면 우선 - A/B 비교용)"""
+    return inputs.get("topology") or PIPELINE_TOPOLOGY
+
+def _is_fused(inputs: dict) -> bool:
+    return _topology(inputs) == "fused"
+
+
 # 상태 저장 및 진행률 업데이트 함수들
+def _report_stage(d, key, value, progress, status, message, step):
+    """단계 결과 전달 - 입력에 _on_stage가 있으면 해당 실행(작업)에만, 없으면 전역 상태에 저장"""
+    try:
+        on_stage = d.get("_on_stage")
+        if on_stage is not None:
+            on_stage(key, value, progress, status, message, current_step=step)
+        else:
+            from web_interface.base.state_manager import state_manager
+            analysis_result = state_manager.get('analysis_result', {})
+            analysis_result[key] = value
+            state_manager.set('analysis_result', analysis_result)
+
+            if hasattr(state_manager, '_progress_callback') and state_manager._progress_callback:
+                state_manager._progress_callback(progress, status, message, current_step=step)
+
+        print(f"[DEBUG] {step}단계 결과 저장 완료")
+    except Exception as e:
+        print(f"[오류] {step}단계 상태 저장 실패: {e}")
+
 def _tap_save_chain1(d):
     """1단계 결과 저장 및 진행률 업데이트"""
     print("\n=====================chain1_out =====================")
     print(d.get("chain1_out", ""))
     print(f"\n[시간] chain1_run_time: {d.get('chain1_run_time', 0.0):.3f}s")
+    _save_checkpoint(d, "chain1", chain1_out_raw=d.get("chain1_out_raw", ""), chain1_out=d.get("chain1_out", ""))
     
-    try:
-        from web_interface.base.state_manager import state_manager
-        analysis_result = state_manager.get('analysis_result', {})
-        analysis_result['chain1_out'] = d.get("chain1_out", "")
-        state_manager.set('analysis_result', analysis_result)
-        
-        if hasattr(state_manager, '_progress_callback') and state_manager._progress_callback:
-            state_manager._progress_callback(25, "사용자 입력 분석 완료", "1단계 완료", current_step=1)
-        
-        print(f"[DEBUG] 1단계 결과 저장 완료")
-    except Exception as e:
-        print(f"[오류] 1단계 상태 저장 실패: {e}")
+    _report_stage(d, "chain1_out", d.get("chain1_out", ""), 25, "사용자 입력 분석 완료", "1단계 완료", 1)
     
     return ""
 
@@ -373,19 +642,9 @@ def _tap_save_chain2(d):
     print("\n=====================chain2_out =====================")
     print(d.get("chain2_out_raw", ""))
     print(f"\n[시간] chain2_run_time: {d.get('chain2_run_time', 0.0):.3f}s")
+    _save_checkpoint(d, "chain2", chain2_out_raw=d.get("chain2_out_raw", ""), chain2_out=d.get("chain2_out", ""))
     
-    try:
-        from web_interface.base.state_manager import state_manager
-        analysis_result = state_manager.get('analysis_result', {})
-        analysis_result['chain2_out'] = d.get("chain2_out_raw", "")
-        state_manager.set('analysis_result', analysis_result)
-        
-        if hasattr(state_manager, '_progress_callback') and state_manager._progress_callback:
-            state_manager._progress_callback(50, "최적 배치 생성 완료", "2단계 완료", current_step=2)
-        
-        print(f"[DEBUG] 2단계 결과 저장 완료")
-    except Exception as e:
-        print(f"[오류] 2단계 상태 저장 실패: {e}")
+    _report_stage(d, "chain2_out", d.get("chain2_out_raw", ""), 50, "최적 배치 생성 완료", "2단계 완료", 2)
     
     return ""
 
@@ -394,19 +653,9 @@ def _tap_save_chain3(d):
     print("\n=====================chain3_out =====================")
     print(d.get("chain3_out", ""))
     print(f"\n[시간] chain3_run_time: {d.get('chain3_run_time', 0.0):.3f}s")
+    _save_checkpoint(d, "chain3", chain3_out=d.get("chain3_out", ""))
     
-    try:
-        from web_interface.base.state_manager import state_manager
-        analysis_result = state_manager.get('analysis_result', {})
-        analysis_result['chain3_out'] = d.get("chain3_out", "")
-        state_manager.set('analysis_result', analysis_result)
-        
-        if hasattr(state_manager, '_progress_callback') and state_manager._progress_callback:
-            state_manager._progress_callback(75, "시트 동작 계획 완료", "3단계 완료", current_step=3)
-        
-        print(f"[DEBUG] 3단계 결과 저장 완료")
-    except Exception as e:
-        print(f"[오류] 3단계 상태 저장 실패: {e}")
+    _report_stage(d, "chain3_out", d.get("chain3_out", ""), 75, "시트 동작 계획 완료", "3단계 완료", 3)
     
     return ""
 
@@ -414,51 +663,124 @@ def _tap_save_serial_encoder(d):
     """Serial Encoder 결과 저장 및 진행률 업데이트"""
     print("\n=====================serial_encoder_out =====================")
     print(d.get("serial_encoder_out", ""))
+    _save_checkpoint(d, "serial_encoder", serial_encoder_out=d.get("serial_encoder_out", ""))
     
-    try:
-        from web_interface.base.state_manager import state_manager
-        analysis_result = state_manager.get('analysis_result', {})
-        analysis_result['serial_encoder_out'] = d.get("serial_encoder_out", "")
-        state_manager.set('analysis_result', analysis_result)
-        
-        if hasattr(state_manager, '_progress_callback') and state_manager._progress_callback:
-            state_manager._progress_callback(100, "최적 배치 생성 완료", "4단계 완료", current_step=4)
-        
-        print(f"[DEBUG] 4단계 결과 저장 완료")
-    except Exception as e:
-        print(f"[오류] 4단계 상태 저장 실패: {e}")
+    _report_stage(d, "serial_encoder_out", d.get("serial_encoder_out", ""), 100, "최적 배치 생성 완료", "4단계 완료", 4)
     
     return ""
 
 # LCEL 파이프라인 구성
-_pipeline = (
-    RunnablePassthrough()
+def _pipeline_head():
+    from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+    return (
+        RunnablePassthrough()
+        .assign(_policy=RunnableLambda(CHAIN_POLICY.new_run))
+        .assign(_memo=RunnableLambda(lambda _: {}))
+    )
+
+def _pipeline_tail(pipeline, chain3):
+    """Chain 3(계획) → 계획 검증 → Serial Encoder 공통 구간"""
+    from langchain_core.runnables import RunnableBranch, RunnableLambda
+    return (
+        pipeline
+        # Chain 3: 시트 동작 계획 생성
+        .assign(_t3_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(chain3_out=RunnableBranch(
+            (_resumed("chain3_out"), _resumed_value("chain3_out")),
+            (_has_chain2_option, RunnableLambda(lambda d: d["chain2_option"]["chain3_out"])),
+            chain3,
+        ))
+        .assign(_plan_check=RunnableLambda(_check_chain3_plan))
+        .assign(chain3_out=RunnableLambda(lambda d: d["_plan_check"]["chain3_out"]))
+        .assign(chain3_run_time=RunnableLambda(lambda d: perf_counter() - d["_t3_start"]))
+        .assign(_save3=RunnableLambda(_tap_save_chain3))
+    
+        # Serial Encoder: 16자리 제어 코드 변환
+        .assign(_t4_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(serial_encoder_out=RunnableBranch(
+            (_has_chain2_option, RunnableLambda(lambda d: d["chain2_option"]["serial_encoder_out"])),
+            RunnableLambda(lambda d: _run_serial_encoder_transform(d)["serial_encoder_out"]),
+        ))
+        .assign(serial_encoder_run_time=RunnableLambda(lambda d: perf_counter() - d["_t4_start"]))
+        .assign(_save4=RunnableLambda(_tap_save_serial_encoder))
+    )
+
+@_lazy("_pipeline")
+def _build_pipeline():
+    from langchain_core.runnables import RunnableBranch, RunnableLambda
+    pipeline = (
+        _pipeline_head()
     
-    # Chain 1: 사용자 입력 분석
-    .assign(_t1_start=RunnableLambda(lambda _: perf_counter()))
-    .assign(chain1_out_raw=(chain1_prompt | chain1_llm | StrOutputParser()))
-    .assign(chain1_out=RunnableLambda(_inject_people_value))
-    .assign(chain1_run_time=RunnableLambda(lambda d: perf_counter() - d["_t1_start"]))
-    .assign(_save1=RunnableLambda(_tap_save_chain1))
+        # Chain 1: 사용자 입력 분석
+        .assign(_t1_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(chain1_out_raw=RunnableBranch(
+            (_resumed("chain1_out_raw"), _resumed_value("chain1_out_raw")),
+            (_has_chain1_seed, RunnableLambda(lambda d: d["chain1_seed"]["chain1_out_raw"])),
+            _get("_chain1_llm_chain"),
+        ))
+        .assign(chain1_out=RunnableLambda(_inject_people_value))
+        .assign(chain1_run_time=RunnableLambda(lambda d: perf_counter() - d["_t1_start"]))
+        .assign(_save1=RunnableLambda(_tap_save_chain1))
     
-    # Chain 2: 최적 배치 생성
-    .assign(chain2_image=RunnableLambda(_chain2_image_value))
-    .assign(_t2_start=RunnableLambda(lambda _: perf_counter()))
-    .assign(chain2_out_raw=(chain2_prompt | chain2_llm | StrOutputParser()))
-    .assign(chain2_out=RunnableLambda(_inject_instruction_value))
-    .assign(chain2_run_time=RunnableLambda(lambda d: perf_counter() - d["_t2_start"]))
-    .assign(_save2=RunnableLambda(_tap_save_chain2))
+        # Chain 2: 최적 배치 생성 (옵션 테이블 적중 시 Chain 2/3 LLM 생략)
+        .assign(chain2_option=RunnableLambda(_resolve_chain2_option))
+        .assign(chain2_image=RunnableLambda(_chain2_image_value))
+        .assign(chain2_options=RunnableBranch(
+            (_has_chain2_option, RunnableLambda(lambda _: "")),
+            RunnableLambda(_chain2_options_value),
+        ))
+        .assign(_t2_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(chain2_out_raw=RunnableBranch(
+            (_resumed("chain2_out_raw"), _resumed_value("chain2_out_raw")),
+            (_has_chain2_option, RunnableLambda(lambda d: d["chain2_option"]["chain2_out_raw"])),
+            _memoized("chain2", _get("_chain2_llm_chain"), _chain2_memo_input, _is_valid_chain2_output),
+        ))
+        .assign(chain2_out=RunnableLambda(_inject_instruction_value))
+        .assign(chain2_run_time=RunnableLambda(lambda d: perf_counter() - d["_t2_start"]))
+        .assign(_save2=RunnableLambda(_tap_save_chain2))
+    )
+    return _pipeline_tail(
+        pipeline, _memoized("chain3", _get("chain3_runnable"), _chain3_memo_input, _is_valid_chain3_output))
+
+@_lazy("_fused_pipeline")
+def _build_fused_pipeline():
+    from langchain_core.runnables import RunnableBranch, RunnableLambda
+    pipeline = (
+        _pipeline_head()
     
-    # Chain 3: 시트 동작 계획 생성
-    .assign(_t3_start=RunnableLambda(lambda _: perf_counter()))
-    .assign(chain3_run_time=RunnableLambda(lambda d: perf_counter() - d["_t3_start"]))
-    .assign(chain3_out=(chain3_prompt | chain3_llm | StrOutputParser()))
-    .assign(_save3=RunnableLambda(_tap_save_chain3))
+        # Chain 1+2: 단일 호출 (재개 시 체크포인트된 단계 출력 사용)
+        .assign(_t1_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(chain2_options=RunnableBranch(
+            (_resumed("chain2_out_raw"), RunnableLambda(lambda _: "")),
+            RunnableLambda(_chain2_options_value),
+        ))
+        .assign(fused_out_raw=RunnableBranch(
+            (_resumed("chain2_out_raw"), RunnableLambda(lambda _: "")),
+            _get("_fused_llm_chain"),
+        ))
+        .assign(_fused=RunnableLambda(_split_fused_output))
+        .assign(chain1_out_raw=RunnableBranch(
+            (_resumed("chain1_out_raw"), _resumed_value("chain1_out_raw")),
+            RunnableLambda(lambda d: d["_fused"]["chain1_out_raw"]),
+        ))
+        .assign(chain1_out=RunnableLambda(_inject_people_value))
+        .assign(chain1_run_time=RunnableLambda(lambda d: perf_counter() - d["_t1_start"]))
+        .assign(_save1=RunnableLambda(_tap_save_chain1))
     
-    # Serial Encoder: 16자리 제어 코드 변환
-    .assign(serial_encoder_out=RunnableLambda(lambda d: _run_serial_encoder_transform(d)["serial_encoder_out"]))
-    .assign(_save4=RunnableLambda(_tap_save_serial_encoder))
-)
+        # Chain 2: 통합 응답의 배치 (옵션 테이블 적중 시 표준 배치/계획으로 대체)
+        .assign(chain2_option=RunnableLambda(_resolve_chain2_option))
+        .assign(_t2_start=RunnableLambda(lambda _: perf_counter()))
+        .assign(chain2_out_raw=RunnableBranch(
+            (_resumed("chain2_out_raw"), _resumed_value("chain2_out_raw")),
+            (_has_chain2_option, RunnableLambda(lambda d: d["chain2_option"]["chain2_out_raw"])),
+            RunnableLambda(lambda d: d["_fused"]["chain2_out_raw"]),
+        ))
+        .assign(chain2_out=RunnableLambda(_inject_instruction_value))
+        .assign(chain2_run_time=RunnableLambda(lambda d: perf_counter() - d["_t2_start"]))
+        .assign(_save2=RunnableLambda(_tap_save_chain2))
+    )
+    # Chain 3: LLM 없이 로컬 플래너만 사용
+    return _pipeline_tail(pipeline, RunnableLambda(_run_local_planner))
 
 def _select_outputs(d: dict) -> dict:
     """최종 출력 선택"""
@@ -470,9 +792,32 @@ def _select_outputs(d: dict) -> dict:
         "chain1_run_time": d.get("chain1_run_time", 0.0),
         "chain2_run_time": d.get("chain2_run_time", 0.0),
         "chain3_run_time": d.get("chain3_run_time", 0.0),
+        "serial_encoder_run_time": d.get("serial_encoder_run_time", 0.0),
         "chain2_out_raw": d.get("chain2_out_raw", ""),
+        "topology": _topology(d),
+        "chain1_source": "checkpoint" if _resumed("chain1_out_raw")(d) else "speculative" if _has_chain1_seed(d) and not _is_fused(d) else "llm",
+        "chain2_source": "checkpoint" if _resumed("chain2_out_raw")(d) else "option_table" if d.get("chain2_option") else "llm",
+        "resumed_stages": sorted(d.get("_resume") or {}),
+        "plan_check": (d.get("_plan_check") or {}).get("report", {}),
+        "chain_policy": d["_policy"].report() if d.get("_policy") else {},
+        "stage_memo": _stage_memo_report(d),
+        "context_cache": _get("CONTEXT_CACHE").get_stats() if _get("CONTEXT_CACHE") is not None else {},
     }
 
 # 최종 체인 정의
-tetris_chain = _pipeline | RunnableLambda(_select_outputs)
+@_lazy("tetris_chain")
+def _build_tetris_chain():
+    from langchain_core.runnables import RunnableBranch, RunnableLambda
+    # PIPELINE_TOPOLOGY(또는 입력의 topology)에 따라 단계별/통합 파이프라인 선택
+    return RunnableBranch(
+        (_is_fused, _get("_fused_pipeline")),
+        _get("_pipeline"),
+    ) | RunnableLambda(_select_outputs)
+
+def replay_result(result: dict, on_stage=None) -> dict:
+    """캐시된 체인 결과로 단계별 상태 저장/진행률 콜백을 동일하게 재생 (on_stage: 체인 입력의 _on_stage와 같음)"""
+    d = dict(result, _on_stage=on_stage) if on_stage is not None else result
+    for tap in (_tap_save_chain1, _tap_save_chain2, _tap_save_chain3, _tap_save_serial_encoder):
+        tap(d)
+    return result
 
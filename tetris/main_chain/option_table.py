@@ -0,0 +1,79 @@
+# Chain 2 옵션 테이블 - chain2_option.txt를 (people_count, luggage_amount) 인덱스로 사전 컴파일
+import json
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from seat_planner import plan_task_sequence
+
+LUGGAGE_AMOUNTS = ('S', 'M', 'L')
+
+
+class OptionTable:
+    """(people_count, luggage_amount) → instruction / task_sequence / 16자리 코드 조회 테이블"""
+
+    def __init__(self, option_list: list, encode: Callable[[str], str], full_tokens: int = 0):
+        self.option_list = option_list
+        self.full_tokens = full_tokens  # 원본 option_list 텍스트의 토큰 근사치 (슬라이싱 절감량 로그용)
+        self._groups: Dict[int, dict] = {int(group["people_count"]): group for group in option_list}
+        self._index: Dict[Tuple[int, str], dict] = {}
+        for group in option_list:
+            people_count = int(group["people_count"])
+            for case in group.get("cases", []):
+                amount = str(case["luggage_amount"]).upper()
+                instruction = case["instruction"]
+                chain3_out = json.dumps(
+                    {"task_sequence": plan_task_sequence(instruction["seats"])},
+                    ensure_ascii=False, indent=2,
+                )
+                self._index[(people_count, amount)] = {
+                    "people_count": people_count,
+                    "luggage_amount": amount,
+                    "option_no": case.get("option_no"),
+                    "instruction": instruction,
+                    "chain2_out_raw": json.dumps(
+                        {"instruction": instruction, "option_no": case.get("option_no")},
+                        ensure_ascii=False, separators=(",", ":"),
+                    ),
+                    "chain3_out": chain3_out,
+                    "serial_encoder_out": encode(chain3_out),
+                }
+
+    @classmethod
+    def load(cls, option_txt: Path, encode: Callable[[str], str]) -> "OptionTable":
+        """chain2_option.txt 파일에서 테이블 생성 (원본 토큰 수는 문자 4개 ≈ 1토큰으로 한 번만 계산)"""
+        text = Path(option_txt).read_text(encoding="utf-8")
+        return cls(json.loads(text)["option_list"], encode, full_tokens=(len(text) + 3) // 4)
+
+    def lookup(self, people_count, luggage_amount) -> Optional[dict]:
+        """조건에 맞는 옵션 반환 (없으면 None)"""
+        try:
+            key = (int(people_count), str(luggage_amount).strip().upper())
+        except (TypeError, ValueError):
+            return None
+        return self._index.get(key)
+
+    def option_list_json(self, people_count=None) -> str:
+        """Chain 2 프롬프트용 option_list 압축 JSON (people_count 지정 시 해당 cases만)"""
+        try:
+            group = self._groups.get(int(people_count))
+        except (TypeError, ValueError):
+            group = None
+        option_list = [group] if group is not None else self.option_list
+        return json.dumps({"option_list": option_list}, ensure_ascii=False, separators=(",", ":"))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def luggage_amount_from_chain1(chain1_out: str) -> Optional[str]:
+    """Chain 1 JSON에 luggage_amount(S/M/L)가 있으면 반환"""
+    try:
+        data = json.loads(chain1_out or "")
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    amount = data.get("luggage_amount")
+    if isinstance(amount, str) and amount.strip().upper() in LUGGAGE_AMOUNTS:
+        return amount.strip().upper()
+    return None
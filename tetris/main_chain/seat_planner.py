@@ -0,0 +1,244 @@
+# 시트 동작 로컬 플래너 - Chain 3 LLM 호출을 대체하는 결정적 최단 경로 탐색
+import json
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# 셀 상태: (rail_axis, position, facing, mode)
+SeatState = Tuple[str, str, str, str]
+
+CELL_IDS = ('1', '2', '3', '4')
+RAIL_AXES = ('x', 'y')
+POSITIONS = ('A', 'M', 'C')
+FACINGS = ('F', 'R', 'B', 'L')
+MODES = ('chair', 'storage')
+
+# chain3_prompt_environment.txt의 초기 환경 (항상 동일)
+INITIAL_STATE: SeatState = ('x', 'M', 'F', 'chair')
+
+# chain3_query.txt의 동작 순서 규칙: disk_rotate → fold → seat_rotate → move_on_rail → unfold
+ACTION_ORDER = ('disk_rotate', 'fold', 'seat_rotate', 'move_on_rail', 'unfold')
+
+
+def _rotate_facing(facing: str, degree: int) -> str:
+    """facing을 시계 방향으로 degree만큼 회전"""
+    return FACINGS[(FACINGS.index(facing) + degree // 90) % 4]
+
+
+def _successors(state: SeatState, phase: int, cell_id: str):
+    """현재 상태에서 순서 규칙을 지키며 적용 가능한 (동작, 다음 상태, 다음 단계) 목록"""
+    axis, position, facing, mode = state
+    for order in range(phase, len(ACTION_ORDER)):
+        name = ACTION_ORDER[order]
+        if name == 'disk_rotate':
+            next_axis = 'y' if axis == 'x' else 'x'
+            yield "disk_rotate(90)", (next_axis, position, _rotate_facing(facing, 90), mode), order + 1
+        elif name == 'fold' and mode == 'chair':
+            yield f"fold({cell_id})", (axis, position, facing, 'storage'), order + 1
+        elif name == 'seat_rotate' and mode == 'storage':
+            for degree in (90, 180, 270):
+                yield f"seat_rotate({degree})", (axis, position, _rotate_facing(facing, degree), mode), order + 1
+        elif name == 'move_on_rail' and mode == 'storage':
+            for target in POSITIONS:
+                if target != position:
+                    yield f"move_on_rail({target})", (axis, target, facing, mode), order + 1
+        elif name == 'unfold' and mode == 'storage':
+            yield f"unfold({cell_id})", (axis, position, facing, 'chair'), order + 1
+
+
+def parse_target(value) -> SeatState:
+    """instruction.seats의 셀 값 ["y","A","B","chair"]을 검증된 상태 튜플로 변환"""
+    if isinstance(value, dict):
+        value = [value.get('rail_axis'), value.get('position'), value.get('facing'), value.get('mode')]
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        raise ValueError(f"Invalid seat target: {value}")
+    axis, position, facing, mode = (str(v).strip() for v in value)
+    if axis not in RAIL_AXES or position not in POSITIONS or facing not in FACINGS or mode not in MODES:
+        raise ValueError(f"Invalid seat target: {value}")
+    return axis, position, facing, mode
+
+
+def plan_cell(target: SeatState, cell_id: str = '1', start: SeatState = INITIAL_STATE) -> List[str]:
+    """단일 셀에 대해 start → target 최소 동작 순서를 BFS로 탐색"""
+    if target == start:
+        return ["unchanged"]
+    queue = deque([(start, 0)])
+    parents: Dict[Tuple[SeatState, int], Optional[Tuple[Tuple[SeatState, int], str]]] = {(start, 0): None}
+    while queue:
+        node = queue.popleft()
+        state, phase = node
+        for action, next_state, next_phase in _successors(state, phase, cell_id):
+            next_node = (next_state, next_phase)
+            if next_node in parents:
+                continue
+            parents[next_node] = (node, action)
+            if next_state == target:
+                actions = []
+                while parents[next_node] is not None:
+                    next_node, step = parents[next_node]
+                    actions.append(step)
+                return actions[::-1]
+            queue.append(next_node)
+    raise ValueError(f"No valid action sequence for seat target: {target}")
+
+
+def plan_task_sequence(seats: Dict[str, list]) -> Dict[str, List[str]]:
+    """instruction.seats 전체에 대한 task_sequence 생성 (키 순서 유지)"""
+    if not isinstance(seats, dict) or not seats:
+        raise ValueError(f"instruction.seats must be a non-empty dict, got: {seats!r}")
+    return {str(cell): plan_cell(parse_target(value), str(cell)) for cell, value in seats.items()}
+
+
+def extract_seats(instruction_json: str) -> Dict[str, list]:
+    """Chain 2 결과(JSON 문자열)에서 instruction.seats 추출"""
+    data = json.loads(instruction_json)
+    if isinstance(data, dict) and 'instruction' in data:
+        data = data['instruction']
+    seats = data.get('seats') if isinstance(data, dict) else None
+    if not isinstance(seats, dict):
+        raise ValueError("instruction.seats가 없습니다.")
+    return seats
+
+
+def plan_from_instruction(instruction_json: str) -> str:
+    """Chain 2 instruction JSON → Chain 3 형식의 task_sequence JSON 문자열"""
+    task_sequence = plan_task_sequence(extract_seats(instruction_json))
+    return json.dumps({"task_sequence": task_sequence}, ensure_ascii=False, indent=2)
+
+
+# 계획 검증기 - task_sequence를 셀 상태 시뮬레이터로 실행하여 Chain 2 목표 배치와 비교
+class PlanVerificationError(ValueError):
+    """task_sequence가 목표 배치와 달라 로컬 수리 허용 범위를 넘음"""
+
+
+def _set_mode(mode: str):
+    return lambda state, param: (state[0], state[1], state[2], mode)
+
+
+# 동작 표: 이름 → (허용 파라미터, 필요 모드, 상태 변환)
+ACTION_TABLE = {
+    'disk_rotate': (
+        (0, 90), None,
+        lambda s, p: s if p == 0 else ('y' if s[0] == 'x' else 'x', s[1], _rotate_facing(s[2], 90), s[3]),
+    ),
+    'fold': (None, 'chair', _set_mode('storage')),
+    'seat_rotate': ((0, 90, 180, 270), 'storage', lambda s, p: (s[0], s[1], _rotate_facing(s[2], p), s[3])),
+    'move_on_rail': (POSITIONS, 'storage', lambda s, p: (s[0], p, s[2], s[3])),
+    'unfold': (None, 'storage', _set_mode('chair')),
+}
+
+
+def parse_action(call) -> Tuple[str, object]:
+    """"seat_rotate(90)" → ("seat_rotate", 90), "unchanged" → ("unchanged", None)"""
+    text = str(call).strip()
+    name, _, rest = text.partition('(')
+    param = rest.rstrip(')').strip().strip('\'"') if rest else None
+    if param is not None and param.isdigit():
+        param = int(param)
+    return name.strip(), (param if param != '' else None)
+
+
+def format_action(name: str, param, cell_id: str) -> str:
+    if name in ('fold', 'unfold'):
+        return f"{name}({cell_id})"
+    return name if param is None else f"{name}({param})"
+
+
+def normalize_actions(actions) -> List[str]:
+    """셀 동작 목록 정규화 (문자열은 ; 또는 줄바꿈으로 분리)"""
+    if actions is None:
+        return []
+    if isinstance(actions, str):
+        actions = [a for a in actions.replace(';', '\n').split('\n')]
+    return [str(a).strip() for a in actions if str(a).strip()]
+
+
+def simulate_cell(actions, cell_id: str = '1', start: SeatState = INITIAL_STATE) -> Tuple[SeatState, List[str]]:
+    """동작 순서를 적용한 최종 상태와 규칙 위반 목록 (위반이 있어도 효과는 적용)"""
+    state, phase, violations = start, 0, []
+    calls = normalize_actions(actions)
+    for call in calls:
+        name, param = parse_action(call)
+        if name == 'unchanged':
+            if len(calls) > 1:
+                violations.append("unchanged는 단독으로만 사용 가능")
+            continue
+        if name not in ACTION_TABLE:
+            violations.append(f"알 수 없는 동작: {call}")
+            continue
+        params, required_mode, apply = ACTION_TABLE[name]
+        if params is not None and param not in params:
+            violations.append(f"잘못된 파라미터: {call}")
+            continue
+        order = ACTION_ORDER.index(name)
+        if order < phase:
+            violations.append(f"동작 순서 위반: {call}")
+        phase = max(phase, order + 1)
+        if required_mode and state[3] != required_mode:
+            violations.append(f"{state[3]} 모드에서 {name} 불가: {call}")
+        state = apply(state, param)
+    return state, violations
+
+
+def _edit_distance(a: List[str], b: List[str]) -> int:
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (x != y))
+    return row[-1]
+
+
+def _canonical(actions: List[str], cell_id: str) -> List[str]:
+    """비교용 정규화 (unchanged 제거, 파라미터 표기 통일)"""
+    out = []
+    for call in actions:
+        name, param = parse_action(call)
+        if name != 'unchanged':
+            out.append(format_action(name, param, cell_id))
+    return out
+
+
+def verify_plan(task_sequence: Dict[str, object], seats: Dict[str, list]) -> Dict[str, dict]:
+    """셀별 시뮬레이션 결과 {cell: {ok, final, target, violations}} (목표 없는 셀은 초기 상태 유지가 목표)"""
+    cells = sorted(set(map(str, seats)) | set(map(str, task_sequence)))
+    report = {}
+    for cell in cells:
+        target = parse_target(seats[cell]) if cell in seats else INITIAL_STATE
+        final, violations = simulate_cell(task_sequence.get(cell), cell)
+        report[cell] = {
+            'ok': final == target and not violations,
+            'final': list(final),
+            'target': list(target),
+            'violations': violations,
+        }
+    return report
+
+
+def repair_plan(task_sequence: Dict[str, object], seats: Dict[str, list],
+                max_edits: int = 2) -> Tuple[Dict[str, object], Dict[str, object]]:
+    """검증 실패 셀을 최소 동작 순서로 교체 (원래 계획과의 편집 거리가 max_edits 이하일 때만)"""
+    cells = verify_plan(task_sequence, seats)
+    repaired = {str(cell): actions for cell, actions in task_sequence.items()}
+    repairs = []
+    for cell, result in cells.items():
+        if result['ok']:
+            continue
+        before = normalize_actions(task_sequence.get(cell))
+        after = plan_cell(tuple(result['target']), cell)
+        edits = _edit_distance(_canonical(before, cell), _canonical(after, cell))
+        if edits > max_edits:
+            raise PlanVerificationError(
+                f"셀 {cell} 계획이 목표 배치와 다름 (편집 거리 {edits} > {max_edits}): "
+                f"{before} → 최종 {result['final']}, 목표 {result['target']}, 위반 {result['violations']}"
+            )
+        repaired[cell] = after
+        repairs.append({
+            'cell': cell,
+            'before': before,
+            'after': after,
+            'edits': edits,
+            'final': result['final'],
+            'target': result['target'],
+            'violations': result['violations'],
+        })
+    return repaired, {'verified': True, 'cells': cells, 'repairs': repairs}
@@ -0,0 +1,199 @@
+# 시리얼 코덱 - task_sequence ↔ 16자리 제어 코드 (셀별 유효 동작 조합과 4자리 코드를 미리 계산한 표 기반)
+# 벤치마크/디코딩 CLI: python utils/serial_codec_bench.py --benchmark 20000
+import itertools
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from seat_planner import ACTION_ORDER, CELL_IDS, simulate_cell, verify_plan
+
+Action = Tuple[str, object]  # (동작 이름, 파라미터) - fold/unfold는 파라미터 무시
+CellPlan = Union[str, List[str], None]
+
+# 동작별 코드 (천: seat_rotate, 백: move_on_rail, 십: disk_rotate, 일: fold 1 / unfold -1)
+ACTION_CODES: Dict[str, Dict[object, int]] = {
+    'disk_rotate': {0: 0, 90: 10},
+    'fold': {None: 1},
+    'seat_rotate': {0: 0, 90: 1000, 180: 2000, 270: 3000},
+    'move_on_rail': {'M': 0, 'A': 100, 'C': 200},
+    'unfold': {None: -1},
+    'unchanged': {None: 0},
+}
+_PARAM_FREE = ('fold', 'unfold', 'unchanged')
+_INVALID_PARAM = {
+    'disk_rotate': "Invalid degree value for disk_rotate",
+    'seat_rotate': "Invalid degree value for seat_rotate",
+    'move_on_rail': "Invalid target value for move_on_rail",
+}
+
+
+def parse_call(call: str) -> Action:
+    """"seat_rotate(90)" → ("seat_rotate", 90) (숫자 파라미터는 int, fold/unfold 파라미터는 None)"""
+    text = call.strip()
+    if not text:
+        raise ValueError(f"Invalid function call (blank): {call}")
+    name, paren, rest = text.partition('(')
+    name = name.strip()
+    if paren and (not rest.endswith(')') or not name.isidentifier()):
+        raise ValueError(f"Invalid function call format: {call}")
+    if name not in ACTION_CODES:
+        raise ValueError(f"Unknown function: {name}")
+    if name in _PARAM_FREE:
+        return name, None
+    raw = rest[:-1].strip().strip('\'"') if paren else ''
+    param = int(raw) if raw.isdigit() else (raw or None)
+    if param not in ACTION_CODES[name]:
+        raise ValueError(f"{_INVALID_PARAM[name]}: {param}")
+    return name, param
+
+
+def split_calls(actions: CellPlan) -> Tuple[str, ...]:
+    """셀 동작 값(list 또는 ;/줄바꿈 구분 문자열)을 호출 문자열 튜플로 정규화"""
+    if actions is None:
+        return ()
+    if isinstance(actions, str):
+        return tuple(x.strip() for x in re.split(r"[;\n]", actions) if x.strip())
+    if isinstance(actions, list):
+        return tuple(str(x).strip() for x in actions if str(x).strip())
+    raise ValueError(f"Cell actions must be list or str, got: {type(actions)}")
+
+
+def format_call(action: Action, cell_id: str) -> str:
+    name, param = action
+    if name in ('fold', 'unfold'):
+        return f"{name}({cell_id})"
+    return name if param is None else f"{name}({param})"
+
+
+def _enumerate_combinations() -> List[Tuple[Action, ...]]:
+    """순서 규칙(disk_rotate → fold → seat_rotate → move_on_rail → unfold)을 지키는 모든 셀 동작 조합"""
+    choices = []
+    for name in ACTION_ORDER:
+        options = [None] + [(name, param) for param in ACTION_CODES[name]]
+        choices.append(options)
+    return [tuple(a for a in combo if a is not None) for combo in itertools.product(*choices)]
+
+
+class SerialCodec:
+    """표 기반 시리얼 코덱 - 유효 조합은 O(1) 표 조회로 인코딩, 4자리 코드는 O(1)로 대표 동작 순서로 디코딩"""
+
+    def __init__(self):
+        self.encode_table: Dict[Tuple[Action, ...], str] = {}
+        self.decode_table: Dict[str, Tuple[Tuple[Action, ...], ...]] = {}
+        candidates: Dict[str, List[Tuple[Action, ...]]] = {}
+        for combo in _enumerate_combinations():
+            total = sum(ACTION_CODES[name][param] for name, param in combo)
+            code = f"{total:04d}"
+            self.encode_table[combo] = code
+            if total >= 0:
+                candidates.setdefault(code, []).append(combo)
+        self.encode_table[(('unchanged', None),)] = "0000"
+        for code, combos in candidates.items():
+            combos.sort(key=self._decode_rank)
+            self.decode_table[code] = tuple(combos)
+        self._encode_calls = lru_cache(maxsize=4096)(self._encode_calls_uncached)
+
+    @staticmethod
+    def _decode_rank(combo: Tuple[Action, ...]):
+        """디코딩 대표 선택 기준: 규칙 위반 없음 → 동작 수 최소 → 효과 없는 동작(0도/M) 없음"""
+        calls = [format_call(a, '1') for a in combo]
+        _, violations = simulate_cell(calls or ["unchanged"])
+        no_op = sum(1 for name, param in combo if param in (0, 'M'))
+        return (len(violations), no_op, len(combo))
+
+    # 인코딩
+    def _encode_calls_uncached(self, calls: Tuple[str, ...]) -> str:
+        actions = tuple(parse_call(call) for call in calls)
+        code = self.encode_table.get(actions)
+        if code is not None:
+            return code
+        # 순서 규칙 밖의 조합(중복/역순)은 기존 인코더와 같이 동작별 코드 합
+        return f"{sum(ACTION_CODES[name][param] for name, param in actions):04d}"
+
+    def encode_cell(self, actions: CellPlan) -> str:
+        return self._encode_calls(split_calls(actions))
+
+    def encode(self, task_sequence: Dict[str, CellPlan]) -> str:
+        if not isinstance(task_sequence, dict):
+            raise ValueError(f"task_sequence must be dict, got: {type(task_sequence)}")
+        return ''.join(self.encode_cell(task_sequence.get(cell, "unchanged")) for cell in CELL_IDS)
+
+    def encode_json(self, json_string: str) -> str:
+        try:
+            data = json.loads(json_string)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON format: {e}")
+        return self.encode(data['task_sequence'] if 'task_sequence' in data else data)
+
+    # 기존 serial_encoder 인터페이스 호환
+    convert_to_16_digit = encode
+    convert_from_json_string = encode_json
+    process_cell = encode_cell
+
+    # 디코딩
+    def decode_cell(self, code: str, cell_id: str = '1', all_candidates: bool = False):
+        """4자리 코드 → 대표 동작 순서 (all_candidates면 같은 코드의 모든 유효 조합)"""
+        combos = self.decode_table.get(code)
+        if combos is None:
+            raise ValueError(f"Invalid cell code: {code}")
+        plans = [[format_call(a, cell_id) for a in combo] or ["unchanged"] for combo in combos]
+        return plans if all_candidates else plans[0]
+
+    def decode(self, code16: str) -> Dict[str, List[str]]:
+        """16자리 코드 → task_sequence (셀별 대표 동작 순서)"""
+        code16 = (code16 or "").strip()
+        if len(code16) != 4 * len(CELL_IDS) or not code16.isdigit():
+            raise ValueError(f"Invalid 16-digit code: {code16}")
+        return {cell: self.decode_cell(code16[i * 4:(i + 1) * 4], cell) for i, cell in enumerate(CELL_IDS)}
+
+    def is_standard(self, actions: CellPlan) -> bool:
+        """순서 규칙을 지키는 유효 조합인지 (unchanged 단독 포함)"""
+        try:
+            return tuple(parse_call(c) for c in split_calls(actions)) in self.encode_table or not split_calls(actions)
+        except ValueError:
+            return False
+
+    # 대량 처리 (오프라인 평가용)
+    @staticmethod
+    def _as_task_sequence(plan) -> dict:
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan.get('task_sequence', plan) if isinstance(plan, dict) else plan
+
+    def encode_many(self, plans: Iterable[Union[str, dict]]) -> List[str]:
+        """여러 계획(task_sequence dict 또는 JSON 문자열)을 한 번에 인코딩"""
+        return [self.encode(self._as_task_sequence(plan)) for plan in plans]
+
+    def validate_many(self, plans: Iterable[Union[str, dict]],
+                      targets: Optional[Iterable[Dict[str, list]]] = None) -> List[dict]:
+        """여러 계획 검증 - 인코딩 가능 여부, 순서 규칙 준수 셀, (targets가 있으면) 목표 배치 도달 여부"""
+        targets = list(targets) if targets is not None else None
+        results = []
+        for i, plan in enumerate(plans):
+            result = {'ok': False, 'code': None, 'error': None, 'nonstandard_cells': []}
+            try:
+                task_sequence = self._as_task_sequence(plan)
+                result['code'] = self.encode(task_sequence)
+                if not result['code'].isdigit():
+                    raise ValueError(f"serial_encoder result is not numeric: {result['code']}")
+                result['nonstandard_cells'] = [c for c in CELL_IDS if not self.is_standard(task_sequence.get(c))]
+                if targets is not None:
+                    cells = verify_plan(task_sequence, targets[i])
+                    result['unreached_cells'] = [c for c, r in cells.items() if not r['ok']]
+                result['ok'] = not result['nonstandard_cells'] and not result.get('unreached_cells')
+            except (ValueError, TypeError, AttributeError) as e:
+                result['error'] = str(e)
+            results.append(result)
+        return results
+
+
+# 전역 코덱 인스턴스 (표는 첫 사용 시 1회 계산)
+_serial_codec = None
+
+def get_serial_codec() -> SerialCodec:
+    global _serial_codec
+    if _serial_codec is None:
+        _serial_codec = SerialCodec()
+    return _serial_codec
+
@@ -0,0 +1,87 @@
+# 단계별 메모 - 각 체인의 실제 입력을 정규화 해시로 키잉하여 출력을 재사용 (메모리 LRU + 디스크)
+import hashlib
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from utils.result_cache import TieredCache
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+
+def canonical_json(value: Any) -> str:
+    """키 정렬/공백 제거한 정규 JSON 문자열 (JSON 문자열이면 파싱 후 정규화)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return value.strip()
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class StageMemo:
+    """단계 입력 정규화 해시 → 출력 메모 (실행별 적중 여부는 입력 dict의 '_memo'에 기록)"""
+
+    def __init__(self, cache: TieredCache, namespace: str):
+        self.cache = cache
+        self.namespace = namespace  # 프롬프트 지문 등 - 바뀌면 기존 메모 무효화
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, stage: str, canonical_input: str) -> str:
+        raw = f"{self.namespace}:{stage}:{canonical_input}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, inputs: dict, stage: str, outcome: str):
+        with self._lock:
+            counters = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+            counters["hits" if outcome == "hit" else "misses"] += 1
+        run_memo = inputs.get("_memo")
+        if isinstance(run_memo, dict):
+            run_memo[stage] = outcome
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {stage: dict(counters) for stage, counters in self.stats.items()}
+
+    def wrap(self, stage: str, runnable: "Runnable", key_fn: Callable[[dict], Optional[str]],
+             validate: Optional[Callable[[str], bool]] = None) -> "Runnable":
+        """runnable 앞에 메모 조회를 두는 RunnableLambda 반환 (key_fn이 None이면 메모 생략)"""
+        from langchain_core.runnables import RunnableLambda
+
+        def _lookup(inputs: dict):
+            try:
+                canonical_input = key_fn(inputs)
+            except Exception:
+                canonical_input = None
+            if canonical_input is None:
+                return None, None
+            key = self.make_key(stage, canonical_input)
+            return key, self.cache.get(key)
+
+        def _store(key: Optional[str], output: str):
+            if key and isinstance(output, str) and output.strip() and (validate is None or validate(output)):
+                self.cache.set(key, output)
+
+        def _invoke(inputs: dict, config=None):
+            key, cached = _lookup(inputs)
+            if cached is not None:
+                self._count(inputs, stage, "hit")
+                return cached
+            self._count(inputs, stage, "miss")
+            output = runnable.invoke(inputs, config)
+            _store(key, output)
+            return output
+
+        async def _ainvoke(inputs: dict, config=None):
+            key, cached = _lookup(inputs)
+            if cached is not None:
+                self._count(inputs, stage, "hit")
+                return cached
+            self._count(inputs, stage, "miss")
+            output = await runnable.ainvoke(inputs, config)
+            _store(key, output)
+            return output
+
+        return RunnableLambda(_invoke, afunc=_ainvoke, name=f"{stage}_memo")
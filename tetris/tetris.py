@@ -1,5 +1,6 @@
 # TETRIS 메인 엔진 - 웹 서버 및 AI 파이프라인 통합 관리
 import argparse
+import asyncio
 import sys
 import time
 from pathlib import Path
@@ -18,16 +19,34 @@ if not MC_DIR.exists():
 if str(MC_DIR) not in sys.path:
     sys.path.insert(0, str(MC_DIR))
 
-import main_chain as MC
+import main_chain as MC  # LLM 클라이언트/프롬프트는 첫 사용 또는 warm_up 시 생성
 
-# 하드웨어 제어 모듈 로드
+# 하드웨어 제어 모듈 로드 (serial/readchar 임포트는 실제 모터 제어 시점까지 지연)
 RPI_DIR = HERE / "arduino_ctrl"
 RPI_FILE = RPI_DIR / "arduino_ctrl.py"
 if not RPI_FILE.exists():
     raise FileNotFoundError(f"필수 파일이 없습니다: {RPI_FILE}")
 if str(RPI_DIR) not in sys.path:
     sys.path.insert(0, str(RPI_DIR))
-import arduino_ctrl as RPI
+
+def _load_arduino_ctrl():
+    """하드웨어 제어 모듈 지연 로드"""
+    import arduino_ctrl
+    return arduino_ctrl
+
+def _connect_hardware():
+    """하드웨어 제어 모듈 로드 후 아두이노 연결 (소요 시간 출력)"""
+    RPI = _load_arduino_ctrl()
+    t0 = perf_counter()
+    RPI.connect_to_arduinos(parallel=config['hardware'].get('PARALLEL_CONNECT', True))
+    print(f"[연결] 아두이노 연결 단계 완료 ({perf_counter() - t0:.3f}s)")
+    return RPI
+
+def warm_up_ai_chain():
+    """AI 체인 백그라운드 사전 초기화 (설정에서 비활성화 가능)"""
+    if config['startup'].get('WARM_UP', True):
+        return MC.warm_up(background=True)
+    return None
 
 # 공통 유틸리티 함수들
 def _setup_module_path(module_name: str) -> Path:
@@ -83,6 +102,292 @@ def _print_chain_results(result_data: dict):
         print(f"\n====================[ {section_name} ]====================")
         print(result_data.get(key, ""))
 
+# AI 체인 결과 캐시
+def _lookup_cached_result(people_count: int, image_data_url: str) -> Tuple[Optional[str], Optional[dict]]:
+    """결과 캐시 조회 - (캐시 키, 캐시된 체인 결과 또는 None)"""
+    try:
+        from utils.result_cache import get_result_cache, make_result_key
+        cache = get_result_cache(config['cache'])
+        if cache is None:
+            return None, None
+        key = make_result_key(image_data_url, people_count, MC.PROMPT_FINGERPRINT)
+        return key, cache.get(key)
+    except Exception as e:
+        print(f"[경고] 결과 캐시 조회 실패: {e}")
+        return None, None
+
+def _store_cached_result(cache_key: Optional[str], result: dict):
+    """정상 완료된 체인 결과만 캐시에 저장"""
+    if not cache_key or not str(result.get("serial_encoder_out", "")).strip().isdigit():
+        return
+    try:
+        from utils.result_cache import get_result_cache
+        cache = get_result_cache(config['cache'])
+        if cache is not None:
+            cache.set(cache_key, result)
+    except Exception as e:
+        print(f"[경고] 결과 캐시 저장 실패: {e}")
+
+def _replay_cached_result(cached: dict, on_stage=None) -> dict:
+    """캐시 적중 결과로 단계별 상태/진행률을 재생 (실행 시간은 0으로 기록)"""
+    print("[캐시] 동일 입력 결과 적중 - AI 체인 실행 생략")
+    result = dict(cached, chain1_run_time=0.0, chain2_run_time=0.0, chain3_run_time=0.0, serial_encoder_run_time=0.0)
+    return MC.replay_result(result, on_stage=on_stage)
+
+# 이미지 전처리
+def _prepare_chain_image(image_data_url: str, image_path: Optional[str] = None) -> Tuple[str, dict]:
+    """체인 입력 이미지를 전처리본으로 교체 (실패 시 원본 유지)"""
+    try:
+        from utils.image_preprocess import preprocess_data_url
+        prepared_url, stats = preprocess_data_url(image_data_url, image_path, config['preprocess'])
+        if stats.get('applied'):
+            ratio = stats['processed_bytes'] / max(stats['original_bytes'], 1)
+            print(f"[전처리] 모델 입력 이미지 {stats['original_bytes']} -> {stats['processed_bytes']} bytes ({ratio:.0%})")
+        return prepared_url, stats
+    except Exception as e:
+        print(f"[경고] 이미지 전처리 실패 - 원본 사용: {e}")
+        return image_data_url, {'applied': False, 'error': str(e)}
+
+# 지각 해시 유사 이미지 인덱스
+def _index_upload_result(people_count: int, image_data_url: str, scenario: str, analysis_result: dict, image_path: Optional[str] = None):
+    """완료된 분석 결과를 업로드 이미지의 지각 해시와 함께 인덱스에 기록"""
+    try:
+        from utils.image_hash_index import get_phash_index
+        from utils.result_cache import decode_data_url
+        index = get_phash_index(config['phash'])
+        if index is None:
+            return
+        result_keys = ('chain1_out', 'chain2_out', 'chain3_out', 'serial_encoder_out')
+        index.add(
+            decode_data_url(image_data_url),
+            people_count,
+            {key: analysis_result.get(key, "") for key in result_keys},
+            image_path=image_path,
+            scenario=scenario,
+        )
+    except Exception as e:
+        print(f"[경고] 지각 해시 인덱스 기록 실패: {e}")
+
+# 단계별 체크포인트
+def _begin_checkpoint(scenario: str, people_count: int, image_data_url: str, previous: Optional[dict] = None):
+    """실행 체크포인트 생성 (비활성화/실패 시 None)"""
+    try:
+        from utils.checkpoint import get_checkpoint_store
+        store = get_checkpoint_store(config['checkpoint'])
+        if store is None:
+            return None
+        return store.begin(scenario, people_count, image_data_url, MC.PROMPT_FINGERPRINT, previous)
+    except Exception as e:
+        print(f"[경고] 체크포인트 생성 실패: {e}")
+        return None
+
+def _fail_checkpoint(checkpoint, error: BaseException, status: str = 'failed'):
+    if checkpoint is None:
+        return
+    try:
+        checkpoint.mark_failed(error, status)
+        print(f"[체크포인트] {checkpoint.scenario}: {checkpoint.next_stage()} 단계에서 {status} - 완료 단계 {checkpoint.completed_stages()}")
+    except Exception as e:
+        print(f"[경고] 체크포인트 실패 기록 실패: {e}")
+
+def load_checkpoint(scenario: Optional[str] = None) -> Optional[dict]:
+    """시나리오 체크포인트 조회 (scenario가 없으면 가장 최근의 미완료 실행)"""
+    from utils.checkpoint import get_checkpoint_store
+    store = get_checkpoint_store(config['checkpoint'])
+    if store is None:
+        return None
+    return store.load(scenario) if scenario else store.latest()
+
+# 체인 실행 (중지 가능)
+class AnalysisCancelledException(Exception):
+    def __init__(self, message="분석이 중지되었습니다."):
+        self.message = message
+        super().__init__(self.message)
+
+async def _run_cancellable(coro, should_stop, poll_interval: float):
+    """코루틴 실행 중 중지 요청을 주기적으로 확인하고, 요청 시 진행 중인 모델 호출을 취소"""
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        await asyncio.wait({task}, timeout=poll_interval)
+        if not task.done() and should_stop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            raise AnalysisCancelledException("분석이 중지되었습니다.")
+    return task.result()
+
+def _chunk_text(chunk) -> str:
+    """스트리밍 청크에서 텍스트만 추출"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, str) else ""
+
+async def _astream_chain(chain_input: dict, broadcaster, run_config: Optional[dict] = None, job_id: Optional[str] = None) -> dict:
+    """astream_events로 체인 실행 - LLM 토큰을 브로드캐스터로 중계(job_id 태그)하고 최종 결과 반환"""
+    result = None
+    async for event in MC.tetris_chain.astream_events(chain_input, run_config, version="v2"):
+        kind = event["event"]
+        step = MC.LLM_STEP_NAMES.get(event.get("name"))
+        if step and kind == "on_chat_model_start":
+            broadcaster.publish("start", step, job_id=job_id)
+        elif step and kind == "on_chat_model_stream":
+            text = _chunk_text(event["data"].get("chunk"))
+            if text:
+                broadcaster.publish("token", step, job_id=job_id, text=text)
+        elif step and kind == "on_chat_model_end":
+            broadcaster.publish("end", step, job_id=job_id)
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            result = event["data"].get("output")
+    broadcaster.publish("done", job_id=job_id)
+    return result
+
+def _invoke_chain(chain_input: dict, should_stop=None, timing=None, job_id: Optional[str] = None) -> dict:
+    """설정된 실행 모드로 체인 실행 (async 모드에서는 중지 시 남은 단계 모두 생략, timing: 계측 콜백 핸들러,
+    job_id: 토큰 스트림 이벤트에 붙일 분석 작업 ID)"""
+    ai_config = config['ai']
+    run_config = {"callbacks": [timing]} if timing is not None else None
+    if should_stop is None or ai_config.get('EXECUTION_MODE', 'async') != 'async':
+        return MC.tetris_chain.invoke(chain_input, run_config)
+    poll_interval = float(ai_config.get('CANCEL_POLL_INTERVAL', 0.1))
+    if not ai_config.get('STREAM_TOKENS', False):
+        return asyncio.run(_run_cancellable(MC.tetris_chain.ainvoke(chain_input, run_config), should_stop, poll_interval))
+
+    from utils.token_stream import get_token_broadcaster
+    broadcaster = get_token_broadcaster(ai_config.get('TOKEN_STREAM_BUFFER', 256))
+    try:
+        return asyncio.run(_run_cancellable(_astream_chain(chain_input, broadcaster, run_config, job_id), should_stop, poll_interval))
+    except AnalysisCancelledException:
+        broadcaster.publish("cancelled", job_id=job_id)
+        raise
+
+# 체인 계측 (콜백 기반 호출별 시간/첫 토큰 지연/토큰 수 → 단계별 히스토그램)
+def _timing_handler():
+    try:
+        from utils.chain_metrics import ChainTimingHandler, get_chain_metrics
+        metrics = get_chain_metrics(config['metrics'])
+        return ChainTimingHandler(metrics) if metrics is not None else None
+    except Exception as e:
+        print(f"[경고] 체인 계측 초기화 실패: {e}")
+        return None
+
+def _step_times(result: dict) -> dict:
+    return {
+        "step1": result.get("chain1_run_time", 0),
+        "step2": result.get("chain2_run_time", 0),
+        "step3": result.get("chain3_run_time", 0),
+        "step4": result.get("serial_encoder_run_time", 0),
+    }
+
+def _record_step_times(step_times: dict):
+    """실제 실행한 단계 시간을 step:* 히스토그램에 반영 (캐시 재생 결과는 제외)"""
+    try:
+        from utils.chain_metrics import get_chain_metrics
+        metrics = get_chain_metrics(config['metrics'])
+        if metrics is None:
+            return
+        for step, seconds in step_times.items():
+            metrics.record(f"step:{step}", "duration", seconds)
+        metrics.record("step:total", "duration", sum(step_times.values()))
+    except Exception as e:
+        print(f"[경고] 단계 시간 기록 실패: {e}")
+
+def _account_usage(timing, out_path: Path, **meta) -> dict:
+    """이번 실행의 체인별 사용량 집계 → 결과 파일 옆에 기록, 예산 초과 시 경고"""
+    usage_config = config['usage']
+    if timing is None or not usage_config.get('ENABLED', True):
+        return {}
+    try:
+        from utils.usage_accounting import check_budgets, save_usage, summarize_usage
+        usage = summarize_usage(timing.llm_calls())
+        usage['warnings'] = check_budgets(usage, usage_config)
+        save_usage(out_path, usage, usage_config.get('LEDGER_FILE'), **meta)
+        total = usage['total']
+        print(f"[사용량] LLM {total['calls']}회, 프롬프트 {total['prompt_chars']:,}자, 이미지 {total['image_bytes']:,}B, "
+              f"토큰 입력 {total['input_tokens']:,}/출력 {total['output_tokens']:,} ({usage['token_source']})")
+        if usage['warnings']:
+            from web_interface.base.state_manager import state_manager
+            for warning in usage['warnings']:
+                print(f"[경고] 사용량 예산 초과: {warning}")
+                state_manager.add_notification(f"사용량 예산 초과: {warning}", 'warning')
+        return usage
+    except Exception as e:
+        print(f"[경고] 사용량 기록 실패: {e}")
+        return {}
+
+# 추측 실행 (업로드 직후 Chain 1 사전 실행, 분석 시작 시 동일 입력이면 채택)
+def _speculative_key(people_count: int, image_data_url: str) -> str:
+    from utils.result_cache import make_result_key
+    return make_result_key(image_data_url, people_count, MC.PROMPT_FINGERPRINT)
+
+def start_speculative_chain1(people_count: int, image_data_url: str, image_path: Optional[str] = None,
+                             owner: Optional[str] = None) -> bool:
+    """업로드된 이미지/인원 수로 Chain 1을 백그라운드에서 미리 실행 (결과 캐시 적중 시 생략, owner: 업로드한 세션)"""
+    try:
+        from utils.speculative import get_speculative_runner
+        runner = get_speculative_runner(config['speculative'])
+        if runner is None or int(people_count or 0) <= 0 or not image_data_url:
+            return False
+        # 통합 토폴로지는 Chain 1을 따로 호출하지 않으므로 사전 실행 생략
+        if MC.PIPELINE_TOPOLOGY == 'fused':
+            return False
+        _, cached = _lookup_cached_result(people_count, image_data_url)
+        if cached is not None:
+            return False
+        poll_interval = float(config['ai'].get('CANCEL_POLL_INTERVAL', 0.1))
+
+        def _speculate(cancel_event):
+            chain_image_url, _ = _prepare_chain_image(image_data_url, image_path)
+            seed = asyncio.run(_run_cancellable(
+                MC.arun_chain1(int(people_count), chain_image_url), cancel_event.is_set, poll_interval
+            ))
+            print(f"[추측] Chain 1 사전 실행 완료 ({seed['run_time']:.3f}s)")
+            return seed
+
+        started = runner.start(_speculative_key(people_count, image_data_url), _speculate, owner=owner)
+        if started:
+            print(f"[추측] Chain 1 사전 실행 시작 (people_count={people_count})")
+        return started
+    except Exception as e:
+        print(f"[경고] Chain 1 사전 실행 시작 실패: {e}")
+        return False
+
+def _adopt_speculative_chain1(people_count: int, image_data_url: str, should_stop=None) -> Optional[dict]:
+    """동일 입력의 추측 결과 채택 (진행 중이면 완료 대기), 없으면 None"""
+    try:
+        from utils.speculative import get_speculative_runner
+        runner = get_speculative_runner(config['speculative'])
+        if runner is None:
+            return None
+        seed = runner.adopt(
+            _speculative_key(people_count, image_data_url),
+            should_stop=should_stop,
+            poll_interval=float(config['ai'].get('CANCEL_POLL_INTERVAL', 0.1)),
+        )
+        if seed is not None:
+            print(f"[추측] Chain 1 사전 실행 결과 채택 - LLM 호출 생략")
+        return seed
+    except Exception as e:
+        print(f"[경고] Chain 1 사전 실행 결과 채택 실패: {e}")
+        return None
+
+def discard_speculative_chain1(people_count: Optional[int] = None, image_data_url: Optional[str] = None,
+                               owner: Optional[str] = None):
+    """추측 실행 폐기 (입력이 주어지면 그 입력만, owner가 주어지면 그 세션의 추측만, 없으면 전체 - 시스템 리셋 시)"""
+    try:
+        from utils.speculative import get_speculative_runner
+        runner = get_speculative_runner(config['speculative'])
+        if runner is None:
+            return
+        if image_data_url:
+            runner.discard(_speculative_key(people_count, image_data_url))
+        else:
+            runner.discard(owner=owner)
+    except Exception as e:
+        print(f"[경고] 추측 실행 폐기 실패: {e}")
+
 # 웹 서버 관리
 def start_web_server(port: int = 5002, host: str = '0.0.0.0', debug: bool = False) -> tuple:
     """웹 서버 시작"""
@@ -169,26 +474,51 @@ def get_user_input_via_web(port: int = 5002, open_browser: bool = True) -> tuple
 def run_full_pipeline(port: int = 5002, open_browser: bool = True) -> dict:
     """전체 파이프라인 실행"""
     start_web_server(port=port, debug=config['web']['DEBUG'])
+    warm_up_ai_chain()
     
     people_count, image_data_url, scenario = get_user_input_via_web(port=port, open_browser=open_browser)
 
     print("AI 체인 입력 생성 중...")
+    from web_interface.base.state_manager import state_manager
+    chain_image_url, preprocess_stats = _prepare_chain_image(image_data_url, state_manager.get('upload.image_path'))
     user_msgs = MC.make_chain1_user_input(
-        people_count=people_count, image_data_url=image_data_url
+        people_count=people_count, image_data_url=chain_image_url
     )
     print(f"AI 체인 입력 생성 완료: {len(user_msgs)}개 메시지")
 
     out_path = _prepare_output_path(scenario)
 
+    # concurrent 모드: 체인 실행 동안 아두이노 탐색/연결을 미리 진행
+    hardware_future = None
+    if config['hardware'].get('ORCHESTRATION', 'concurrent') == 'concurrent':
+        from concurrent.futures import ThreadPoolExecutor
+        hardware_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='arduino-connect')
+        hardware_future = hardware_executor.submit(_connect_hardware)
+        hardware_executor.shutdown(wait=False)
+        print("[연결] 아두이노 연결을 AI 체인과 동시에 시작")
+
     print("AI 체인 실행 시작...")
     t_chain_start = perf_counter()
+    timing = None
     try:
-        result = MC.tetris_chain.invoke({"user_input": user_msgs, "people_count": people_count})
+        cache_key, cached = _lookup_cached_result(people_count, image_data_url)
+        if cached is not None:
+            result = _replay_cached_result(cached)
+        else:
+            timing = _timing_handler()
+            result = _invoke_chain({"user_input": user_msgs, "people_count": people_count}, timing=timing)
+            _store_cached_result(cache_key, result)
+            _record_step_times(_step_times(result))
         print("AI 체인 실행 완료")
     except Exception as e:
         print(f"\nAI 체인 실행 실패: {e}")
         import traceback
         traceback.print_exc()
+        if hardware_future is not None:
+            try:
+                hardware_future.result().close_all_connections()
+            except Exception:
+                pass
         raise SystemExit(1)
     t_chain_end = perf_counter()
     chain_elapsed = t_chain_end - t_chain_start
@@ -196,8 +526,13 @@ def run_full_pipeline(port: int = 5002, open_browser: bool = True) -> dict:
 
     serial_encoder_out = result["serial_encoder_out"].strip()
     print(f"모터 제어 시작 (16-digit 코드: {serial_encoder_out})")
+    RPI = None
+    hardware_wait = 0.0
+    t_hardware_wait = perf_counter()
     try:
-        RPI.connect_to_arduinos()
+        RPI = hardware_future.result() if hardware_future is not None else _connect_hardware()
+        hardware_wait = perf_counter() - t_hardware_wait
+        print(f"[연결] 체인 완료 후 하드웨어 대기 시간: {hardware_wait:.3f}초")
 
         connected = getattr(RPI, "arduino_connections", {})
         if not connected:
@@ -218,24 +553,38 @@ def run_full_pipeline(port: int = 5002, open_browser: bool = True) -> dict:
 
     finally:
         try:
-            RPI.close_all_connections()
-            print("[연결] 아두이노 연결 종료")
+            if RPI is not None:
+                RPI.close_all_connections()
+                print("[연결] 아두이노 연결 종료")
         except Exception:
             pass
     print("모터 제어 완료")
 
     _print_chain_results(result)
     _save_results_to_file(result, out_path)
+    usage = _account_usage(timing, out_path, people_count=people_count, topology=result.get("topology"))
 
     return {
         "out_path": out_path,
         "chain_elapsed": chain_elapsed,
+        "hardware_wait": hardware_wait,
+        "image_preprocess": preprocess_stats,
+        "usage": usage,
     }
 
 
+# 동일 분석 요청 식별 (동시에 들어온 같은 요청은 한 번만 실행)
+def analysis_request_key(people_count: int, image_data_url: str) -> str:
+    """이미지 해시 + 인원 수 + 프롬프트 지문 (프롬프트/토폴로지가 바뀌면 다른 요청으로 취급)"""
+    from utils.result_cache import make_result_key
+    return make_result_key(image_data_url, people_count, MC.PROMPT_FINGERPRINT)
+
+
 # 단계별 분석 실행
-def run_step_by_step_analysis(people_count: int, image_data_url: str, scenario: str, progress_callback=None, stop_callback=None, abort_controller=None) -> dict:
-    """상태 저장 기반 단계별 AI 분석"""
+def run_step_by_step_analysis(people_count: int, image_data_url: str, scenario: str, progress_callback=None, stop_callback=None, abort_controller=None, resume_from: Optional[dict] = None, stage_callback=None, image_path: Optional[str] = None, job_id: Optional[str] = None) -> dict:
+    """상태 저장 기반 단계별 AI 분석 (resume_from: 이전 체크포인트 - 완료된 단계는 다시 실행하지 않음,
+    stage_callback(key, value): 지정 시 단계 결과를 전역 상태 대신 이 콜백으로만 전달 - 작업 큐의 동시 실행용,
+    job_id: 토큰 스트림(/jobs/<job_id>/tokens) 구독 필터용 작업 ID)"""
     print("[DEBUG] 상태 저장 기반 단계별 AI 분석 시작...")
     print(f"[DEBUG] 파라미터: people_count={people_count}, scenario={scenario}")
     
@@ -248,81 +597,172 @@ def run_step_by_step_analysis(people_count: int, image_data_url: str, scenario:
             return True
         return False
     
-    class AnalysisCancelledException(Exception):
-        def __init__(self, message="분석이 중지되었습니다."):
-            self.message = message
-            super().__init__(self.message)
-    
+    checkpoint = None
     try:
         if check_stop():
             raise AnalysisCancelledException("분석이 중지되었습니다.")
         
-        from web_interface.base.state_manager import state_manager
-        state_manager.set('current_step', 0)
-        state_manager.set('processing.progress', 0)
-        state_manager.set('processing.status', 'running')
-        state_manager.set('processing.current_scenario', scenario)
-        state_manager.set('upload.scenario', scenario)
-        state_manager.set('upload.people_count', people_count)
-        state_manager.set('analysis_result', {})
-        state_manager.set('notifications', [])
-        
-        state_manager._progress_callback = progress_callback
+        if stage_callback is None:
+            from web_interface.base.state_manager import state_manager
+            state_manager.set('current_step', 0)
+            state_manager.set('processing.progress', 0)
+            state_manager.set('processing.status', 'running')
+            state_manager.set('processing.current_scenario', scenario)
+            state_manager.set('upload.scenario', scenario)
+            state_manager.set('upload.people_count', people_count)
+            state_manager.set('analysis_result', {})
+            state_manager.set('notifications', [])
+            if image_path is None:
+                image_path = state_manager.get('upload.image_path')
+
+            def stage_callback(key, value):
+                analysis_result = state_manager.get('analysis_result', {})
+                analysis_result[key] = value
+                state_manager.set('analysis_result', analysis_result)
+
+        # 이번 실행의 단계 결과 (다른 동시 실행과 공유하지 않음)
+        stage_outputs = {}
+
+        def on_stage(key, value, progress, status, message, current_step=None):
+            stage_outputs[key] = value
+            stage_callback(key, value)
+            if progress_callback:
+                progress_callback(progress, status, message, current_step=current_step)
         
+        chain_image_url, preprocess_stats = _prepare_chain_image(image_data_url, image_path)
         user_msgs = MC.make_chain1_user_input(
-            people_count=people_count, image_data_url=image_data_url
+            people_count=people_count, image_data_url=chain_image_url
         )
         
         print("상태 저장 기반 파이프라인 실행 시작...")
-        result = MC.tetris_chain.invoke({
-            "user_input": user_msgs,
-            "people_count": people_count,
-        })
+        cache_key, cached = _lookup_cached_result(people_count, image_data_url)
+        chain1_seed = None
+        timing = None
+        if cached is not None:
+            discard_speculative_chain1(people_count, image_data_url)
+            result = _replay_cached_result(cached, on_stage=on_stage)
+        else:
+            chain_input = {
+                "user_input": user_msgs,
+                "people_count": people_count,
+                "_on_stage": on_stage,
+            }
+            checkpoint = _begin_checkpoint(scenario, people_count, image_data_url, resume_from)
+            if checkpoint is not None:
+                from utils.checkpoint import resume_outputs
+                chain_input["_checkpoint"] = checkpoint
+                chain_input["_resume"] = resume_outputs(checkpoint.data)
+                if chain_input["_resume"]:
+                    print(f"[체크포인트] {scenario} 재개 - 완료 단계 재사용: {sorted(chain_input['_resume'])}")
+            if not chain_input.get("_resume"):
+                chain1_seed = _adopt_speculative_chain1(people_count, image_data_url, should_stop=check_stop)
+            if check_stop():
+                raise AnalysisCancelledException("분석이 중지되었습니다.")
+            if chain1_seed is not None:
+                chain_input["chain1_seed"] = chain1_seed
+            timing = _timing_handler()
+            result = _invoke_chain(chain_input, should_stop=check_stop, timing=timing, job_id=job_id)
+            _store_cached_result(cache_key, result)
+            _record_step_times(_step_times(result))
         print("상태 저장 기반 파이프라인 실행 완료")
         
-        analysis_result = state_manager.get('analysis_result', {})
-        
-        # serial_encoder_out이 analysis_result에 없으면 result에서 가져와서 추가
-        if 'serial_encoder_out' not in analysis_result and 'serial_encoder_out' in result:
-            analysis_result['serial_encoder_out'] = result['serial_encoder_out']
-            state_manager.set('analysis_result', analysis_result)
+        analysis_result = dict(stage_outputs)
         
         # 웹 인터페이스 호환성을 위해 모든 필요한 키가 analysis_result에 있는지 확인
         required_keys = ['chain1_out', 'chain2_out', 'chain3_out', 'serial_encoder_out']
         for key in required_keys:
             if key not in analysis_result and key in result:
                 analysis_result[key] = result[key]
-        
-        # 업데이트된 analysis_result를 다시 저장
-        if any(key in result for key in required_keys if key not in analysis_result):
-            state_manager.set('analysis_result', analysis_result)
+                stage_callback(key, result[key])
         
         out_path = _prepare_output_path(scenario)
         _save_results_to_file(analysis_result, out_path, include_header=True)
+        if cached is None:
+            _index_upload_result(people_count, image_data_url, scenario, analysis_result, image_path)
         
-        total_elapsed = (result.get("chain1_run_time", 0) + 
-                        result.get("chain2_run_time", 0) + 
-                        result.get("chain3_run_time", 0))
+        step_times = _step_times(result)
+        total_elapsed = sum(step_times.values())
+        usage = _account_usage(timing, out_path, people_count=people_count, topology=result.get("topology"),
+                               step_times=step_times)
         
         return {
             "analysis_result": analysis_result,
             "out_path": str(out_path),
             "total_elapsed": total_elapsed,
-            "step_times": {
-                "step1": result.get("chain1_run_time", 0),
-                "step2": result.get("chain2_run_time", 0),
-                "step3": result.get("chain3_run_time", 0),
-                "step4": 0
-            }
+            "cache_hit": cached is not None,
+            "speculative_chain1": {
+                "adopted": chain1_seed is not None,
+                "run_time": chain1_seed.get("run_time", 0.0) if chain1_seed else 0.0,
+            },
+            "image_preprocess": preprocess_stats,
+            "chain_policy": result.get("chain_policy", {}),
+            "stage_memo": result.get("stage_memo", {}),
+            "resumed_stages": result.get("resumed_stages", []),
+            "plan_check": result.get("plan_check", {}),
+            "topology": result.get("topology", MC.PIPELINE_TOPOLOGY),
+            "step_times": step_times,
+            "timings": timing.summary() if timing is not None else {},
+            "usage": usage
         }
         
-    except AnalysisCancelledException:
+    except AnalysisCancelledException as e:
+        _fail_checkpoint(checkpoint, e, 'cancelled')
         return {"status": "cancelled", "message": "분석이 중지되었습니다."}
     except Exception as e:
         print(f"[오류] 분석 중 예상치 못한 오류: {e}")
+        _fail_checkpoint(checkpoint, e)
         raise
 
 
+def resume_step_by_step_analysis(scenario: Optional[str] = None, progress_callback=None, stop_callback=None, abort_controller=None, stage_callback=None, job_id: Optional[str] = None) -> dict:
+    """체크포인트에서 첫 미완료/실패 단계부터 단계별 분석 재개 (scenario가 없으면 가장 최근의 미완료 실행)"""
+    checkpoint = load_checkpoint(scenario)
+    if checkpoint is None:
+        raise ValueError(f"재개할 체크포인트가 없습니다: {scenario or '(최근 실행)'}")
+    from utils.checkpoint import get_checkpoint_store
+    image_data_url = get_checkpoint_store(config['checkpoint']).load_image(checkpoint['image'])
+    if image_data_url is None:
+        raise ValueError(f"체크포인트 이미지가 없습니다: {checkpoint['scenario']}")
+    print(f"[체크포인트] {checkpoint['scenario']} 재개 (상태: {checkpoint.get('status')}, 실패 단계: {checkpoint.get('failure', {}).get('stage')})")
+    return run_step_by_step_analysis(
+        checkpoint['people_count'], image_data_url, checkpoint['scenario'],
+        progress_callback=progress_callback, stop_callback=stop_callback,
+        abort_controller=abort_controller, resume_from=checkpoint, stage_callback=stage_callback, job_id=job_id,
+    )
+
+
+def adopt_previous_result(people_count: int, scenario: str, previous_result: dict, progress_callback=None, stop_callback=None, abort_controller=None, stage_callback=None, job_id: Optional[str] = None) -> dict:
+    """유사 이미지의 이전 배치 결과를 새 시나리오의 결과로 채택 (AI 체인 실행 없이 단계별 진행률만 재생)"""
+    if (stop_callback and stop_callback()) or (abort_controller and abort_controller.aborted):
+        return {"status": "cancelled", "message": "분석이 중지되었습니다."}
+    print(f"[유사 이미지] 이전 배치 결과 채택 - AI 체인 실행 생략 (people_count={people_count}, scenario={scenario})")
+    stage_outputs = {}
+
+    def on_stage(key, value, progress, status, message, current_step=None):
+        stage_outputs[key] = value
+        if stage_callback:
+            stage_callback(key, value)
+        if progress_callback:
+            progress_callback(progress, status, message, current_step=current_step)
+
+    # 인덱스에는 chain2_out에 원문(chain2_out_raw)이 저장되어 있음
+    result = dict(previous_result, chain2_out_raw=previous_result.get("chain2_out", ""),
+                  chain1_run_time=0.0, chain2_run_time=0.0, chain3_run_time=0.0, serial_encoder_run_time=0.0)
+    MC.replay_result(result, on_stage=on_stage)
+
+    out_path = _prepare_output_path(scenario)
+    _save_results_to_file(stage_outputs, out_path, include_header=True)
+    return {
+        "analysis_result": stage_outputs,
+        "out_path": str(out_path),
+        "total_elapsed": 0.0,
+        "cache_hit": True,
+        "adopted": True,
+        "step_times": {},
+        "timings": {}
+    }
+
+
 # 메인 실행 함수
 def main():
     """명령줄 실행용 메인 함수"""
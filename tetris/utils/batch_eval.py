@@ -0,0 +1,213 @@
+# 배치 평가 - 이미지 디렉토리 × 탑승 인원 조합을 tetris_chain으로 동시 실행하고 단계별 지연/선택 옵션/코드/오류를 리포트
+# 사용법: python utils/batch_eval.py [이미지 디렉토리] [--people 1,2,3,4] [--concurrency 4] [--rpm 60] [--out report.csv]
+import argparse
+import asyncio
+import base64
+import contextlib
+import csv
+import io
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TETRIS_ROOT = Path(__file__).resolve().parent.parent
+for _path in (TETRIS_ROOT, TETRIS_ROOT / 'main_chain'):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+IMAGE_MIME = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp'}
+REPORT_FIELDS = (
+    'image', 'people_count', 'repeat', 'topology', 'status', 'error',
+    'step1', 'step2', 'step3', 'step4', 'wall_time', 'queue_wait',
+    'option_no', 'chain2_source', 'serial_encoder_out', 'plan_verified',
+    'llm_calls', 'input_tokens', 'output_tokens', 'image_bytes',
+)
+
+
+def _natural_key(path: Path):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path.name)]
+
+
+def list_images(image_dir: Path) -> List[Path]:
+    return sorted((p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_MIME), key=_natural_key)
+
+
+def load_image_data_url(path: Path, preprocess_config: Optional[Dict[str, Any]] = None) -> str:
+    """이미지 파일 → 체인 입력 data URL (웹 업로드와 같은 전처리 적용, 테스트 이미지 옆에 파일을 만들지 않음)"""
+    from utils.image_preprocess import preprocess_data_url
+    url = f"data:{IMAGE_MIME[path.suffix.lower()]};base64," + base64.b64encode(path.read_bytes()).decode('utf-8')
+    return preprocess_data_url(url, None, preprocess_config)[0]
+
+
+def _option_no(chain2_out_raw: str) -> Optional[Any]:
+    from json_stream import extract_json_object
+    data = extract_json_object(chain2_out_raw or '')
+    return data.get('option_no') if isinstance(data, dict) else None
+
+
+def apply_rate_limit(MC, requests_per_minute: float):
+    """모든 LLM 클라이언트가 공유하는 요청 속도 제한 (분당 LLM 호출 수 기준)"""
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    limiter = InMemoryRateLimiter(
+        requests_per_second=requests_per_minute / 60.0, check_every_n_seconds=0.05, max_bucket_size=1,
+    )
+    for name in ('chain1_llm', 'chain1_fallback_llm', 'chain2_llm', 'chain3_llm', 'fused_llm', 'fused_fallback_llm'):
+        llm = MC._get(name)
+        if llm is not None:
+            getattr(llm, 'bound', llm).rate_limiter = limiter
+    return limiter
+
+
+def _ignore_stage(key, value, progress, status, message, current_step=None):
+    """단계 결과/진행률 콜백 (오프라인 평가에서는 버림)"""
+
+
+async def _run_case(MC, case: Dict[str, Any], image_url: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    from utils.chain_metrics import ChainTimingHandler
+    from utils.usage_accounting import summarize_usage
+
+    queued = time.perf_counter()
+    async with semaphore:
+        started = time.perf_counter()
+        timing = ChainTimingHandler()
+        row = dict(case, queue_wait=round(started - queued, 4), status='ok', error='')
+        try:
+            result = await MC.tetris_chain.ainvoke({
+                'user_input': MC.make_chain1_user_input(case['people_count'], image_url),
+                'people_count': case['people_count'],
+                'topology': case['topology'],
+                # 단계 결과를 키오스크 전역 상태(state_manager)에 쓰지 않도록 실행별 콜백 지정
+                '_on_stage': _ignore_stage,
+            }, {'callbacks': [timing]})
+            row.update(
+                step1=round(result.get('chain1_run_time', 0.0), 4),
+                step2=round(result.get('chain2_run_time', 0.0), 4),
+                step3=round(result.get('chain3_run_time', 0.0), 4),
+                step4=round(result.get('serial_encoder_run_time', 0.0), 4),
+                option_no=_option_no(result.get('chain2_out_raw', '')),
+                chain2_source=result.get('chain2_source', ''),
+                serial_encoder_out=result.get('serial_encoder_out', ''),
+                plan_verified=(result.get('plan_check') or {}).get('verified'),
+            )
+        except Exception as e:
+            row.update(status='error', error=f"{type(e).__name__}: {e}"[:300])
+        row['wall_time'] = round(time.perf_counter() - started, 4)
+        usage = summarize_usage(timing.llm_calls())['total']
+        row.update(llm_calls=usage['calls'], input_tokens=usage['input_tokens'],
+                   output_tokens=usage['output_tokens'], image_bytes=usage['image_bytes'])
+        return row
+
+
+async def run_batch(MC, cases: List[Dict[str, Any]], image_urls: Dict[str, str], concurrency: int,
+                    on_row=None) -> List[Dict[str, Any]]:
+    """동시 실행 수를 제한하여 모든 케이스 실행 (완료 순으로 on_row 호출, 반환은 입력 순서)"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.ensure_future(_run_case(MC, case, image_urls[case['image']], semaphore)) for case in cases]
+    for future in asyncio.as_completed(tasks):
+        row = await future
+        if on_row is not None:
+            on_row(row)
+    return [task.result() for task in tasks]
+
+
+def _percentile(values: List[float], p: int) -> float:
+    ordered = sorted(values)
+    return ordered[max(1, -(-p * len(ordered) // 100)) - 1] if ordered else 0.0
+
+
+def summarize(rows: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    ok = [row for row in rows if row['status'] == 'ok']
+    summary = {
+        'cases': len(rows),
+        'ok': len(ok),
+        'errors': len(rows) - len(ok),
+        'elapsed': round(elapsed, 3),
+        'throughput_per_min': round(len(rows) / elapsed * 60, 2) if elapsed else 0.0,
+        'llm_calls': sum(row['llm_calls'] for row in rows),
+    }
+    for field in ('step1', 'step2', 'step3', 'step4', 'wall_time'):
+        values = [row[field] for row in ok]
+        summary[field] = {f'p{p}': round(_percentile(values, p), 4) for p in (50, 95, 99)}
+    return summary
+
+
+def write_report(rows: List[Dict[str, Any]], out_path: Path):
+    """확장자가 .jsonl이면 JSON Lines, 그 외에는 CSV"""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix.lower() == '.jsonl':
+        with out_path.open('w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return
+    with out_path.open('w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _parse_people(value: str) -> List[int]:
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def main():
+    from config import get_config
+    config = get_config()
+
+    ap = argparse.ArgumentParser(description="TETRIS batch evaluator")
+    ap.add_argument("image_dir", nargs="?", default=str(TETRIS_ROOT / 'tetris_IO' / 'test_image'), help="평가할 이미지 디렉토리")
+    ap.add_argument("--people", type=_parse_people, default=[1, 2, 3, 4], help="people_count 목록 (예: 1,2,3,4)")
+    ap.add_argument("--concurrency", type=int, default=4, help="동시 실행 케이스 수")
+    ap.add_argument("--rpm", type=float, default=0, help="분당 LLM 호출 상한 (0이면 제한 없음)")
+    ap.add_argument("--repeat", type=int, default=1, help="케이스별 반복 횟수")
+    ap.add_argument("--topology", choices=["staged", "fused"], default=config['ai'].get('PIPELINE_TOPOLOGY', 'staged'))
+    ap.add_argument("--limit", type=int, default=0, help="앞에서부터 이미지 N개만 사용")
+    ap.add_argument("--use-memo", action="store_true", help="단계별 메모 사용 (기본: 모든 케이스가 실제로 체인 실행)")
+    ap.add_argument("--out", type=Path, default=None, help="리포트 파일 (.csv 또는 .jsonl, 기본: tetris_IO/batch_eval/eval_<시각>.csv)")
+    ap.add_argument("--verbose", action="store_true", help="체인 단계 로그 출력")
+    args = ap.parse_args()
+
+    images = list_images(Path(args.image_dir))[:args.limit or None]
+    if not images:
+        ap.error(f"이미지가 없습니다: {args.image_dir}")
+    out_path = args.out or config['output']['OUTPUT_ROOT'] / 'batch_eval' / f"eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+    import main_chain as MC
+    if not args.use_memo:
+        MC.config['stage_memo']['ENABLED'] = False
+    if args.rpm > 0:
+        apply_rate_limit(MC, args.rpm)
+
+    image_urls = {path.name: load_image_data_url(path, config['preprocess']) for path in images}
+    cases = [
+        {'image': path.name, 'people_count': people_count, 'repeat': i, 'topology': args.topology}
+        for i in range(args.repeat) for path in images for people_count in args.people
+    ]
+    print(f"[배치] 이미지 {len(images)}개 × 인원 {args.people} × {args.repeat}회 = {len(cases)}건 "
+          f"(동시 {args.concurrency}, {args.topology}, rpm {args.rpm or '무제한'})", file=sys.stderr)
+
+    done = []
+
+    def _progress(row):
+        done.append(row)
+        mark = 'ok' if row['status'] == 'ok' else f"오류 {row['error']}"
+        print(f"[배치] {len(done)}/{len(cases)} {row['image']} people={row['people_count']} "
+              f"{row['wall_time']:.2f}s {row.get('serial_encoder_out') or ''} {mark}", file=sys.stderr)
+
+    started = time.perf_counter()
+    # 체인 단계 로그(print)는 --verbose가 아니면 숨김
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        rows = asyncio.run(run_batch(MC, cases, image_urls, args.concurrency, on_row=_progress))
+    summary = summarize(rows, time.perf_counter() - started)
+
+    write_report(rows, out_path)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"리포트: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# 체인 계측 - LangChain 콜백으로 Runnable/LLM 호출별 시작·종료, 첫 토큰 지연, 토큰 수를 기록하고 단계별 지연 히스토그램 유지
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+PERCENTILES = (50, 95, 99)
+
+
+def _estimate_tokens(text: str) -> int:
+    """토큰 수 근사치 (문자 4개 ≈ 1토큰) - 제공자 사용량이 없을 때"""
+    return (len(text) + 3) // 4
+
+
+def _message_chars(message) -> int:
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return len(content)
+    # 이미지 등 텍스트가 아닌 부분은 제외
+    return sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+
+
+def _message_image_bytes(message) -> int:
+    """data URL 이미지의 디코딩 후 바이트 수 (base64 길이로 계산, 외부 URL은 0)"""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return 0
+    total = 0
+    for part in content:
+        if not isinstance(part, dict) or part.get("type") != "image_url":
+            continue
+        url = part["image_url"]["url"] if isinstance(part["image_url"], dict) else part["image_url"]
+        if url.startswith("data:") and "," in url:
+            encoded = url.split(",", 1)[1]
+            total += len(encoded) * 3 // 4 - encoded[-2:].count("=")
+    return total
+
+
+class RollingHistogram:
+    """최근 window개(그리고 max_age_seconds 이내) 표본의 백분위수"""
+
+    def __init__(self, window: int = 200, max_age_seconds: Optional[float] = None):
+        self.samples = deque(maxlen=window)
+        self.max_age_seconds = max_age_seconds
+        self.total_count = 0
+
+    def add(self, value: float):
+        self.samples.append((time.time(), float(value)))
+        self.total_count += 1
+
+    def _values(self) -> List[float]:
+        if self.max_age_seconds:
+            cutoff = time.time() - self.max_age_seconds
+            while self.samples and self.samples[0][0] < cutoff:
+                self.samples.popleft()
+        return sorted(value for _, value in self.samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        values = self._values()
+        if not values:
+            return {'count': 0, 'total_count': self.total_count}
+        snapshot = {
+            'count': len(values),
+            'total_count': self.total_count,
+            'mean': round(sum(values) / len(values), 4),
+            'min': round(values[0], 4),
+            'max': round(values[-1], 4),
+        }
+        for p in PERCENTILES:
+            # nearest-rank 백분위수
+            rank = max(1, -(-p * len(values) // 100))
+            snapshot[f'p{p}'] = round(values[rank - 1], 4)
+        return snapshot
+
+
+class ChainMetrics:
+    """단계(실행 이름)별 측정값 히스토그램 모음 - duration/ttft/input_tokens/output_tokens 등"""
+
+    def __init__(self, window: int = 200, max_age_seconds: Optional[float] = None):
+        self.window = window
+        self.max_age_seconds = max_age_seconds
+        self._histograms: Dict[str, Dict[str, RollingHistogram]] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, metric: str, value: float):
+        with self._lock:
+            metrics = self._histograms.setdefault(stage, {})
+            histogram = metrics.get(metric)
+            if histogram is None:
+                histogram = metrics[metric] = RollingHistogram(self.window, self.max_age_seconds)
+            histogram.add(value)
+
+    def record_error(self, stage: str):
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                stage: {metric: histogram.snapshot() for metric, histogram in metrics.items()}
+                for stage, metrics in sorted(self._histograms.items())
+                if prefix is None or stage.startswith(prefix)
+            }
+            errors = {stage: count for stage, count in self._errors.items() if prefix is None or stage.startswith(prefix)}
+        return {'stages': stages, 'errors': errors, 'window': self.window}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+
+class ChainTimingHandler(BaseCallbackHandler):
+    """실행 1회의 콜백 계측 - 모든 Runnable/LLM 실행 기록을 모으고 ChainMetrics 히스토그램에 반영"""
+
+    run_inline = True  # async 실행에서도 이벤트 루프에서 바로 호출 (시각 측정 지연 방지)
+
+    def __init__(self, metrics: Optional[ChainMetrics] = None):
+        self.metrics = metrics
+        self.runs: Dict[UUID, Dict[str, Any]] = {}
+        self._last_child_end: Dict[Optional[UUID], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stage_name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        # .assign(key=...)의 RunnableParallel<key> → assign:key
+        if name.startswith("RunnableParallel<") and name.endswith(">"):
+            return f"assign:{name[len('RunnableParallel<'):-1]}"
+        return name
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], kind: str, name: str, **extra):
+        with self._lock:
+            self.runs[run_id] = {
+                "kind": kind, "name": name, "parent": parent_run_id,
+                "started": time.perf_counter(), "ended": None, "error": None, **extra,
+            }
+
+    def _effective_start(self, run: Dict[str, Any]) -> float:
+        """실제 입력이 준비된 시각 추정 - 스트리밍(transform) 실행에서는 모든 단계가 파이프라인 시작과 함께
+        시작 이벤트를 내므로, 부모의 실효 시작과 먼저 끝난 형제 단계의 종료 시각 중 늦은 쪽을 사용"""
+        if "effective_started" not in run:
+            parent = self.runs.get(run["parent"])
+            run["effective_started"] = max(
+                run["started"],
+                self._last_child_end.get(run["parent"], 0.0),
+                self._effective_start(parent) if parent is not None else 0.0,
+            )
+        return run["effective_started"]
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Dict[str, Any]]:
+        if isinstance(error, GeneratorExit):
+            error = None  # JSON 조기 종료로 스트림을 닫은 경우는 정상 종료
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return None
+            run["ended"] = time.perf_counter()
+            run["duration"] = run["ended"] - self._effective_start(run)
+            self._last_child_end[run["parent"]] = max(self._last_child_end.get(run["parent"], 0.0), run["ended"])
+            if error is not None:
+                run["error"] = f"{type(error).__name__}: {error}"[:200]
+        if self.metrics is not None:
+            stage = f"{run['kind']}:{run['name']}"
+            if error is not None:
+                self.metrics.record_error(stage)
+            else:
+                self.metrics.record(stage, "duration", run["duration"])
+        return run
+
+    # Runnable
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "chain", self._stage_name(serialized, kwargs))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # LLM
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        chars = sum(_message_chars(m) for batch in messages for m in batch)
+        image_bytes = sum(_message_image_bytes(m) for batch in messages for m in batch)
+        self._start(run_id, parent_run_id, "llm", self._stage_name(serialized, kwargs),
+                    ttft=None, prompt_chars=chars, image_bytes=image_bytes,
+                    input_tokens=(chars + 3) // 4, output_chars=0,
+                    output_tokens=None, token_source="estimate")
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            if run["ttft"] is None:
+                run["ttft"] = time.perf_counter() - run["started"]
+            run["output_chars"] += len(token or "")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            usage, text = None, ""
+            for generations in response.generations:
+                for generation in generations:
+                    text += generation.text or ""
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+            if usage:
+                run["input_tokens"] = usage.get("input_tokens", run["input_tokens"])
+                run["output_tokens"] = usage.get("output_tokens")
+                run["token_source"] = "provider"
+            else:
+                run["output_tokens"] = _estimate_tokens(text) if text else (run["output_chars"] + 3) // 4
+        run = self._end(run_id)
+        if run is not None and self.metrics is not None:
+            stage = f"llm:{run['name']}"
+            if run["ttft"] is not None:
+                self.metrics.record(stage, "ttft", run["ttft"])
+            self.metrics.record(stage, "prompt_chars", run["prompt_chars"])
+            self.metrics.record(stage, "image_bytes", run["image_bytes"])
+            self.metrics.record(stage, "input_tokens", run["input_tokens"])
+            self.metrics.record(stage, "output_tokens", run["output_tokens"] or 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if isinstance(error, GeneratorExit) and kwargs.get("response") is not None:
+            # 조기 종료 - 그때까지 받은 청크로 정상 종료 처리
+            return self.on_llm_end(kwargs["response"], run_id=run_id)
+        self._end(run_id, error)
+
+    def llm_calls(self) -> List[Dict[str, Any]]:
+        """이번 실행의 LLM 호출 목록 (시작 순)"""
+        with self._lock:
+            runs = sorted((r for r in self.runs.values() if r["kind"] == "llm"), key=lambda r: r["started"])
+            return [{
+                "name": r["name"],
+                "duration": round(r.get("duration") or 0.0, 4),
+                "ttft": round(r["ttft"], 4) if r["ttft"] is not None else None,
+                "prompt_chars": r["prompt_chars"],
+                "image_bytes": r["image_bytes"],
+                "input_tokens": r["input_tokens"],
+                "output_tokens": r["output_tokens"],
+                "token_source": r["token_source"],
+                "error": r["error"],
+            } for r in runs]
+
+    def summary(self) -> Dict[str, Any]:
+        """이번 실행 요약 (LLM 호출 + assign 단계별 소요 시간)"""
+        with self._lock:
+            stages = {}
+            for r in self.runs.values():
+                key = r["name"][len("assign:"):] if r["name"].startswith("assign:") else None
+                # 내부 키(_t1_start, _save1 등)는 제외
+                if r["kind"] == "chain" and key and not key.startswith("_") and r.get("duration") is not None:
+                    stages[key] = round(stages.get(key, 0.0) + r["duration"], 4)
+        return {"llm_calls": self.llm_calls(), "stages": stages}
+
+
+# 전역 체인 계측 인스턴스
+_chain_metrics = None
+_chain_metrics_lock = threading.Lock()
+
+def get_chain_metrics(metrics_config: Optional[Dict[str, Any]] = None) -> Optional[ChainMetrics]:
+    """전역 체인 계측 반환 (비활성화 시 None)"""
+    global _chain_metrics
+    if _chain_metrics is None:
+        with _chain_metrics_lock:
+            if _chain_metrics is None:
+                if metrics_config is None:
+                    from config import get_config
+                    metrics_config = get_config()['metrics']
+                if not metrics_config.get('ENABLED', True):
+                    return None
+                _chain_metrics = ChainMetrics(
+                    window=metrics_config['WINDOW'],
+                    max_age_seconds=metrics_config.get('MAX_AGE_SECONDS'),
+                )
+    return _chain_metrics
@@ -0,0 +1,191 @@
+# 단계별 체크포인트 - 시나리오별로 완료된 체인 단계 출력을 디스크에 기록하여 실패한 단계부터 재개
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.result_cache import decode_data_url, image_digest
+
+logger = logging.getLogger(__name__)
+
+# 파이프라인 단계 순서와 재개 시 체인에 다시 주입할 출력 키
+STAGES = ('chain1', 'chain2', 'chain3', 'serial_encoder')
+RESUME_KEYS = {
+    'chain1': 'chain1_out_raw',
+    'chain2': 'chain2_out_raw',
+    'chain3': 'chain3_out',
+}
+
+
+class ScenarioCheckpoint:
+    """실행 중인 시나리오 하나의 체크포인트 (단계 완료 시마다 파일에 기록)"""
+
+    def __init__(self, store: "CheckpointStore", data: Dict[str, Any]):
+        self.store = store
+        self.data = data
+        self._lock = threading.Lock()
+
+    @property
+    def scenario(self) -> str:
+        return self.data['scenario']
+
+    def completed_stages(self) -> List[str]:
+        return [stage for stage in STAGES if stage in self.data['stages']]
+
+    def next_stage(self) -> Optional[str]:
+        """처음으로 완료되지 않은 단계 (모두 완료면 None)"""
+        return next((stage for stage in STAGES if stage not in self.data['stages']), None)
+
+    def save_stage(self, stage: str, **outputs):
+        with self._lock:
+            self.data['stages'][stage] = dict(outputs, saved_at=time.time())
+            if stage == STAGES[-1]:
+                self.data['status'] = 'completed'
+                self.data.pop('failure', None)
+            self.store.write(self.data)
+
+    def mark_failed(self, error: BaseException, status: str = 'failed'):
+        with self._lock:
+            self.data['status'] = status
+            self.data['failure'] = {
+                'stage': self.next_stage(),
+                'error': f"{type(error).__name__}: {error}"[:500],
+                'at': time.time(),
+            }
+            self.store.write(self.data)
+
+
+class CheckpointStore:
+    """체크포인트 디렉토리 관리 ({scenario}.json + 이미지 해시별 원본 이미지)"""
+
+    def __init__(self, checkpoint_dir: Path, ttl_seconds: float = 7 * 24 * 3600):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.image_dir = self.checkpoint_dir / 'images'
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.image_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, scenario: str) -> Path:
+        return self.checkpoint_dir / f"{Path(scenario).name}.json"
+
+    def write(self, data: Dict[str, Any]):
+        """임시 파일에 쓴 뒤 교체 (쓰기 도중 중단되어도 이전 체크포인트 유지)"""
+        data['updated_at'] = time.time()
+        path = self._path(data['scenario'])
+        tmp = path.with_suffix('.json.tmp')
+        with self._lock:
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+            os.replace(tmp, path)
+
+    def load(self, scenario: str) -> Optional[Dict[str, Any]]:
+        path = self._path(scenario)
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if self.ttl_seconds and time.time() - data.get('updated_at', 0) > self.ttl_seconds:
+            self.delete(scenario)
+            return None
+        return data
+
+    def delete(self, scenario: str):
+        try:
+            self._path(scenario).unlink()
+        except OSError:
+            pass
+
+    def latest(self, statuses=('failed', 'cancelled', 'running')) -> Optional[Dict[str, Any]]:
+        """가장 최근에 갱신된 미완료 체크포인트"""
+        candidates = sorted(self.checkpoint_dir.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in candidates:
+            data = self.load(path.stem)
+            if data and data.get('status') in statuses:
+                return data
+        return None
+
+    def save_image(self, image_data_url: str) -> Dict[str, str]:
+        """재개용 원본 이미지를 해시 이름으로 저장 (같은 이미지는 한 번만 저장)"""
+        digest = image_digest(image_data_url)
+        mime = image_data_url[5:].split(';', 1)[0].split(',', 1)[0] if image_data_url.startswith('data:') else ''
+        path = self.image_dir / digest
+        if not path.exists():
+            path.write_bytes(decode_data_url(image_data_url))
+        else:
+            path.touch()
+        return {'digest': digest, 'mime': mime or 'application/octet-stream'}
+
+    def load_image(self, image: Dict[str, str]) -> Optional[str]:
+        path = self.image_dir / image['digest']
+        if not path.exists():
+            return None
+        return f"data:{image['mime']};base64," + base64.b64encode(path.read_bytes()).decode('utf-8')
+
+    def begin(self, scenario: str, people_count: int, image_data_url: str,
+              prompt_fingerprint: str, previous: Optional[Dict[str, Any]] = None) -> ScenarioCheckpoint:
+        """새 실행의 체크포인트 생성 (재개 시 이전 단계 출력 유지)"""
+        self.prune()
+        stages = {}
+        if previous and previous.get('prompt_fingerprint') == prompt_fingerprint:
+            stages = dict(previous.get('stages', {}))
+            stages.pop(STAGES[-1], None)
+        data = {
+            'scenario': scenario,
+            'status': 'running',
+            'people_count': int(people_count or 0),
+            'prompt_fingerprint': prompt_fingerprint,
+            'image': self.save_image(image_data_url),
+            'attempts': int((previous or {}).get('attempts', 0)) + 1,
+            'created_at': (previous or {}).get('created_at', time.time()),
+            'stages': stages,
+        }
+        self.write(data)
+        return ScenarioCheckpoint(self, data)
+
+    def prune(self):
+        """TTL이 지난 체크포인트와 이미지 삭제"""
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for path in list(self.checkpoint_dir.glob('*.json')) + list(self.image_dir.iterdir()):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+def resume_outputs(data: Dict[str, Any]) -> Dict[str, str]:
+    """체크포인트에서 재개 시 체인에 주입할 단계 출력 ({chain1_out_raw, chain2_out_raw, chain3_out} 중 완료분)"""
+    outputs = {}
+    for stage, key in RESUME_KEYS.items():
+        value = data.get('stages', {}).get(stage, {}).get(key)
+        if not value:
+            break
+        outputs[key] = value
+    return outputs
+
+
+# 전역 체크포인트 저장소 인스턴스
+_checkpoint_store = None
+_checkpoint_store_lock = threading.Lock()
+
+def get_checkpoint_store(checkpoint_config: Optional[Dict[str, Any]] = None) -> Optional[CheckpointStore]:
+    """전역 체크포인트 저장소 반환 (비활성화 시 None)"""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        with _checkpoint_store_lock:
+            if _checkpoint_store is None:
+                if checkpoint_config is None:
+                    from config import get_config
+                    checkpoint_config = get_config()['checkpoint']
+                if not checkpoint_config.get('ENABLED', True):
+                    return None
+                _checkpoint_store = CheckpointStore(
+                    checkpoint_dir=checkpoint_config['CHECKPOINT_DIR'],
+                    ttl_seconds=checkpoint_config['TTL_SECONDS'],
+                )
+    return _checkpoint_store
@@ -0,0 +1,179 @@
+# 지각 해시(dHash) 유사 이미지 인덱스 - BK-tree 기반 해밍 거리 검색
+import io
+import json
+import logging
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(image: Union[bytes, str, Path], hash_size: int = 8) -> int:
+    """Pillow로 차분 해시(dHash) 계산 - hash_size² 비트 정수 반환"""
+    from PIL import Image, ImageOps
+
+    source = io.BytesIO(image) if isinstance(image, bytes) else image
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        gray = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = list(gray.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (1 if pixels[offset + col] > pixels[offset + col + 1] else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 해시 사이의 해밍 거리"""
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """해밍 거리용 BK-tree (삼각 부등식으로 탐색 범위 축소)"""
+
+    def __init__(self):
+        self._root: Optional[list] = None  # [hash, [item_ids], {distance: child}]
+        self._size = 0
+
+    def add(self, value: int, item_id: str):
+        """해시와 항목 ID 추가 (동일 해시는 같은 노드에 묶음)"""
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, str]]:
+        """max_distance 이내 항목을 (거리, ID) 오름차순으로 반환"""
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item_id) for item_id in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        results.sort()
+        return results
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class PerceptualHashIndex:
+    """업로드 이미지 지각 해시 + 체인 결과 인덱스 (JSONL 파일에 추가 기록)"""
+
+    def __init__(self, index_file: Path, hash_size: int = 8, max_distance: int = 6):
+        self.index_file = Path(index_file)
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._tree = BKTree()
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        """인덱스 파일 로드 및 BK-tree 재구성"""
+        if not self.index_file.exists():
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning("손상된 지각 해시 인덱스 항목 건너뜀")
+                    continue
+                self._insert(entry)
+        logger.info(f"지각 해시 인덱스 로드됨: {len(self._entries)}개 ({self.index_file})")
+
+    def _insert(self, entry: Dict[str, Any]):
+        self._entries[entry['id']] = entry
+        self._tree.add(int(entry['hash'], 16), entry['id'])
+
+    def add(self, image: Union[bytes, str, Path], people_count: int, result: Dict[str, Any],
+            image_path: Optional[str] = None, scenario: Optional[str] = None) -> Dict[str, Any]:
+        """이미지와 체인 결과를 인덱스에 추가"""
+        value = dhash(image, self.hash_size)
+        entry = {
+            'id': f"{value:x}_{uuid.uuid4().hex[:8]}",
+            'hash': f"{value:x}",
+            'people_count': int(people_count or 0),
+            'image_path': image_path,
+            'scenario': scenario,
+            'created_at': time.time(),
+            'result': result,
+        }
+        with self._lock:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._insert(entry)
+        return entry
+
+    def find_similar(self, image: Union[bytes, str, Path], people_count: Optional[int] = None,
+                     max_distance: Optional[int] = None, limit: int = 1) -> List[Dict[str, Any]]:
+        """해밍 거리 임계값 이내의 유사 이미지 항목 (가까운 순, 최신 우선)"""
+        threshold = self.max_distance if max_distance is None else max_distance
+        value = dhash(image, self.hash_size)
+        with self._lock:
+            matches = []
+            for distance, item_id in self._tree.search(value, threshold):
+                entry = self._entries[item_id]
+                if people_count is not None and entry['people_count'] != int(people_count):
+                    continue
+                matches.append((distance, -entry['created_at'], entry))
+        matches.sort(key=lambda m: (m[0], m[1]))
+        return [dict(entry, distance=distance) for distance, _, entry in matches[:limit]]
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """ID로 인덱스 항목 조회 (없으면 None)"""
+        with self._lock:
+            return self._entries.get(entry_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 전역 지각 해시 인덱스 인스턴스
+_phash_index = None
+_phash_index_lock = threading.Lock()
+
+def get_phash_index(phash_config: Optional[Dict[str, Any]] = None) -> Optional[PerceptualHashIndex]:
+    """전역 지각 해시 인덱스 반환 (비활성화 시 None)"""
+    global _phash_index
+    if _phash_index is None:
+        with _phash_index_lock:
+            if _phash_index is None:
+                if phash_config is None:
+                    from config import get_config
+                    phash_config = get_config()['phash']
+                if not phash_config.get('ENABLED', True):
+                    return None
+                _phash_index = PerceptualHashIndex(
+                    index_file=phash_config['INDEX_FILE'],
+                    hash_size=phash_config['HASH_SIZE'],
+                    max_distance=phash_config['MAX_DISTANCE'],
+                )
+    return _phash_index
@@ -0,0 +1,131 @@
+# 이미지 전처리 - EXIF 방향 보정, 긴 변 축소, JPEG/WebP 재인코딩으로 모델 입력 크기 절감
+import base64
+import hashlib
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils.result_cache import image_digest
+
+logger = logging.getLogger(__name__)
+
+FORMAT_MIME = {
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+}
+FORMAT_EXT = {
+    'JPEG': '.jpg',
+    'WEBP': '.webp',
+}
+
+
+def _default_config() -> Dict[str, Any]:
+    from config import get_config
+    return get_config()['preprocess']
+
+
+def preprocess_image_bytes(data: bytes, preprocess_config: Optional[Dict[str, Any]] = None) -> Tuple[bytes, str, Dict[str, Any]]:
+    """이미지 바이트 전처리 - (결과 바이트, MIME, 통계) 반환, 실패 시 원본 유지"""
+    cfg = preprocess_config or _default_config()
+    fmt = str(cfg.get('FORMAT', 'JPEG')).upper()
+    stats = {'applied': False, 'original_bytes': len(data), 'processed_bytes': len(data), 'bytes_saved': 0}
+
+    try:
+        from PIL import Image, ImageOps
+
+        with Image.open(io.BytesIO(data)) as img:
+            original_size = img.size
+            img = ImageOps.exif_transpose(img)
+            max_edge = int(cfg.get('MAX_LONG_EDGE', 1536))
+            if max(img.size) > max_edge:
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            buf = io.BytesIO()
+            img.save(buf, format=fmt, quality=int(cfg.get('QUALITY', 85)), optimize=True)
+            processed = buf.getvalue()
+            stats.update({'original_size': list(original_size), 'processed_size': list(img.size)})
+    except Exception as e:
+        logger.warning(f"이미지 전처리 실패 - 원본 사용: {e}")
+        stats['error'] = str(e)
+        return data, '', stats
+
+    stats.update({
+        'applied': True,
+        'format': fmt,
+        'processed_bytes': len(processed),
+        'bytes_saved': len(data) - len(processed),
+    })
+    return processed, FORMAT_MIME.get(fmt, 'image/jpeg'), stats
+
+
+def variant_path(original_path: str, preprocess_config: Optional[Dict[str, Any]] = None) -> Path:
+    """원본 옆에 저장되는 전처리본 경로 (설정값 포함 → 설정 변경 시 자동 무효화)"""
+    cfg = preprocess_config or _default_config()
+    fmt = str(cfg.get('FORMAT', 'JPEG')).upper()
+    original = Path(original_path)
+    suffix = f".prep{int(cfg.get('MAX_LONG_EDGE', 1536))}q{int(cfg.get('QUALITY', 85))}{FORMAT_EXT.get(fmt, '.jpg')}"
+    return original.with_name(original.stem + suffix)
+
+
+def preprocess_upload(original_path: str, preprocess_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """업로드 파일 전처리본 생성 (이미 최신 전처리본이 있으면 재사용)"""
+    cfg = preprocess_config or _default_config()
+    target = variant_path(original_path, cfg)
+    original_bytes = os.path.getsize(original_path)
+
+    if target.exists() and target.stat().st_mtime >= os.path.getmtime(original_path):
+        processed_bytes = target.stat().st_size
+        return {
+            'applied': True, 'cached': True, 'path': str(target),
+            'original_bytes': original_bytes, 'processed_bytes': processed_bytes,
+            'bytes_saved': original_bytes - processed_bytes,
+        }
+
+    with open(original_path, 'rb') as f:
+        processed, mime, stats = preprocess_image_bytes(f.read(), cfg)
+    if stats['applied']:
+        target.write_bytes(processed)
+        stats['path'] = str(target)
+    stats['cached'] = False
+    return stats
+
+
+def _same_content(source_path: str, image_data_url: str, size: int) -> bool:
+    """업로드 원본 파일과 data URL 이미지가 같은 바이트인지 (SHA-256 비교)"""
+    if not os.path.exists(source_path) or os.path.getsize(source_path) != size:
+        return False
+    with open(source_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest() == image_digest(image_data_url)
+
+
+def preprocess_data_url(image_data_url: str, source_path: Optional[str] = None,
+                        preprocess_config: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """체인 입력용 data URL 전처리 - 업로드 원본과 같은 이미지면 캐시된 전처리본 사용"""
+    cfg = preprocess_config or _default_config()
+    if not cfg.get('ENABLED', True) or not (image_data_url or '').startswith('data:image/'):
+        return image_data_url, {'applied': False}
+
+    header, payload = image_data_url.split(',', 1)
+    try:
+        data = base64.b64decode(payload)
+    except (ValueError, TypeError):
+        return image_data_url, {'applied': False}
+
+    # 업로드 원본과 내용(SHA-256)이 같으면 디스크 전처리본 재사용 (크기 비교는 해시 전 빠른 배제용)
+    if source_path and _same_content(source_path, image_data_url, len(data)):
+        try:
+            stats = preprocess_upload(source_path, cfg)
+            if stats.get('applied'):
+                processed = Path(stats['path']).read_bytes()
+                mime = FORMAT_MIME.get(str(cfg.get('FORMAT', 'JPEG')).upper(), 'image/jpeg')
+                return f"data:{mime};base64," + base64.b64encode(processed).decode('utf-8'), stats
+        except Exception as e:
+            logger.warning(f"업로드 전처리본 사용 실패 - 메모리 전처리로 대체: {e}")
+
+    processed, mime, stats = preprocess_image_bytes(data, cfg)
+    if not stats['applied'] or (stats['bytes_saved'] <= 0 and stats.get('original_size') == stats.get('processed_size')):
+        return image_data_url, dict(stats, applied=False)
+    return f"data:{mime};base64," + base64.b64encode(processed).decode('utf-8'), stats
@@ -0,0 +1,82 @@
+# 임포트 시간 리포트 - python -X importtime 결과를 집계하여 시작 예산(STARTUP_CONFIG)과 비교
+# 사용법: python utils/import_report.py [모듈 ...] [--top N]
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TETRIS_ROOT = Path(__file__).resolve().parent.parent
+if str(TETRIS_ROOT) not in sys.path:
+    sys.path.insert(0, str(TETRIS_ROOT))
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str) -> List[Dict]:
+    """새 인터프리터에서 모듈을 임포트하고 importtime 항목 목록 반환 (self/cumulative 단위: us)"""
+    code = (
+        "import sys; "
+        f"sys.path[:0] = [{str(TETRIS_ROOT)!r}, {str(TETRIS_ROOT / 'web_interface')!r}]; "
+        f"import {module}"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(TETRIS_ROOT), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} 임포트 실패:\n{proc.stderr[-2000:]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            entries.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": len(m.group(3)) // 2,
+            })
+    return entries
+
+
+def report(module: str, budget_ms: Optional[float] = None, top: int = 10) -> bool:
+    """모듈 하나의 임포트 시간 리포트 출력, 예산 이내면 True"""
+    entries = measure_import(module)
+    # 대상 모듈 줄 바로 앞의 더 깊은 줄들이 그 모듈이 끌어온 의존성
+    index = next((i for i in range(len(entries) - 1, -1, -1)
+                  if entries[i]["module"] == module and entries[i]["depth"] == 0), None)
+    if index is None:
+        raise RuntimeError(f"{module}: importtime 결과에서 모듈을 찾지 못했습니다 (이미 임포트됨?)")
+    total_ms = entries[index]["cumulative_us"] / 1000
+    start = index
+    while start > 0 and entries[start - 1]["depth"] > 0:
+        start -= 1
+    print(f"\n==================== [ {module} ] ====================")
+    print(f"누적 임포트 시간: {total_ms:.1f} ms" + (f" (예산 {budget_ms:.0f} ms)" if budget_ms else ""))
+    print("가장 느린 최상위 의존성:")
+    direct = sorted((e for e in entries[start:index] if e["depth"] == 1),
+                    key=lambda e: e["cumulative_us"], reverse=True)
+    for e in direct[:top]:
+        print(f"  {e['cumulative_us'] / 1000:8.1f} ms  {e['module']}")
+    ok = budget_ms is None or total_ms <= budget_ms
+    if not ok:
+        print(f"[초과] {module}: {total_ms:.1f} ms > {budget_ms:.0f} ms")
+    return ok
+
+
+def main():
+    from config import get_config
+    budgets = get_config()['startup']['IMPORT_BUDGET_MS']
+
+    ap = argparse.ArgumentParser(description="TETRIS import-time budget report")
+    ap.add_argument("modules", nargs="*", help="측정할 모듈 (기본: STARTUP_CONFIG['IMPORT_BUDGET_MS'] 전체)")
+    ap.add_argument("--top", type=int, default=10, help="표시할 느린 의존성 수")
+    args = ap.parse_args()
+
+    results = [report(module, budgets.get(module), args.top) for module in (args.modules or list(budgets))]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
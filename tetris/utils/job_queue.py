@@ -0,0 +1,313 @@
+# 분석 작업 큐 - 고정 크기 작업자 풀과 FIFO 대기열, 작업별 진행 상태/결과 기록 (SSE 구독용 변경 알림), 동일 요청 단일 실행 병합
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'error', 'cancelled')
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차서 작업을 받을 수 없음"""
+
+
+class AnalysisJob:
+    """작업 하나의 진행 상태와 결과 (abort_controller 역할도 함께 수행 - aborted/abort())"""
+
+    def __init__(self, fn: Callable[['AnalysisJob'], Any], meta: Dict[str, Any], key: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.fn = fn
+        self.meta = dict(meta)
+        self.key = key  # 동일 요청 식별 키 (같은 키의 요청은 이 작업에 합류)
+        self.attached = 0  # 합류한 중복 요청 수
+        self.llm_calls = 0  # 이 작업이 실제로 수행한 LLM 호출 수 (절약량 계산용)
+        self.status = 'queued'
+        self.progress = 0
+        self.current_step = 0
+        self.message = '대기 중'
+        self.result: Dict[str, Any] = {}
+        self.output: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.aborted = False
+        self.version = 0
+        self._changed = threading.Condition()
+
+    # 중지
+    def abort(self):
+        self.aborted = True
+        self._touch()
+
+    def should_stop(self) -> bool:
+        return self.aborted
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    # 변경 알림
+    def _touch(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def update(self, **fields):
+        """진행 상태 갱신 (progress, current_step, message, result 등)"""
+        for key, value in fields.items():
+            if value is not None:
+                setattr(self, key, value)
+        self._touch()
+
+    def set_result(self, key: str, value: Any):
+        """단계 결과 하나 추가 (analysis_result의 키)"""
+        self.result = {**self.result, key: value}
+        self._touch()
+
+    def wait_for_change(self, version: int, timeout: Optional[float] = None) -> int:
+        """version 이후 변경이 있거나 timeout이 지날 때까지 대기 후 현재 version 반환"""
+        with self._changed:
+            if self.version == version:
+                self._changed.wait(timeout)
+            return self.version
+
+
+class JobQueue:
+    """작업자 max_workers개가 FIFO 대기열에서 작업을 꺼내 실행 (대기열이 max_queued를 넘으면 QueueFullError)"""
+
+    def __init__(self, max_workers: int = 3, max_queued: int = 20, retention_seconds: float = 3600,
+                 max_finished: int = 100):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._pending: deque = deque()
+        self._running: Dict[str, AnalysisJob] = {}
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._worker_ids = itertools.count(1)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0,
+                      'coalesced': 0, 'calls_saved': 0}
+
+    def _ensure_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"analysis-worker-{next(self._worker_ids)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _prune(self):
+        """보관 시간이 지났거나 개수를 넘은 끝난 작업 기록 삭제"""
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished_at or 0)
+        cutoff = time.time() - self.retention_seconds
+        excess = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < excess or (job.finished_at or 0) < cutoff:
+                del self._jobs[job.id]
+
+    def submit(self, fn: Callable[[AnalysisJob], Any], key: Optional[str] = None, **meta) -> AnalysisJob:
+        """fn(job)을 대기열에 추가 - 반환값이 작업 결과, 예외는 error, job.aborted면 cancelled"""
+        job = AnalysisJob(fn, meta, key)
+        with self._cond:
+            if self.max_queued and len(self._pending) >= self.max_queued:
+                self.stats['rejected'] += 1
+                raise QueueFullError(f"분석 대기열이 가득 찼습니다 ({len(self._pending)}/{self.max_queued})")
+            self._prune()
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self.stats['submitted'] += 1
+            self._ensure_workers()
+            self._cond.notify()
+        logger.info(f"[작업 큐] {job.id} 대기열 추가 (대기 {self.position(job.id)}번째, 실행 중 {len(self._running)}/{self.max_workers})")
+        return job
+
+    def active(self, key: str) -> Optional[AnalysisJob]:
+        """같은 키로 대기/실행 중인 작업 (없으면 None)"""
+        with self._cond:
+            for job in self._jobs.values():
+                if job.key == key and not job.done and not job.aborted:
+                    return job
+        return None
+
+    def attach(self, job: AnalysisJob) -> bool:
+        """동일 요청을 진행 중인 작업에 합류 (그 사이 끝났으면 False)"""
+        with self._cond:
+            if job.done or job.aborted:
+                return False
+            job.attached += 1
+            self.stats['coalesced'] += 1
+        job._touch()
+        logger.info(f"[작업 큐] 동일 요청 합류: {job.id} (합류 {job.attached}건)")
+        return True
+
+    def release(self, job_id: str) -> bool:
+        """요청자 하나가 작업을 떠남 - 합류한 요청이 남아 있으면 합류 수만 줄이고, 마지막 요청자면 중지 (중지했으면 True)"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            if job.attached > 0:
+                job.attached -= 1
+                detached = True
+            else:
+                detached = False
+        if detached:
+            job._touch()
+            logger.info(f"[작업 큐] 합류 요청 이탈: {job.id} (남은 합류 {job.attached}건)")
+            return False
+        return self.cancel(job_id)
+
+    def _next(self) -> AnalysisJob:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            job = self._pending.popleft()
+            self._running[job.id] = job
+            waiting = list(self._pending)
+        # 앞 작업이 빠졌으므로 대기 중인 작업의 순번 변경 알림
+        for other in waiting:
+            other._touch()
+        return job
+
+    def _work(self):
+        while True:
+            job = self._next()
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running.pop(job.id, None)
+
+    def _run(self, job: AnalysisJob):
+        if job.aborted:
+            self._finish(job, 'cancelled', message='분석이 중지되었습니다.')
+            return
+        job.update(status='running', started_at=time.time(), message='분석을 시작합니다...')
+        try:
+            result = job.fn(job)
+        except Exception as e:
+            if job.aborted:
+                self._finish(job, 'cancelled', message='분석이 중지되었습니다.')
+                return
+            logger.error(f"[작업 큐] {job.id} 실패: {e}")
+            self._finish(job, 'error', message=f'분석 실패: {e}', error=str(e))
+            return
+        if job.aborted or (isinstance(result, dict) and result.get('status') == 'cancelled'):
+            self._finish(job, 'cancelled', message='분석이 중지되었습니다.')
+            return
+        self._finish(job, 'completed', progress=100, message='분석이 완료되었습니다!', output=result)
+
+    def _finish(self, job: AnalysisJob, status: str, **fields):
+        with self._cond:
+            self.stats[{'completed': 'completed', 'error': 'failed', 'cancelled': 'cancelled'}[status]] += 1
+            # 합류한 요청마다 따로 실행했다면 들었을 LLM 호출 수 (종료 상태 설정과 함께 잠가서 이후 합류 없음)
+            self.stats['calls_saved'] += job.attached * job.llm_calls
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.finished_at = time.time()
+            # 결과를 모두 채운 뒤 종료 상태로 전환 (SSE가 종료 상태를 보고 스트림을 닫음)
+            job.status = status
+        job._touch()
+        logger.info(f"[작업 큐] {job.id} {status}")
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def find(self, **meta) -> List[AnalysisJob]:
+        """meta가 모두 일치하는 작업 (생성 순)"""
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return [j for j in jobs if all(j.meta.get(k) == v for k, v in meta.items())]
+
+    def position(self, job_id: str) -> int:
+        """대기 순번 (1부터, 대기 중이 아니면 0)"""
+        with self._cond:
+            for i, job in enumerate(self._pending):
+                if job.id == job_id:
+                    return i + 1
+        return 0
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중이면 대기열에서 제거, 실행 중이면 중지 신호"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            queued = job in self._pending
+            if queued:
+                self._pending.remove(job)
+            waiting = list(self._pending)
+        job.abort()
+        if queued:
+            self._finish(job, 'cancelled', message='분석이 중지되었습니다.')
+            for other in waiting:
+                other._touch()
+        return True
+
+    def cancel_all(self) -> int:
+        """모든 대기/실행 중인 작업 중지 (관리자 초기화 전용)"""
+        with self._cond:
+            active = [j.id for j in self._jobs.values() if not j.done]
+        return sum(self.cancel(job_id) for job_id in active)
+
+    def snapshot(self, job: AnalysisJob) -> Dict[str, Any]:
+        """API/SSE 응답용 작업 상태"""
+        started = job.started_at or (None if job.status == 'queued' else job.finished_at)
+        return {
+            'job_id': job.id,
+            **job.meta,
+            'status': job.status,
+            'position': self.position(job.id),
+            'progress': job.progress,
+            'current_step': job.current_step,
+            'message': job.message,
+            'result': job.result,
+            'output': job.output,
+            'error': job.error,
+            'attached': job.attached,
+            'llm_calls': job.llm_calls,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'queue_wait': round(started - job.created_at, 3) if started else None,
+            'version': job.version,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.stats,
+                'queued': len(self._pending),
+                'running': len(self._running),
+                'max_workers': self.max_workers,
+                'max_queued': self.max_queued,
+            }
+
+
+# 전역 작업 큐 인스턴스
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue(jobs_config: Optional[Dict[str, Any]] = None) -> JobQueue:
+    """전역 분석 작업 큐 반환"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                if jobs_config is None:
+                    from config import get_config
+                    jobs_config = get_config()['jobs']
+                _job_queue = JobQueue(
+                    max_workers=jobs_config['MAX_WORKERS'],
+                    max_queued=jobs_config['MAX_QUEUED'],
+                    retention_seconds=jobs_config['RETENTION_SECONDS'],
+                    max_finished=jobs_config['MAX_FINISHED'],
+                )
+    return _job_queue
@@ -0,0 +1,99 @@
+# 시트 플래너 자체 점검 - chain3_prompt_example.txt 예제로 로컬 플래너(plan_task_sequence)와 계획 검증/수리(verify_plan/repair_plan) 확인
+# 사용법: python utils/plan_selfcheck.py (실패 시 종료 코드 1)
+import copy
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+TETRIS_ROOT = Path(__file__).resolve().parent.parent
+for _path in (TETRIS_ROOT, TETRIS_ROOT / 'main_chain'):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from seat_planner import PlanVerificationError, plan_task_sequence, repair_plan, verify_plan
+
+EXAMPLE_PATH = TETRIS_ROOT / 'main_chain' / 'chain3_prompt' / 'chain3_prompt_example.txt'
+_EXAMPLE_RE = re.compile(r'Example (\d+):\s*"""\s*- Input:\s*(.*?)\s*- Output:\s*(.*?)\s*"""', re.S)
+
+
+def load_examples(path: Path = EXAMPLE_PATH) -> List[Tuple[str, Dict[str, list], Dict[str, List[str]]]]:
+    """프롬프트 예제 → [(이름, instruction.seats, 기대 task_sequence)]"""
+    examples = []
+    for number, source, expected in _EXAMPLE_RE.findall(path.read_text(encoding='utf-8')):
+        seats = json.loads(source)['instruction']['seats']
+        examples.append((f"Example {number}", seats, json.loads(expected)['task_sequence']))
+    if not examples:
+        raise ValueError(f"예제를 찾지 못했습니다: {path}")
+    return examples
+
+
+def _check_planner(examples) -> List[str]:
+    """로컬 플래너가 예제 출력과 같은 최소 동작 순서를 만드는지, 예제 출력이 검증을 통과하는지"""
+    errors = []
+    for name, seats, expected in examples:
+        planned = plan_task_sequence(seats)
+        if planned != expected:
+            errors.append(f"{name}: 플래너 출력 {planned} != 예제 {expected}")
+        failed = [cell for cell, result in verify_plan(expected, seats).items() if not result['ok']]
+        if failed:
+            errors.append(f"{name}: 예제 출력이 검증 실패 (셀 {failed})")
+    return errors
+
+
+def _mutate(example, cell: str, edit: Callable[[List[str]], List[str]]):
+    _, seats, expected = example
+    broken = copy.deepcopy(expected)
+    broken[cell] = edit(broken[cell])
+    return seats, expected, broken
+
+
+def _check_repaired(label: str, seats, expected, broken, cell: str) -> List[str]:
+    """깨진 계획이 한 셀만 수리되어 예제 출력으로 돌아오는지"""
+    if verify_plan(broken, seats)[cell]['ok']:
+        return [f"{label}: 깨진 계획이 검증을 통과함"]
+    repaired, report = repair_plan(broken, seats)
+    if repaired != expected:
+        return [f"{label}: 수리 결과 {repaired} != 예제 {expected}"]
+    if [r['cell'] for r in report['repairs']] != [cell]:
+        return [f"{label}: 수리된 셀 {report['repairs']}"]
+    return []
+
+
+def run_selfcheck() -> List[str]:
+    """전체 점검 실행, 실패 메시지 목록 반환 (비어 있으면 통과)"""
+    examples = {name: (name, seats, expected) for name, seats, expected in load_examples()}
+    errors = _check_planner(examples.values())
+
+    # unfold 누락 → 수리
+    seats, expected, broken = _mutate(examples['Example 5'], '1', lambda actions: actions[:-1])
+    errors += _check_repaired("unfold 누락", seats, expected, broken, '1')
+
+    # seat_rotate 각도 오류 → 수리
+    seats, expected, broken = _mutate(
+        examples['Example 2'], '1',
+        lambda actions: [a.replace('seat_rotate(270)', 'seat_rotate(90)') for a in actions],
+    )
+    errors += _check_repaired("seat_rotate 각도 오류", seats, expected, broken, '1')
+
+    # 편집 거리가 max_edits를 넘으면 수리하지 않고 예외
+    seats, _, broken = _mutate(examples['Example 6'], '2', lambda actions: ["unchanged"])
+    try:
+        repair_plan(broken, seats, max_edits=2)
+        errors.append("max_edits 초과: PlanVerificationError가 발생하지 않음")
+    except PlanVerificationError:
+        pass
+    return errors
+
+
+def main():
+    errors = run_selfcheck()
+    for error in errors:
+        print(f"[실패] {error}")
+    print("플래너 자체 점검 통과" if not errors else f"플래너 자체 점검 실패 {len(errors)}건")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# AI 체인 결과 캐시 - 메모리 LRU + 디스크 2단 캐시 (TTL 및 용량 기반 정리)
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def decode_data_url(image_data_url: str) -> bytes:
+    """data URL을 원본 이미지 바이트로 디코딩 (data URL이 아니면 문자열 자체를 사용)"""
+    if image_data_url and image_data_url.startswith('data:') and ',' in image_data_url:
+        header, payload = image_data_url.split(',', 1)
+        if ';base64' in header:
+            try:
+                return base64.b64decode(payload)
+            except (ValueError, TypeError):
+                pass
+        return payload.encode('utf-8')
+    return (image_data_url or '').encode('utf-8')
+
+
+def image_digest(image_data_url: str) -> str:
+    """디코딩된 이미지 바이트의 SHA-256"""
+    return hashlib.sha256(decode_data_url(image_data_url)).hexdigest()
+
+
+def make_result_key(image_data_url: str, people_count: int, prompt_fingerprint: str) -> str:
+    """이미지 해시 + 인원 수 + 프롬프트 지문으로 캐시 키 생성"""
+    raw = f"{image_digest(image_data_url)}:{int(people_count or 0)}:{prompt_fingerprint}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TieredCache:
+    """메모리 LRU 계층과 디스크(JSON 파일) 계층으로 구성된 캐시"""
+
+    def __init__(self,
+                 cache_dir: Path,
+                 memory_entries: int = 32,
+                 disk_entries: int = 500,
+                 disk_max_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and (time.time() - created_at) > self.ttl_seconds
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시 조회 (만료 항목은 삭제 후 None)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry['created_at']):
+                    self.delete(key)
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry['value']
+
+            path = self._path(key)
+            if path.exists():
+                try:
+                    entry = json.loads(path.read_text(encoding='utf-8'))
+                    if self._expired(entry['created_at']):
+                        self.delete(key)
+                    else:
+                        os.utime(path, None)  # 디스크 LRU 순서 갱신
+                        self._remember(key, entry)
+                        self.stats['disk_hits'] += 1
+                        return entry['value']
+                except Exception as e:
+                    logger.warning(f"캐시 파일 읽기 실패 ({path.name}): {e}")
+                    self.delete(key)
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """캐시 저장 (메모리 + 디스크)"""
+        entry = {'created_at': time.time(), 'value': value}
+        with self._lock:
+            self._remember(key, entry)
+            try:
+                tmp_path = self._path(key).with_suffix('.tmp')
+                tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+                os.replace(tmp_path, self._path(key))
+            except Exception as e:
+                logger.warning(f"캐시 파일 저장 실패: {e}")
+                return
+            self._evict_disk()
+
+    def delete(self, key: str):
+        """캐시 항목 삭제"""
+        with self._lock:
+            self._memory.pop(key, None)
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict_disk(self):
+        """TTL 만료 및 개수/용량 초과 항목을 오래된 순으로 삭제"""
+        files = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+
+        total_bytes = sum(size for _, size, _ in files)
+        count = len(files)
+        now = time.time()
+        for mtime, size, path in files:
+            expired = bool(self.ttl_seconds) and (now - mtime) > self.ttl_seconds
+            if not expired and count <= self.disk_entries and total_bytes <= self.disk_max_bytes:
+                continue
+            self._memory.pop(path.stem, None)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total_bytes -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """전체 캐시 삭제"""
+        with self._lock:
+            self._memory.clear()
+            for path in self.cache_dir.glob('*.json'):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_size': len(self._memory),
+                'disk_size': len(list(self.cache_dir.glob('*.json'))),
+            }
+
+
+# 전역 결과 캐시 인스턴스
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache(cache_config: Optional[Dict[str, Any]] = None) -> Optional[TieredCache]:
+    """전역 결과 캐시 인스턴스 반환 (비활성화 시 None)"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                if cache_config is None:
+                    from config import get_config
+                    cache_config = get_config()['cache']
+                if not cache_config.get('ENABLED', True):
+                    return None
+                _result_cache = TieredCache(
+                    cache_dir=cache_config['CACHE_DIR'],
+                    memory_entries=cache_config['MEMORY_ENTRIES'],
+                    disk_entries=cache_config['DISK_ENTRIES'],
+                    disk_max_bytes=cache_config['DISK_MAX_BYTES'],
+                    ttl_seconds=cache_config['TTL_SECONDS'],
+                )
+    return _result_cache
@@ -0,0 +1,174 @@
+# 시리얼 코덱 벤치마크 - 기존 문자열 인코더와 표 기반 SerialCodec의 속도/결과 동치성 비교, 16자리 코드 디코딩
+# 사용법: python utils/serial_codec_bench.py [--benchmark 20000] [--decode CODE16]
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Union
+
+TETRIS_ROOT = Path(__file__).resolve().parent.parent
+for _path in (TETRIS_ROOT, TETRIS_ROOT / 'main_chain'):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from serial_codec import SerialCodec, _enumerate_combinations, format_call, get_serial_codec
+from seat_planner import CELL_IDS
+
+
+# 기존 구현 (벤치마크/동치성 검증용)
+class _LegacySerialEncoder:
+    def __init__(self):
+        self.encoding_rules = {
+            'disk_rotate': {0: '0000', 90: '0010'},
+            'move_on_rail': {'M': '0000', 'A': '0100', 'C': '0200'},
+            'seat_rotate': {0: '0000', 90: '1000', 180: '2000', 270: '3000'},
+            'unfold': '0000',
+            'fold': '0001',
+            'unchanged': '0000'
+        }
+    
+    def parse_function_call(self, func_call: str) -> Dict[str, Union[str, int, None]]:
+        if not func_call or not isinstance(func_call, str):
+            raise ValueError(f"Invalid function call (empty): {func_call}")
+        s = func_call.strip()
+        if not s:
+            raise ValueError(f"Invalid function call (blank): {func_call}")
+        if "(" not in s and ")" not in s:
+            return {"function": s, "param": None}
+        m = re.match(r"^\s*(\w+)\s*\(\s*(.*?)\s*\)\s*$", s)
+        if not m:
+            raise ValueError(f"Invalid function call format: {func_call}")
+        func_name, arg_str = m.group(1), m.group(2)
+        if arg_str == "":
+            param = None
+        else:
+            param_raw = arg_str.strip().strip('\'"')
+            param = int(param_raw) if param_raw.isdigit() else param_raw
+        return {"function": func_name, "param": param}
+    
+    def process_cell(self, function_calls: Union[str, List[str]]) -> str:
+        if function_calls is None:
+            return "0000"
+        if isinstance(function_calls, str):
+            raw = function_calls.strip()
+            if not raw:
+                calls = []
+            elif ";" in raw or "\n" in raw:
+                calls = [x.strip() for x in re.split(r"[;\n]", raw) if x.strip()]
+            else:
+                calls = [raw]
+        elif isinstance(function_calls, list):
+            calls = [str(x).strip() for x in function_calls if str(x).strip()]
+        else:
+            raise ValueError(f"Cell actions must be list or str, got: {type(function_calls)}")
+        
+        total_sum = 0
+        unfold_count = 0
+        for func_call in calls:
+            parsed = self.parse_function_call(func_call)
+            func_name = parsed["function"]; param = parsed["param"]
+            if func_name == "unchanged":
+                encoded_pin = '0000'
+            elif func_name == "disk_rotate":
+                if param not in self.encoding_rules["disk_rotate"]:
+                    raise ValueError(f"Invalid degree value for disk_rotate: {param}")
+                encoded_pin = self.encoding_rules["disk_rotate"][param]
+            elif func_name == "move_on_rail":
+                if param not in self.encoding_rules["move_on_rail"]:
+                    raise ValueError(f"Invalid target value for move_on_rail: {param}")
+                encoded_pin = self.encoding_rules["move_on_rail"][param]
+            elif func_name == "seat_rotate":
+                if param not in self.encoding_rules["seat_rotate"]:
+                    raise ValueError(f"Invalid degree value for seat_rotate: {param}")
+                encoded_pin = self.encoding_rules["seat_rotate"][param]
+            elif func_name == "unfold":
+                encoded_pin = '0000'; unfold_count += 1
+            elif func_name == "fold":
+                encoded_pin = '0001'
+            else:
+                raise ValueError(f"Unknown function: {func_name}")
+            total_sum += int(encoded_pin)
+        final_result = total_sum - unfold_count
+        return f"{final_result:04d}"
+    
+    def convert_to_16_digit(self, task_sequence: Dict[str, Union[str, List[str]]]) -> str:
+        if not isinstance(task_sequence, dict):
+            raise ValueError(f"task_sequence must be dict, got: {type(task_sequence)}")
+        return ''.join(self.process_cell(task_sequence.get(cell, "unchanged")) for cell in ['1','2','3','4'])
+    
+    def convert_from_json_string(self, json_string: str) -> str:
+        try:
+            data = json.loads(json_string)
+            if 'task_sequence' in data:
+                return self.convert_to_16_digit(data['task_sequence'])
+            else:
+                return self.convert_to_16_digit(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON format: {e}")
+
+
+def _random_plans(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    combos = _enumerate_combinations()
+    plans = []
+    for _ in range(n):
+        task_sequence = {}
+        for cell in CELL_IDS:
+            combo = rng.choice(combos)
+            task_sequence[cell] = [format_call(a, cell) for a in combo] or ["unchanged"]
+        plans.append(json.dumps({"task_sequence": task_sequence}))
+    return plans
+
+
+def benchmark(n: int = 20000, seed: int = 0) -> Dict[str, float]:
+    """기존 convert_from_json_string 경로와 코덱 비교 (결과 동치성 확인 포함)"""
+    plans = _random_plans(n, seed)
+    legacy = _LegacySerialEncoder()
+    codec = SerialCodec()
+
+    t0 = time.perf_counter()
+    legacy_codes = [legacy.convert_from_json_string(p) for p in plans]
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    codec_codes = [codec.convert_from_json_string(p) for p in plans]
+    codec_s = time.perf_counter() - t0
+
+    parsed = [json.loads(p) for p in plans]
+    t0 = time.perf_counter()
+    codec.encode_many(parsed)
+    bulk_s = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(legacy_codes, codec_codes) if a != b)
+    return {
+        'plans': n,
+        'legacy_us_per_plan': legacy_s / n * 1e6,
+        'codec_us_per_plan': codec_s / n * 1e6,
+        'codec_bulk_us_per_plan': bulk_s / n * 1e6,
+        'speedup': legacy_s / codec_s if codec_s else float('inf'),
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="TETRIS serial codec")
+    ap.add_argument("--benchmark", type=int, metavar="N", help="무작위 계획 N개로 기존 인코더와 비교")
+    ap.add_argument("--decode", metavar="CODE16", help="16자리 코드를 task_sequence로 디코딩")
+    args = ap.parse_args()
+
+    if args.decode:
+        print(json.dumps({"task_sequence": get_serial_codec().decode(args.decode)}, ensure_ascii=False, indent=2))
+    if args.benchmark:
+        result = benchmark(args.benchmark)
+        print(f"계획 {result['plans']}개")
+        print(f"  기존 convert_from_json_string: {result['legacy_us_per_plan']:.2f} us/plan")
+        print(f"  코덱 convert_from_json_string: {result['codec_us_per_plan']:.2f} us/plan ({result['speedup']:.1f}x)")
+        print(f"  코덱 encode_many (파싱된 dict): {result['codec_bulk_us_per_plan']:.2f} us/plan")
+        print(f"  결과 불일치: {result['mismatches']}건")
+
+
+if __name__ == "__main__":
+    main()
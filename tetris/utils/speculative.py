@@ -0,0 +1,142 @@
+# 추측 실행 - 사용자가 시작하기 전에 작업을 미리 실행하고, 같은 입력이면 결과를 채택
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculativeTask:
+    """진행 중이거나 완료된 추측 실행 하나"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.future: Future = Future()
+        self.cancel_event = threading.Event()
+        self.created_at = time.time()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class SpeculativeRunner:
+    """입력 키별 추측 실행 관리 (같은 요청자의 새 입력이 들어오면 그 요청자의 이전 추측만 폐기, TTL 경과 시 만료)"""
+
+    def __init__(self, ttl_seconds: float = 600):
+        self.ttl_seconds = ttl_seconds
+        self._tasks: Dict[str, SpeculativeTask] = {}
+        self._owners: Dict[str, str] = {}  # 요청자(브라우저 세션) → 마지막으로 시작한 추측 키
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'adopted': 0, 'discarded': 0, 'failed': 0}
+
+    def _expired(self, task: SpeculativeTask) -> bool:
+        return bool(self.ttl_seconds) and (time.time() - task.created_at) > self.ttl_seconds
+
+    def _drop(self, key: str):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            self.stats['discarded'] += 1
+        for owner in [o for o, k in self._owners.items() if k == key]:
+            del self._owners[owner]
+
+    def _release_owner(self, owner: str):
+        """요청자의 이전 추측 폐기 (같은 입력을 올린 다른 요청자가 있으면 유지)"""
+        key = self._owners.pop(owner, None)
+        if key is not None and key not in self._owners.values():
+            self._drop(key)
+
+    def start(self, key: str, fn: Callable[[threading.Event], Any], owner: Optional[str] = None) -> bool:
+        """fn(cancel_event)을 백그라운드 스레드에서 실행 (같은 키가 이미 있으면 재사용, owner: 요청자 식별자)"""
+        with self._lock:
+            # 입력이 바뀐 요청자의 이전 추측과 만료된 추측만 폐기 (다른 세션의 사전 실행은 유지)
+            if owner is not None and self._owners.get(owner) != key:
+                self._release_owner(owner)
+            for other in [k for k, t in self._tasks.items() if k != key and self._expired(t)]:
+                self._drop(other)
+            if owner is not None:
+                self._owners[owner] = key
+            existing = self._tasks.get(key)
+            if existing is not None and not self._expired(existing):
+                return False
+            task = SpeculativeTask(key)
+            self._tasks[key] = task
+            self.stats['started'] += 1
+
+        def _run():
+            try:
+                task.future.set_result(fn(task.cancel_event))
+            except BaseException as e:
+                task.future.set_exception(e)
+
+        threading.Thread(target=_run, name=f"speculative-{key[:8]}", daemon=True).start()
+        return True
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def adopt(self, key: str, should_stop: Optional[Callable[[], bool]] = None,
+              timeout: Optional[float] = None, poll_interval: float = 0.1) -> Optional[Any]:
+        """같은 키의 추측 결과 채택 (진행 중이면 완료까지 대기), 없거나 만료되었으면 None"""
+        with self._lock:
+            task = self._tasks.pop(key, None)
+            for owner in [o for o, k in self._owners.items() if k == key]:
+                del self._owners[owner]
+        if task is None:
+            return None
+        if self._expired(task):
+            task.cancel()
+            self._count('discarded')
+            return None
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                result = task.future.result(timeout=poll_interval)
+                break
+            except FutureTimeoutError:
+                if (should_stop and should_stop()) or (deadline is not None and time.monotonic() > deadline):
+                    task.cancel()
+                    self._count('discarded')
+                    return None
+            except BaseException as e:
+                logger.warning(f"추측 실행 실패 - 채택하지 않음: {e}")
+                self._count('failed')
+                return None
+        self._count('adopted')
+        return result
+
+    def discard(self, key: Optional[str] = None, owner: Optional[str] = None):
+        """추측 폐기 (key 또는 owner의 추측, 둘 다 없으면 전체) - 진행 중인 실행에는 취소 신호 전달"""
+        with self._lock:
+            if owner is not None:
+                self._release_owner(owner)
+                return
+            for k in ([key] if key is not None else list(self._tasks)):
+                self._drop(k)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'pending': len(self._tasks)}
+
+
+# 전역 추측 실행기 인스턴스
+_speculative_runner = None
+_speculative_runner_lock = threading.Lock()
+
+def get_speculative_runner(speculative_config: Optional[Dict[str, Any]] = None) -> Optional[SpeculativeRunner]:
+    """전역 추측 실행기 반환 (비활성화 시 None)"""
+    global _speculative_runner
+    if _speculative_runner is None:
+        with _speculative_runner_lock:
+            if _speculative_runner is None:
+                if speculative_config is None:
+                    from config import get_config
+                    speculative_config = get_config()['speculative']
+                if not speculative_config.get('ENABLED', True):
+                    return None
+                _speculative_runner = SpeculativeRunner(ttl_seconds=speculative_config['TTL_SECONDS'])
+    return _speculative_runner
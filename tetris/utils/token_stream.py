@@ -0,0 +1,88 @@
+# 체인 출력 토큰 스트림 - LLM 부분 출력을 SSE 클라이언트별 제한 버퍼로 중계 (이벤트마다 job_id, 구독자별 작업 필터)
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class TokenSubscriber:
+    """SSE 클라이언트 하나의 제한 버퍼 (가득 차면 가장 오래된 이벤트부터 버림)"""
+
+    def __init__(self, buffer_size: int, job_id: Optional[str] = None):
+        self.job_id = job_id  # 지정 시 이 작업의 이벤트만 수신 (None이면 모든 작업)
+        self._events: deque = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, event: Dict[str, Any]):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+
+    def drain(self, timeout: float) -> List[Dict[str, Any]]:
+        """쌓인 이벤트를 모두 꺼냄 (없으면 timeout까지 대기)"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class TokenBroadcaster:
+    """체인 단계별 토큰 청크를 구독 중인 모든 클라이언트에 전달"""
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._subscribers: List[TokenSubscriber] = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def subscribe(self, buffer_size: Optional[int] = None, job_id: Optional[str] = None) -> TokenSubscriber:
+        """구독 추가 (job_id 지정 시 해당 분석 작업의 이벤트만 수신)"""
+        subscriber = TokenSubscriber(buffer_size or self.buffer_size, job_id)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: TokenSubscriber):
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event: str, step: Optional[int] = None, job_id: Optional[str] = None, **data):
+        """이벤트 발행 (event: 'start' | 'token' | 'end' | 'done' | 'cancelled', job_id: 발행한 분석 작업)"""
+        payload = {'event': event, 'step': step, 'job_id': job_id, 'seq': next(self._seq), 'timestamp': time.time(), **data}
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.job_id is None or s.job_id == job_id]
+        for subscriber in subscribers:
+            subscriber.push(payload)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+# 전역 토큰 브로드캐스터 인스턴스
+_token_broadcaster = None
+_token_broadcaster_lock = threading.Lock()
+
+def get_token_broadcaster(buffer_size: int = 256) -> TokenBroadcaster:
+    """전역 토큰 브로드캐스터 반환"""
+    global _token_broadcaster
+    if _token_broadcaster is None:
+        with _token_broadcaster_lock:
+            if _token_broadcaster is None:
+                _token_broadcaster = TokenBroadcaster(buffer_size)
+    return _token_broadcaster
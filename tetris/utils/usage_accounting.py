@@ -0,0 +1,66 @@
+# 사용량 집계 - 실행별/체인별 프롬프트 문자 수, 이미지 바이트, 입력/출력 토큰을 합산하고 예산 초과 경고 및 log_data 기록
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = ('calls', 'prompt_chars', 'image_bytes', 'input_tokens', 'output_tokens')
+
+
+def _chain_of(llm_name: str) -> str:
+    """LLM 실행 이름 → 체인 이름 (chain1_llm → chain1)"""
+    return llm_name[:-len('_llm')] if llm_name.endswith('_llm') else llm_name
+
+
+def summarize_usage(llm_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """LLM 호출 목록(ChainTimingHandler.llm_calls)을 체인별/실행 합계로 집계 (재시도·폴백 호출 포함)"""
+    chains: Dict[str, Dict[str, int]] = {}
+    total = dict.fromkeys(USAGE_FIELDS, 0)
+    sources = set()
+    for call in llm_calls:
+        counters = chains.setdefault(_chain_of(call['name']), dict.fromkeys(USAGE_FIELDS, 0))
+        for bucket in (counters, total):
+            bucket['calls'] += 1
+            for field in USAGE_FIELDS[1:]:
+                bucket[field] += int(call.get(field) or 0)
+        sources.add(call.get('token_source', 'estimate'))
+    return {
+        'chains': chains,
+        'total': total,
+        # provider: 모델 usage_metadata, estimate: 문자 4개 ≈ 1토큰 근사 (이미지 토큰 제외)
+        'token_source': sources.pop() if len(sources) == 1 else ('mixed' if sources else 'none'),
+    }
+
+
+def check_budgets(usage: Dict[str, Any], budget_config: Dict[str, Any]) -> List[str]:
+    """실행 합계(PER_RUN)와 체인별(PER_CHAIN) 예산 초과 항목의 경고 문구 목록"""
+    warnings = []
+    for field, limit in (budget_config.get('PER_RUN') or {}).items():
+        value = usage['total'].get(field, 0)
+        if limit and value > limit:
+            warnings.append(f"실행 {field} {value:,} > 예산 {limit:,}")
+    for chain, limits in (budget_config.get('PER_CHAIN') or {}).items():
+        counters = usage['chains'].get(chain)
+        if not counters:
+            continue
+        for field, limit in limits.items():
+            value = counters.get(field, 0)
+            if limit and value > limit:
+                warnings.append(f"{chain} {field} {value:,} > 예산 {limit:,}")
+    return warnings
+
+
+def save_usage(out_path: Path, usage: Dict[str, Any], ledger_file: Optional[Path] = None, **meta) -> Path:
+    """결과 파일 옆에 {scenario}.usage.json 저장, ledger_file이 있으면 실행 요약 한 줄 추가"""
+    record = {'scenario': out_path.stem, 'recorded_at': time.time(), **meta, **usage}
+    usage_path = out_path.with_name(f"{out_path.stem}.usage.json")
+    usage_path.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding='utf-8')
+    if ledger_file is not None:
+        ledger_file = Path(ledger_file)
+        ledger_file.parent.mkdir(parents=True, exist_ok=True)
+        with ledger_file.open('a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return usage_path
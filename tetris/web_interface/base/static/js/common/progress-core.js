@@ -119,6 +119,77 @@
     <rect width="20" height="20" rx="10" transform="matrix(1 0 0 -1 0 20)" fill="#DC2626"/>
     <path d="M13.5 6.5L6.5 13.5M6.5 6.5L13.5 13.5" stroke="white" stroke-width="2" stroke-linecap="round"/>
 </svg>`;
+        },
+
+        // 분석 작업 스냅샷(/jobs/<job_id>/stream) → 기존 상태 스트림과 같은 형식
+        jobSnapshotToStatus(job) {
+            const result = job.result || {};
+            const processingStatus = job.status === 'queued' ? 'processing' : job.status;
+            return {
+                job_id: job.job_id,
+                scenario: job.scenario,
+                status: job.status === 'completed' ? 'done' : job.status,
+                message: job.message,
+                progress: job.progress,
+                current_step: job.current_step,
+                queue_position: job.position,
+                processing: {
+                    status: processingStatus,
+                    progress: job.progress,
+                    current_step: job.current_step
+                },
+                analysis_result: result,
+                serial_encoder_out: result.serial_encoder_out
+            };
+        },
+
+        // 분석 작업 하나의 SSE 구독 - 작업이 끝나면(completed/error/cancelled) 스트림을 닫고 onEnd 호출
+        subscribeJob(jobId, onStatus, onEnd) {
+            const jobsUrl = window.CONFIG?.ENDPOINTS?.DESKTOP?.JOBS || '/desktop/api/jobs';
+            const source = new EventSource(`${jobsUrl}/${encodeURIComponent(jobId)}/stream`);
+            source.onmessage = async (e) => {
+                try {
+                    const job = JSON.parse(e.data);
+                    await onStatus(this.jobSnapshotToStatus(job), job);
+                    if (['completed', 'error', 'cancelled'].includes(job.status)) {
+                        source.close();
+                        if (onEnd) onEnd(job);
+                    }
+                } catch (err) {
+                    console.error('분석 작업 스트림 메시지 처리 오류:', err, '데이터:', e.data);
+                }
+            };
+            source.onerror = (e) => {
+                // 서버 재시작 등으로 끊긴 경우 EventSource가 자동 재연결 (작업이 사라졌으면 404로 종료)
+                if (source.readyState === EventSource.CLOSED) {
+                    console.warn('분석 작업 스트림 종료:', jobId, e);
+                    if (onEnd) onEnd(null);
+                }
+            };
+            return source;
+        },
+
+        // 분석 작업 하나의 체인 출력 토큰 SSE 구독 - 체인이 끝나거나(done/cancelled) 작업이 토큰 없이 끝나면(closed) 스트림을 닫음
+        subscribeTokens(jobId, onEvent) {
+            const jobsUrl = window.CONFIG?.ENDPOINTS?.DESKTOP?.JOBS || '/desktop/api/jobs';
+            const source = new EventSource(`${jobsUrl}/${encodeURIComponent(jobId)}/tokens`);
+            source.onmessage = (e) => {
+                try {
+                    const payload = JSON.parse(e.data);
+                    if (['done', 'cancelled', 'closed'].includes(payload.event)) {
+                        source.close();
+                    }
+                    onEvent(payload);
+                } catch (err) {
+                    console.error('토큰 스트림 메시지 처리 오류:', err, '데이터:', e.data);
+                }
+            };
+            source.onerror = (e) => {
+                if (source.readyState === EventSource.CLOSED) {
+                    console.warn('토큰 스트림 종료:', jobId, e);
+                }
+            };
+            return source;
         }
     };
 
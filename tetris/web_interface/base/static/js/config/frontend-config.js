@@ -121,12 +121,17 @@ const CONFIG = {
             STATUS: '/desktop/api/status',
             STATUS_STREAM: '/desktop/api/status_stream',
             PROGRESS_STREAM: '/desktop/api/progress_stream',
+            TOKEN_STREAM: '/desktop/api/token_stream',
+            CHAIN_METRICS: '/desktop/api/chain_metrics',
             RESET: '/desktop/api/reset',
             JOIN_SESSION: '/desktop/api/join_session',
             SESSIONS: '/desktop/api/sessions',
             TRIGGER_HARDWARE: '/desktop/api/trigger_hardware',
             QR_PNG: '/desktop/qr.png',
-            STEP_ANALYSIS: '/desktop/api/step_analysis'
+            STEP_ANALYSIS: '/desktop/api/step_analysis',
+            RESUME_ANALYSIS: '/desktop/api/resume_analysis',
+            ADOPT_ANALYSIS: '/desktop/api/adopt_analysis',
+            JOBS: '/desktop/api/jobs'  // /jobs/<job_id>, /jobs/<job_id>/stream, /jobs/<job_id>/tokens, /jobs/<job_id>/cancel
         },
         // 모바일 사용자 API
         MOBILE: {
@@ -8,6 +8,8 @@ let currentStep = 0;
 let progressValue = 0;
 let shownSteps = { 1: false, 2: false, 3: false, 4: false };
 let eventSource = null;
+let tokenEventSource = null;
+let streamingText = { 1: '', 2: '', 3: '' };
 
 // option 이미지 파일 관련 변수
 window.currentOptionNo = 1; // chain2에서 받은 option_no 저장용
@@ -535,6 +537,7 @@ function resetAllSteps() {
     
     // shownSteps 플래그 리셋
     shownSteps = { 1: false, 2: false, 3: false, 4: false };
+    streamingText = { 1: '', 2: '', 3: '' };
     
     // step indicator 컨테이너 초기화
     const stepIndicator = document.querySelector('.step-indicator');
@@ -1257,8 +1260,70 @@ async function formatStepResult(stepNumber, resultData) {
     }
 }
 
+// 체인 출력 토큰 이벤트 표시 - 단계 결과가 확정되기 전까지 부분 출력을 그대로 표시
+function handleTokenEvent(payload) {
+    const step = payload.step;
+
+    if (payload.event === 'start' && streamingText[step] !== undefined) {
+        streamingText[step] = '';
+        return;
+    }
+    if (payload.event !== 'token' || streamingText[step] === undefined || shownSteps[step]) {
+        return;
+    }
+
+    streamingText[step] += payload.text || '';
+    const detailInfo = document.getElementById(`step${step}DetailInfo`);
+    if (detailInfo) {
+        detailInfo.innerHTML = `<div class="analysis-result-container streaming"><pre>${escapeHtml(streamingText[step])}</pre></div>`;
+        updateAccordionStatus(step, 'active');
+    }
+}
+
+// 체인 출력 토큰 스트림 (jobId 지정 시 해당 분석 작업의 토큰만, 없으면 모든 작업)
+function startTokenStream(jobId) {
+    try {
+        stopTokenStream();
+
+        if (jobId) {
+            tokenEventSource = ProgressCore.subscribeTokens(jobId, handleTokenEvent);
+            return;
+        }
+
+        const tokenStreamUrl = window.CONFIG?.ENDPOINTS?.DESKTOP?.TOKEN_STREAM || '/desktop/api/token_stream';
+        const source = new EventSource(tokenStreamUrl);
+        tokenEventSource = source;
+        source.onmessage = (e) => {
+            try {
+                handleTokenEvent(JSON.parse(e.data));
+            } catch (err) {
+                console.error('토큰 스트림 메시지 처리 오류:', err, '데이터:', e.data);
+            }
+        };
+
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED && tokenEventSource === source) {
+                setTimeout(() => {
+                    startTokenStream();
+                }, 3000);
+            }
+        };
+    } catch (e) {
+        console.error('토큰 스트림 연결 실패:', e);
+    }
+}
+
+function stopTokenStream() {
+    if (tokenEventSource) {
+        tokenEventSource.close();
+        tokenEventSource = null;
+    }
+}
+
 // SSE 연결 시작 (mobile/progress와 동일한 API 사용)
 function startAIStatusStream() {
+    startTokenStream();
+
     try {
         if (eventSource) {
             eventSource.close();
@@ -1609,6 +1674,8 @@ window.updateStepIndicator = updateStepIndicator;
 window.updateAccordionStatus = updateAccordionStatus;
 window.handleAIStatusData = handleAIStatusData;
 window.startAIStatusStream = startAIStatusStream;
+window.startTokenStream = startTokenStream;
+window.stopTokenStream = stopTokenStream;
 window.updateStepIcon = updateStepIcon;
 window.updateHardwareSection = updateHardwareSection;
 window.updateHardwareStatus = updateHardwareStatus;
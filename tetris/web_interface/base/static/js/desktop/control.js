@@ -10,6 +10,8 @@ class ControlController {
         this.hardwareConnected = false;
         this.sessionId = null;
         this.eventSource = null;
+        this.jobId = null;  // 화면에 표시 중인 분석 작업
+        this.jobSource = null;  // 분석 작업 SSE (/jobs/<job_id>/stream)
         
         // DOM 요소들
         this.mobileConnectionStatus = document.getElementById('mobileConnectionStatus');
@@ -561,13 +563,62 @@ class ControlController {
         console.log('✅ SSE 연결 설정 완료');
     }
     
-    // SSE 메시지 처리
-    async handleSSEMessage(data) {
+    // 분석 작업 스트림 구독 (모바일/데스크탑 어디서 시작했든 가장 최근에 시작된 작업을 표시)
+    followAnalysisJob(jobId) {
+        if (this.jobSource) {
+            this.jobSource.close();
+        }
+        console.log('🎯 분석 작업 구독:', jobId);
+        this.jobId = jobId;
+        if (window.resetAllSteps) {
+            window.resetAllSteps();
+        }
+        // 이 작업의 체인 출력 토큰 (단계 결과가 확정되기 전 부분 출력 표시)
+        if (window.startTokenStream) {
+            window.startTokenStream(jobId);
+        }
+        this.jobSource = ProgressCore.subscribeJob(
+            jobId,
+            (status) => this.handleSSEMessage(status, true),
+            () => {
+                this.jobSource = null;
+                if (window.stopTokenStream) {
+                    window.stopTokenStream();
+                }
+            }
+        );
+    }
+    
+    // SSE 메시지 처리 (fromJob: 분석 작업 스트림의 상태)
+    async handleSSEMessage(data, fromJob = false) {
         if (data.event === 'connected') {
             console.log('✅ SSE 연결 확인');
             return;
         }
         
+        // 전역 상태 스트림에서는 새 분석 작업 시작만 감지 - 진행률/단계 결과는 작업 스트림으로만 표시
+        if (!fromJob && data.job_id) {
+            if (data.job_id !== this.jobId) {
+                this.followAnalysisJob(data.job_id);
+            }
+            // 하드웨어 구동 완료 (trigger_hardware가 전역 상태에 단계 5 기록)
+            if (data.current_step >= 5 && window.updateHardwareStatus) {
+                window.updateHardwareStatus('completed', '구동 완료');
+            }
+            if (data.event && data.event.startsWith('hardware_')) {
+                this.updateHardwareStatus(data);
+            }
+            this.updateSystemStatus({
+                ...data,
+                status: undefined,
+                current_step: undefined,
+                progress: undefined,
+                processing: undefined,
+                system: { ...data.system, status: undefined }
+            });
+            return;
+        }
+        
         console.log('📡 SSE 메시지 처리 시작:', data);
         
         // AI 처리 상태 업데이트 - 모든 관련 데이터 확인
@@ -866,11 +917,13 @@ class ControlController {
         console.log('🔄 시스템 초기화 시작');
         try {
             const resetUrl = window.CONFIG?.ENDPOINTS?.DESKTOP?.RESET || '/desktop/api/reset';
+            // 관제 화면의 시스템 초기화는 모든 분석 중지
             const response = await fetch(resetUrl, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
+                },
+                body: JSON.stringify({ all: true })
             });
             
             const result = await response.json();
@@ -978,6 +1031,7 @@ class ControlController {
                 },
                 body: JSON.stringify({
                     session_id: this.sessionId,
+                    job_id: this.jobId,  // 표시 중인 분석 작업의 배치 코드 사용
                     command: 'execute'
                 })
             });
@@ -6,6 +6,7 @@ const btnPhotoIn = document.querySelector('#btnPhotoIn');
 let previewURL = null;
 let currentScenario = null;
 let imagePath = null;
+let nearDuplicate = null;  // 업로드 응답의 유사 이미지 이전 결과 (id, scenario, distance ...)
 
 /* 탑승 인원 선택 */
 const chips = document.querySelectorAll('.chip');
@@ -26,6 +27,7 @@ chips.forEach(ch => {
             btnPhotoIn.style.display = 'block';
             previewURL = null;
             currentScenario = null;
+            nearDuplicate = null;
         }
         if (submit) {
             submit.disabled = true;
@@ -50,6 +52,9 @@ const sheet = document.getElementById('photoSheet');
 const sheetOverlay = document.getElementById('sheetOverlay');
 const sheetNoIssue = document.getElementById('sheetNoIssue');
 const sheetGallery = document.getElementById('sheetGallery');
+const duplicateSheet = document.getElementById('duplicateSheet');
+const duplicateSheetNew = document.getElementById('duplicateSheetNew');
+const duplicateSheetAdopt = document.getElementById('duplicateSheetAdopt');
 
 function fadeIn(el, display) {
     if (!el) return;
@@ -108,6 +113,10 @@ photo.addEventListener('change', async () => {
         fadeIn(document.getElementById('submit'));
         submit.disabled = false;
         submit.classList.add('active');
+
+        // 비슷한 짐을 이전에 분석한 적이 있으면 이전 결과 사용 여부 확인
+        nearDuplicate = d.data.near_duplicate || null;
+        if (nearDuplicate) openDuplicateSheet();
     } catch (e) {
         console.error('네트워크 오류:', e);
         alert('네트워크 오류');
@@ -131,6 +140,22 @@ function closePhotoSheet() {
     sheetOverlay.setAttribute('aria-hidden', 'true');
 }
 
+function openDuplicateSheet() {
+    if (!duplicateSheet || !sheetOverlay) return;
+    duplicateSheet.classList.add('show');
+    sheetOverlay.classList.add('show');
+    duplicateSheet.setAttribute('aria-hidden', 'false');
+    sheetOverlay.setAttribute('aria-hidden', 'false');
+}
+
+function closeDuplicateSheet() {
+    if (!duplicateSheet || !sheetOverlay) return;
+    duplicateSheet.classList.remove('show');
+    sheetOverlay.classList.remove('show');
+    duplicateSheet.setAttribute('aria-hidden', 'true');
+    sheetOverlay.setAttribute('aria-hidden', 'true');
+}
+
 if (btnPhotoIn) {
     btnPhotoIn.addEventListener('click', (e) => {
         e.preventDefault(); // 기본 동작 방지
@@ -147,7 +172,20 @@ if (photoBox) {
     });
 }
 if (sheetOverlay) {
-    sheetOverlay.addEventListener('click', () => { closePhotoSheet(); });
+    sheetOverlay.addEventListener('click', () => { closePhotoSheet(); closeDuplicateSheet(); });
+}
+if (duplicateSheetNew) {
+    // 새로 분석 - 이전 결과를 사용하지 않고 기존 흐름(분석 시작 버튼) 유지
+    duplicateSheetNew.addEventListener('click', () => {
+        nearDuplicate = null;
+        closeDuplicateSheet();
+    });
+}
+if (duplicateSheetAdopt) {
+    duplicateSheetAdopt.addEventListener('click', () => {
+        closeDuplicateSheet();
+        submit.click();
+    });
 }
 if (sheetNoIssue) {
     sheetNoIssue.addEventListener('click', () => { closePhotoSheet(); });
@@ -189,6 +227,10 @@ submit.addEventListener('click', async () => {
         image_path: imagePath,
         image_data_url: imageDataUrl
     };
+    if (nearDuplicate) {
+        // 진행 페이지에서 분석 대신 이전 결과 채택 API 호출
+        analysisData.near_duplicate_id = nearDuplicate.id;
+    }
 
     console.log('분석 데이터 저장:', {
         scenario: analysisData.scenario,
@@ -2,7 +2,10 @@ let currentStep = 0;
 let progressValue = 0;
 let doneWaitCount = 0;
 let currentScenario = null;
+let currentJobId = null;  // 이 페이지가 시작(또는 합류)한 분석 작업
 let eventSource = null;
+let tokenSource = null;  // 이 작업의 체인 출력 토큰 스트림
+let streamingText = { 1: '', 2: '', 3: '' };
 let detailPanelOpen = false;
 let stepResultsOriginalParent = null;
 let stepResultsNextSibling = null;
@@ -628,6 +631,11 @@ function updateHardwareProgress(progress, message) {
 
 // 하드웨어 제어 실행
 async function executeHardwareControl() {
+    // 분석 작업 스트림은 분석 완료 시 닫히므로 모달은 trigger_hardware 응답으로 갱신
+    handleHardwareEvent({ event: 'hardware_start' });
+    updateHardwareStatus('connection', 'processing');
+    updateHardwareStatus('command', 'processing');
+    updateHardwareStatus('execution', 'processing');
     try {
         // API 호출
         const response = await fetch('/desktop/api/trigger_hardware', {
@@ -637,6 +645,7 @@ async function executeHardwareControl() {
             },
             body: JSON.stringify({
                 session_id: currentScenario || 'default',
+                job_id: currentJobId,  // 이 분석 작업의 배치 코드 사용
                 // placement_code: currentPlacementCode
             })
         });
@@ -644,9 +653,10 @@ async function executeHardwareControl() {
         const result = await response.json();
         
         if (result.success) {
-            
-            // 완료 버튼 표시
-            document.getElementById('closeProgressBtn').style.display = 'block';
+            // trigger_hardware는 구동이 끝난 뒤 응답 (완료 버튼도 hardware_complete에서 표시)
+            updateHardwareStatus('connection', 'completed');
+            updateHardwareStatus('command', 'completed');
+            handleHardwareEvent({ event: 'hardware_complete', message: result.message });
             
             console.log('하드웨어 제어 성공:', result);
         } else {
@@ -1206,29 +1216,45 @@ async function startAnalysis() {
             console.warn('세션에서 분석 데이터를 찾을 수 없습니다. 기본값 사용');
         }
         
-        // 분석 시작 API 호출
+        // 분석 시작 API 호출 (입력 화면에서 유사 이미지의 이전 결과를 선택했으면 채택 API)
         console.log('분석 API 호출 시작...');
-        const response = await fetch('/desktop/api/step_analysis', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                people_count: analysisData.people_count,
-                image_path: analysisData.image_path,
-                image_data_url: analysisData.image_data_url,
-                scenario: analysisData.scenario
+        const response = analysisData.near_duplicate_id
+            ? await fetch('/desktop/api/adopt_analysis', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    near_duplicate_id: analysisData.near_duplicate_id
+                })
             })
-        });
+            : await fetch('/desktop/api/step_analysis', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    people_count: analysisData.people_count,
+                    image_path: analysisData.image_path,
+                    image_data_url: analysisData.image_data_url,
+                    scenario: analysisData.scenario
+                })
+            });
         
         const result = await response.json();
         console.log('분석 시작 응답:', result);
         
         if (result.success) {
             console.log('분석이 성공적으로 시작되었습니다.');
-            // currentScenario 업데이트
-            currentScenario = newScenario;
-            console.log('현재 시나리오 업데이트:', currentScenario);
+            // currentScenario 업데이트 (동일 분석에 합류한 경우 서버의 시나리오 사용)
+            currentScenario = result.scenario || newScenario;
+            currentJobId = result.job_id || null;
+            console.log('현재 시나리오 업데이트:', currentScenario, '작업:', currentJobId);
+            
+            // 이 분석 작업의 진행 상태 구독
+            if (currentJobId) {
+                startSSE(currentJobId);
+            }
             
             // 1단계 메시지 사용
             document.getElementById('progressText').innerHTML = getAnimatedMessage(1);
@@ -1315,68 +1341,83 @@ document.addEventListener('DOMContentLoaded', async function() {
     // 초기에는 버튼 비활성화
     disableResultButton();
     
-    // 분석 시작
-    startAnalysis();
-    
     // 아코디언 초기화
     initializeAccordions();
     
     // 초기 아이콘 상태 설정
     initializeStepIcons();
     
-    // SSE 시작
-    await startSSE();
+    // 분석 시작 (응답의 job_id로 SSE 구독)
+    await startAnalysis();
 });
 
-// SSE 시작 함수 (재사용을 위해 분리)
-async function startSSE() {
+// 체인 출력 토큰 표시 - 단계 결과가 확정되기 전까지 부분 출력을 아코디언에 그대로 표시
+function handleTokenEvent(payload) {
+    const step = payload.step;
+    if (payload.event === 'start' && streamingText[step] !== undefined) {
+        streamingText[step] = '';
+        return;
+    }
+    if (payload.event !== 'token' || streamingText[step] === undefined || shownSteps[step]) {
+        return;
+    }
+
+    streamingText[step] += payload.text || '';
+    const accordionItemButton = document.querySelector(`#accordionItem0${step} button`);
+    const accordionItemBody = document.querySelector(`#accordionItem0${step} .accordion-body`);
+    if (!accordionItemBody) return;
+    let pre = accordionItemBody.querySelector('pre.streaming');
+    if (!pre) {
+        accordionItemBody.innerHTML = '<div class="analysis-result-container streaming"><pre class="streaming"></pre></div>';
+        pre = accordionItemBody.querySelector('pre.streaming');
+    }
+    pre.textContent = streamingText[step];
+    if (accordionItemButton) accordionItemButton.disabled = false;
+}
+
+function stopTokenStream() {
+    if (tokenSource) {
+        tokenSource.close();
+        tokenSource = null;
+    }
+}
+
+// SSE 시작 함수 - 이 페이지가 시작(또는 합류)한 분석 작업만 구독
+function startSSE(jobId) {
     try {
         if (eventSource) {
             eventSource.close();
         }
-        eventSource = new EventSource('/desktop/api/status_stream');
-        eventSource.onmessage = async (e) => {
-            try {
-                const payload = JSON.parse(e.data);
-                // 연결 이벤트는 건너뜀
-                if (payload && payload.event === 'connected') return;
+        stopTokenStream();
+        streamingText = { 1: '', 2: '', 3: '' };
+        tokenSource = ProgressCore.subscribeTokens(jobId, handleTokenEvent);
+        eventSource = ProgressCore.subscribeJob(jobId, async (payload) => {
+            if (payload.status === 'queued' && payload.queue_position) {
+                document.getElementById('progressText').innerHTML = `분석 대기 중입니다 (${payload.queue_position}번째)`;
+                return;
+            }
+            
+            await handleStatusData(payload);
+            const status = payload.status;
+            const hasFinal = !!(payload.serial_encoder_out || payload.analysis_result?.serial_encoder_out);
+            if (status === 'done' && hasFinal) {
+                document.getElementById('progressText').innerHTML = '분석이 완료되었습니다!';
                 
-                // 하드웨어 제어 이벤트 처리
-                if (payload.event && payload.event.startsWith('hardware_')) {
-                    handleHardwareEvent(payload);
-                    return;
-                }
+                // 메인 아이콘을 완료 상태로 변경
+                updateMainIconToCompleted();
                 
-                await handleStatusData(payload);
-                const status = payload.status || payload.system?.status;
-                const hasFinal = !!(payload.serial_encoder_out || payload.analysis_result?.serial_encoder_out);
-                if (status === 'done' && hasFinal) {
-                    document.getElementById('progressText').innerHTML = '분석이 완료되었습니다!';
-                    
-                    // 메인 아이콘을 완료 상태로 변경
-                    updateMainIconToCompleted();
-                    
-                    showResultButton(); // 분석 완료 시 버튼 활성화
-                    // 상세 패널이 열려있다면 메시지 동기화
-                    if (detailPanelOpen) {
-                        syncDetailProgressCard();
-                    }
-                    eventSource.close();
-                } else if (status === 'error') {
-                    document.getElementById('progressText').innerHTML = '분석 중 오류가 발생했습니다.';
-                    eventSource.close();
-                } else if (status === 'cancelled') {
-                    document.getElementById('progressText').innerHTML = '분석이 중지되었습니다.';
-                    eventSource.close();
+                showResultButton(); // 분석 완료 시 버튼 활성화
+                // 상세 패널이 열려있다면 메시지 동기화
+                if (detailPanelOpen) {
+                    syncDetailProgressCard();
                 }
-            } catch (err) {
-                console.error('SSE 메시지 처리 오류:', err);
+            } else if (status === 'cancelled') {
+                document.getElementById('progressText').innerHTML = '분석이 중지되었습니다.';
             }
-        };
-        eventSource.onerror = (e) => {
-            console.warn('SSE 오류 또는 종료:', e);
-            try { eventSource.close(); } catch (_) {}
-        };
+        }, () => {
+            eventSource = null;
+            stopTokenStream();
+        });
     } catch (e) {
         console.error('SSE 연결 실패:', e);
     }
@@ -1392,14 +1433,16 @@ function stopAnalysisOnExit() {
         eventSource.close();
         eventSource = null;
     }
+    stopTokenStream();
 
     
-    // 분석 중지 요청 (동기적으로 처리)
+    // 이 페이지의 분석만 중지 요청 (다른 사용자의 분석은 유지)
     fetch('/desktop/api/reset', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
+        body: JSON.stringify({ job_id: currentJobId }),
         keepalive: true
     }).then(response => {
         if (response.ok) {
@@ -586,14 +586,15 @@ class UnifiedCommunicationManager {
     }
 
     /**
-     * 시스템 초기화
+     * 시스템 초기화 (모든 분석 중지)
      * @returns {Promise<Object>} 초기화 결과
      */
     async resetSystem() {
         this.log('시스템 초기화 요청', 'info');
 
         const result = await this.post(
-            this.config.ENDPOINTS?.DESKTOP?.RESET || '/desktop/api/reset'
+            this.config.ENDPOINTS?.DESKTOP?.RESET || '/desktop/api/reset',
+            { all: true }
         );
 
         if (result.data.success) {
@@ -42,9 +42,7 @@ logger = logging.getLogger(__name__)
 session_progress = {}  # 세션별 진행 상태 저장소
 session_connections = set()  # 활성 세션 ID 목록
 session_metadata = {}  # 세션 메타데이터 (타입, 생성시간, 마지막 활동시간 등)
-analysis_threads = {}  # 백그라운드 분석 스레드 관리
-analysis_stop_flags = {}  # 분석 중지 신호 플래그
-analysis_abort_controllers = {}  # 분석 중단 컨트롤러 관리
+analysis_submit_lock = threading.Lock()  # 시나리오 생성과 작업 등록을 함께 보호
 
 
 # Blueprint 임포트
@@ -113,44 +111,16 @@ def get_active_sessions():
         'total': len(session_connections)
     }
 
-def stop_all_analysis():
-    """
-    모든 진행 중인 분석 작업을 중지하고 시스템 상태를 초기화
-    
-    이 함수는 다음 작업을 수행합니다:
-    1. 모든 AbortController 중지
-    2. 모든 분석 중지 플래그 설정
-    3. 분석 스레드 정리
-    4. 전역 상태 초기화
-    5. 업로드 관련 데이터 초기화
-    """
-    logger.info("[중지] 모든 분석 중지 요청")
-    
-    # 1. 모든 AbortController 중지
-    for session_id, abort_controller in list(analysis_abort_controllers.items()):
-        if abort_controller:
-            abort_controller.abort()
-            logger.info(f"AbortController 중지: {session_id}")
-    
-    # 2. 모든 분석 중지 플래그 설정
-    for session_id in analysis_stop_flags:
-        analysis_stop_flags[session_id] = True
-        logger.info(f"분석 중지 플래그 설정: {session_id}")
-    
-    # 3. 모든 분석 스레드 정리
-    for session_id, thread in list(analysis_threads.items()):
-        if thread and thread.is_alive():
-            logger.info(f"분석 스레드 중지 시도: {session_id}")
-            # 스레드는 강제 종료하지 않고 플래그로 중지 신호만 보냄
-            # thread.join(timeout=5)  # 5초 대기 후 강제 종료
-        del analysis_threads[session_id]
-    
-    # 4. 중지 플래그 및 AbortController 초기화
-    analysis_stop_flags.clear()
-    analysis_abort_controllers.clear()
-    
-    # 5. 상태 강제 초기화 (중지 후 즉시 상태 리셋)
+def get_analysis_queue():
+    """전역 분석 작업 큐"""
+    from config import get_config
+    from utils.job_queue import get_job_queue
+    return get_job_queue(get_config()['jobs'])
+
+def _reset_processing_status():
+    """전역 상태의 분석 진행 정보 초기화 (화면에 표시 중인 분석)"""
     from web_interface.base.state_manager import state_manager
+    state_manager.set('processing.job_id', None)
     state_manager.set('processing.status', 'idle')
     state_manager.set('processing.progress', 0)
     state_manager.set('processing.current_scenario', None)
@@ -161,6 +131,55 @@ def stop_all_analysis():
     state_manager.set('analysis_result', {})
     state_manager.set('step_times', {})
     state_manager.set('total_elapsed', 0)
+
+def _remember_session_job(job):
+    """이 세션(브라우저)이 시작했거나 합류한 분석 작업 기록 (페이지 이탈 시 이 작업만 중지)"""
+    session['analysis_job_id'] = job.id
+
+def stop_session_analysis(job_id=None):
+    """
+    호출한 세션의 분석 작업만 중지 (페이지 이탈/홈 진입용)
+    
+    다른 세션이 합류한 작업이면 합류 수만 줄이고 계속 실행하며,
+    화면에 표시 중인 분석이 끝났거나 중지되었으면 전역 진행 정보도 초기화
+    
+    Args:
+        job_id (str, optional): 중지할 작업 ID (없으면 세션에 기록된 작업)
+        
+    Returns:
+        bool: 작업을 중지했는지 여부
+    """
+    if job_id is None or job_id == session.get('analysis_job_id'):
+        job_id = session.pop('analysis_job_id', None) or job_id
+    queue = get_analysis_queue()
+    stopped = bool(job_id) and queue.release(job_id)
+    if job_id:
+        logger.info(f"[중지] 세션 분석 작업 {'중지' if stopped else '이탈'}: {job_id}")
+    
+    from web_interface.base.state_manager import state_manager
+    shown = state_manager.get('processing.current_scenario')
+    if not shown or not any(not job.done and not job.aborted for job in queue.find(scenario=shown)):
+        _reset_processing_status()
+    return stopped
+
+def stop_all_analysis():
+    """
+    모든 진행 중인 분석 작업을 중지하고 시스템 상태를 초기화 (관리자 초기화 전용)
+    
+    이 함수는 다음 작업을 수행합니다:
+    1. 대기 중인 분석 작업 취소, 실행 중인 작업에 중지 신호 전달
+    2. 전역 상태 초기화
+    3. 업로드 관련 데이터 초기화
+    """
+    logger.info("[중지] 모든 분석 중지 요청")
+    
+    # 1. 모든 분석 작업 중지 (실행 중인 작업은 강제 종료하지 않고 중지 신호만 보냄)
+    cancelled = get_analysis_queue().cancel_all()
+    logger.info(f"분석 작업 중지: {cancelled}건")
+    
+    # 2. 상태 강제 초기화 (중지 후 즉시 상태 리셋)
+    from web_interface.base.state_manager import state_manager
+    _reset_processing_status()
     
     # 업로드 관련 데이터 초기화
     state_manager.set('upload.uploaded_file', None)
@@ -212,6 +231,13 @@ def get_status():
     """
     status_data = get_global_status().copy()
     
+    # 화면에 표시 중인 분석 작업의 단계 결과 (분석 진행 상황은 전역 상태가 아닌 작업에 기록됨)
+    job_id = status_data.get('processing', {}).get('job_id')
+    job = get_analysis_queue().get(job_id) if job_id else None
+    if job is not None:
+        status_data['job_id'] = job.id
+        status_data['analysis_result'] = dict(job.result)
+    
     # 호환성: 잘못 중첩된 analysis_result 구조를 평탄화
     try:
         ar = status_data.get('analysis_result')
@@ -282,6 +308,7 @@ def status_stream():
         last_progress = None
         last_upload_file_status = None  # 업로드 파일 상태 추적
         last_processing_status = None  # 분석 상태 추적
+        last_job_id = None  # 표시 중인 분석 작업 추적
         
         def build_payload() -> dict:
             data = get_global_status().copy()
@@ -305,6 +332,9 @@ def status_stream():
                 data['status'] = data['processing']['status']
             if data.get('system', {}).get('status') == 'done':
                 data['status'] = 'done'
+            # 화면에 표시할 분석 작업 (진행 상황은 /jobs/<job_id>/stream으로 구독)
+            if data.get('processing', {}).get('job_id'):
+                data['job_id'] = data['processing']['job_id']
 
             # 메시지 최신값 반영
             notifications = data.get('notifications', [])
@@ -350,6 +380,7 @@ def status_stream():
                 progress_val = status_data.get('progress') or status_data.get('processing', {}).get('progress')
                 processing_status = status_data.get('processing', {}).get('status')
                 upload_file_status = status_data.get('upload', {}).get('uploaded_file')
+                job_id = status_data.get('job_id')
                 
 
                 should_emit = False
@@ -390,6 +421,13 @@ def status_stream():
                     last_processing_status = processing_status
                     logger.info(f"[SSE] 분석 상태 변경 감지: {processing_status}")
 
+                # 새 분석 작업 시작 시에도 전송 (화면이 작업 스트림을 새로 구독)
+                if job_id != last_job_id:
+                    if payload is None:
+                        payload = status_data
+                    should_emit = True
+                    last_job_id = job_id
+
                 # 업로드 파일 상태 변화 시에도 전송 (이미지 업로드 감지)
                 if upload_file_status != last_upload_file_status:
                     if payload is None:
@@ -482,18 +520,105 @@ def progress_stream():
         }
     )
 
+def _token_event_stream(broadcaster, subscriber, job=None):
+    """토큰 구독자의 이벤트를 SSE로 전송 (job 지정 시 작업이 끝나면 스트림 종료)"""
+    try:
+        yield f"data: {json.dumps({'event': 'connected', 'job_id': subscriber.job_id})}\n\n"
+        reported_dropped = 0
+        while True:
+            events = subscriber.drain(timeout=1 if job is not None else 15)
+            if not events:
+                if job is not None and job.done:
+                    # 토큰 없이 끝난 작업(캐시 적중, 오류 등) - 클라이언트가 재연결하지 않도록 종료 알림
+                    yield f"data: {json.dumps({'event': 'closed', 'job_id': job.id, 'status': job.status})}\n\n"
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if subscriber.dropped != reported_dropped:
+                events[0] = dict(events[0], dropped=subscriber.dropped - reported_dropped)
+                reported_dropped = subscriber.dropped
+            for event in events:
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if job is not None and events[-1]['event'] in ('done', 'cancelled'):
+                break
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+def _token_stream_response(generator):
+    return Response(
+        generator,
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Cache-Control'
+        }
+    )
+
+@api_bp.route('/token_stream')
+def token_stream():
+    """
+    체인 출력 토큰 SSE 스트림 (모든 분석 작업 - 모니터링용)
+
+    Chain 1~3 LLM이 생성하는 부분 출력을 도착 즉시 전송 (이벤트마다 job_id 포함)
+    클라이언트별 버퍼는 제한되어 있으며, 느린 클라이언트는 오래된 청크부터 버려짐
+    화면 표시용으로는 작업별 스트림(/jobs/<job_id>/tokens)을 사용
+
+    Returns:
+        Response: SSE 스트림 응답
+    """
+    from config import get_config
+    from utils.token_stream import get_token_broadcaster
+
+    broadcaster = get_token_broadcaster(get_config()['ai'].get('TOKEN_STREAM_BUFFER', 256))
+    return _token_stream_response(_token_event_stream(broadcaster, broadcaster.subscribe()))
+
+@api_bp.route('/chain_metrics', methods=['GET'])
+def get_chain_metrics_snapshot():
+    """
+    체인 계측 히스토그램 조회 (HTTP API)
+    
+    단계별 소요 시간(step:*), Runnable(chain:*), LLM 호출(llm:*)의
+    최근 표본 p50/p95/p99와 첫 토큰 지연, 입력/출력 토큰 수를 제공
+    
+    Query:
+        prefix: 단계 이름 접두어 필터 (예: llm:, step:)
+    
+    Returns:
+        JSON: 단계별 측정값 히스토그램
+    """
+    try:
+        from config import get_config
+        from utils.chain_metrics import get_chain_metrics
+        metrics = get_chain_metrics(get_config()['metrics'])
+        if metrics is None:
+            return jsonify({'success': False, 'error': '체인 계측이 비활성화되어 있습니다.'}), 404
+        return jsonify({
+            'success': True,
+            'data': metrics.snapshot(request.args.get('prefix') or None)
+        })
+    except Exception as e:
+        logger.error(f"체인 계측 조회 오류: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @api_bp.route('/reset', methods=['POST'])
 def reset_system():
     """
     시스템 초기화 및 분석 중지
     
-    모든 진행 중인 분석을 중지하고 시스템 상태를 초기 상태로 리셋
-    페이지 이탈이나 사용자 요청에 의해 호출됨
+    기본은 호출한 세션의 분석만 중지 (페이지 이탈 시 다른 사용자의 분석은 유지)
+    all=true(관제 화면의 시스템 초기화)이면 모든 분석을 중지하고 시스템 상태를 초기 상태로 리셋
     
+    Request Body:
+        job_id (str, optional): 중지할 작업 ID (없으면 세션에 기록된 작업)
+        all (bool, optional): 모든 분석 중지 및 전체 초기화 (관리자용)
+        
     Returns:
         JSON: 초기화 완료 응답
     """
     try:
+        data = request.get_json(silent=True) or {}
         # 요청 소스 확인
         user_agent = request.headers.get('User-Agent', '')
         referer = request.headers.get('Referer', '')
@@ -507,7 +632,15 @@ def reset_system():
         else:
             logger.info("[초기화] 시스템 초기화 및 분석 중지 요청")
         
-        # 1. 모든 분석 중지
+        if not data.get('all'):
+            stopped = stop_session_analysis(data.get('job_id'))
+            return jsonify({
+                'success': True,
+                'message': '분석이 중지되었습니다.' if stopped else '중지할 분석이 없습니다.',
+                'stopped': stopped
+            })
+        
+        # 1. 모든 분석 중지 (관리자 초기화)
         stop_all_analysis()
         
         # 2. 상태 초기화
@@ -531,6 +664,11 @@ def reset_system():
         state_manager.set('upload.image_path', None)
         state_manager.set('upload.people_count', 0)
         state_manager.set('upload.scenario', None)
+        try:
+            from tetris import discard_speculative_chain1
+            discard_speculative_chain1()
+        except Exception as e:
+            logger.warning(f"[경고] Chain 1 사전 실행 폐기 실패: {e}")
         
         # 5. 알림 초기화
         state_manager.set('notifications', [])
@@ -624,6 +762,7 @@ def trigger_hardware():
     
     Request Body:
         session_id (str): 세션 식별자
+        job_id (str, optional): 배치 코드를 가져올 분석 작업 ID
         command (str, optional): 하드웨어 명령어
         placement_code (str, optional): 16자리 배치 코드
         
@@ -644,10 +783,12 @@ def trigger_hardware():
             logger.info(f"세션 자동 등록: {session_id}")
             register_session(session_id, 'desktop')
         
-        # 저장된 분석 결과에서 placement_code 자동 추출
+        # 분석 작업 결과에서 placement_code 자동 추출 (요청의 job_id → 세션의 작업 → 화면에 표시 중인 작업)
         if not placement_code:
-            global_status = get_global_status()
-            analysis_result = global_status.get('analysis_result', {})
+            job_id = (data.get('job_id') or session.get('analysis_job_id')
+                      or get_global_status().get('processing', {}).get('job_id'))
+            job = get_analysis_queue().get(job_id) if job_id else None
+            analysis_result = job.result if job is not None else {}
             
             if isinstance(analysis_result, dict) and 'serial_encoder_out' in analysis_result:
                 placement_code = analysis_result['serial_encoder_out']
@@ -853,13 +994,240 @@ def get_recent_logs():
 # AI 분석 API
 # =============================================================================
 
+def _new_scenario():
+    """새 시나리오 ID (같은 초에 여러 요청이 들어오면 _2, _3 ... 접미사)"""
+    base = f"items_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    scenario, n = base, 1
+    while get_analysis_queue().find(scenario=scenario):
+        n += 1
+        scenario = f"{base}_{n}"
+    return scenario
+
+def _submit_analysis_job(scenario, people_count, run, key=None, **meta):
+    """
+    단계별 분석을 작업 큐에 등록 (진행률/단계 결과는 작업에만 기록 - /jobs/<job_id>/stream으로 구독)
+    
+    Args:
+        scenario (str): 시나리오 ID
+        people_count (int): 인원 수
+        run (callable): run(progress_callback, stop_callback, abort_controller, stage_callback, job_id) -> 분석 결과
+        key (str, optional): 동일 요청 식별 키 (진행 중에 같은 키로 들어온 요청은 이 작업에 합류)
+        
+    Returns:
+        AnalysisJob: 등록된 작업
+        
+    Raises:
+        QueueFullError: 대기열이 가득 찬 경우
+    """
+    def run_analysis(job):
+        # 진행률 콜백 함수
+        def progress_callback(progress, status, message, current_step=None):
+            job.update(progress=progress, message=message, current_step=current_step)
+            logger.info(f"단계별 진행률 [{job.id}]: step={current_step}, {progress}% - {status}: {message}")
+        
+        logger.info(f"[시작] 분석 시작: {job.id} ({scenario})")
+        try:
+            result = run(
+                progress_callback=progress_callback,
+                stop_callback=job.should_stop,  # 중지 콜백
+                abort_controller=job,  # 작업이 AbortController 역할 (aborted)
+                stage_callback=job.set_result,  # 단계 결과는 작업에만 기록
+                job_id=job.id  # 토큰 스트림 이벤트 태그 (/jobs/<job_id>/tokens)
+            )
+            # 합류한 요청 수만큼 절약한 호출 수 계산용
+            job.llm_calls = len((result.get('timings') or {}).get('llm_calls', []))
+        except Exception as e:
+            if job.aborted:
+                logger.info(f"[중지] 분석 중지됨 (예외 발생): {job.id}")
+                _finish_shown_analysis(job, 'cancelled', '분석이 중지되었습니다.', uploaded_file=False)
+                raise
+            logger.error(f"[오류] 단계별 분석 실패: {e}")
+            import traceback
+            logger.error(f"상세 오류 정보: {traceback.format_exc()}")
+            _finish_shown_analysis(job, 'error', f'분석 실패: {str(e)}', progress=0,
+                                   uploaded_file=False, error_details=str(e))
+            raise
+        
+        # 중지된 경우
+        if job.aborted or result.get('status') == 'cancelled':
+            logger.info(f"[중지] 분석 중지됨: {job.id}")
+            _finish_shown_analysis(job, 'cancelled', result.get('message', '분석이 중지되었습니다.'), uploaded_file=False)
+            return result
+        
+        _finish_shown_analysis(job, 'completed', '분석이 완료되었습니다!', progress=100,
+                               out_path=result.get('out_path'), total_elapsed=result.get('total_elapsed'),
+                               step_times=result.get('step_times'))
+        logger.info(f"[완료] 단계별 분석 완료 [{job.id}]: {result['out_path']}")
+        return result
+    
+    return get_analysis_queue().submit(run_analysis, key=key, scenario=scenario, people_count=people_count, **meta)
+
+def _finish_shown_analysis(job, status, message, progress=None, **fields):
+    """
+    화면에 표시 중인 분석 작업이 끝나면 전역 처리 상태를 종료 상태로 기록
+    
+    다른 작업이 표시 중이면(그 사이 새 분석 시작) 전역 상태를 건드리지 않음
+    """
+    from web_interface.base.state_manager import state_manager
+    if state_manager.get('processing.job_id') != job.id:
+        return
+    try:
+        update_status(progress=progress, status=status, message=message, current_step=job.current_step, **fields)
+        state_manager.set_processing_status(status, job.progress if progress is None else progress)
+    except Exception as e:
+        logger.warning(f"processing.status {status} 설정 실패: {e}")
+
+def _show_analysis(job, image_path=None):
+    """
+    관제/모바일 화면에 표시할 분석 작업 지정
+    
+    전역 상태에는 작업 ID와 시나리오만 기록하고, 화면은 processing.job_id의
+    /jobs/<job_id>/stream을 구독해 진행률과 단계 결과를 받음
+    """
+    fields = {
+        'processing.job_id': job.id,
+        'processing.status': 'processing',
+        'processing.progress': 0,
+        'processing.current_scenario': job.meta['scenario'],
+        'upload.scenario': job.meta['scenario'],
+        'upload.people_count': job.meta.get('people_count'),
+        'processing.sent_steps': {}
+    }
+    if image_path:
+        fields['upload.image_path'] = image_path
+    update_status(status='processing', current_step=0, analysis_result={}, **fields)
+
+@api_bp.route('/jobs')
+def list_analysis_jobs():
+    """
+    분석 작업 목록 및 대기열 통계
+    
+    Returns:
+        JSON: 작업 큐 통계와 작업 목록 (최근 순)
+    """
+    try:
+        queue = get_analysis_queue()
+        jobs = sorted(queue.find(), key=lambda j: j.created_at, reverse=True)
+        return jsonify({
+            'success': True,
+            'data': {
+                'stats': queue.get_stats(),
+                'jobs': [queue.snapshot(job) for job in jobs]
+            }
+        })
+    except Exception as e:
+        logger.error(f"분석 작업 목록 조회 오류: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/jobs/<job_id>')
+def get_analysis_job(job_id):
+    """
+    분석 작업 상태 조회 (대기 순번, 진행률, 단계 결과, 최종 결과)
+    
+    Returns:
+        JSON: 작업 상태
+    """
+    queue = get_analysis_queue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+    return jsonify({'success': True, 'data': queue.snapshot(job)})
+
+@api_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_analysis_job(job_id):
+    """
+    분석 작업 중지 (대기 중이면 대기열에서 제거)
+    
+    동일 요청이 합류한 작업이면 요청자 하나만 이탈하고 작업은 계속 실행
+    (마지막 요청자가 중지할 때 실제로 중지)
+    
+    Returns:
+        JSON: 중지 결과 (stopped: 작업이 실제로 중지되었는지)
+    """
+    queue = get_analysis_queue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+    if job.done:
+        return jsonify({'success': False, 'error': f'이미 끝난 작업입니다 ({job.status})'}), 409
+    stopped = queue.release(job_id)
+    if session.get('analysis_job_id') == job_id:
+        session.pop('analysis_job_id', None)
+    logger.info(f"[중지] 분석 작업 중지 요청: {job_id} ({'중지' if stopped else '합류 요청 이탈'})")
+    return jsonify({'success': True, 'stopped': stopped, 'data': queue.snapshot(job)})
+
+@api_bp.route('/jobs/<job_id>/stream')
+def analysis_job_stream(job_id):
+    """
+    분석 작업 SSE 스트림
+    
+    작업 상태가 바뀔 때마다(대기 순번, 진행률, 단계 결과) 작업 상태 전체를 전송하고
+    작업이 끝나면(completed/error/cancelled) 마지막 상태를 보낸 뒤 스트림 종료
+    
+    Returns:
+        Response: SSE 스트림 응답
+    """
+    from config import get_config
+    queue = get_analysis_queue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+    heartbeat = get_config()['jobs'].get('SSE_HEARTBEAT_SECONDS', 15)
+    
+    def generate():
+        version = -1
+        while True:
+            current = job.wait_for_change(version, timeout=heartbeat)
+            if current == version:
+                # 변경 없음 - 연결 유지용 주석
+                yield ": keep-alive\n\n"
+                continue
+            version = current
+            snapshot = queue.snapshot(job)
+            yield f"data: {json.dumps(snapshot, ensure_ascii=False, default=str)}\n\n"
+            if job.done:
+                break
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Cache-Control'
+        }
+    )
+
+@api_bp.route('/jobs/<job_id>/tokens')
+def analysis_job_tokens(job_id):
+    """
+    분석 작업 하나의 체인 출력 토큰 SSE 스트림
+    
+    해당 작업이 생성하는 Chain 1~3 부분 출력만 전송하고,
+    체인이 끝나거나(done/cancelled) 작업이 종료되면 스트림 종료
+    
+    Returns:
+        Response: SSE 스트림 응답
+    """
+    from config import get_config
+    from utils.token_stream import get_token_broadcaster
+    
+    job = get_analysis_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+    broadcaster = get_token_broadcaster(get_config()['ai'].get('TOKEN_STREAM_BUFFER', 256))
+    subscriber = broadcaster.subscribe(job_id=job_id)
+    return _token_stream_response(_token_event_stream(broadcaster, subscriber, job))
+
 @api_bp.route('/step_analysis', methods=['POST'])
 def start_step_analysis():
     """
     단계별 AI 분석 시작
     
     사용자가 업로드한 이미지와 인원 수를 바탕으로 단계별 AI 분석을 실행
-    백그라운드 스레드에서 실행되며 SSE를 통해 실시간 진행 상태를 전송
+    분석 작업 큐의 작업자 스레드에서 실행되며 SSE를 통해 실시간 진행 상태를 전송
+    (작업별 진행 상태: /jobs/<job_id>, /jobs/<job_id>/stream)
     
     Request Body:
         people_count (int): 인원 수
@@ -874,8 +1242,6 @@ def start_step_analysis():
         people_count = data.get('people_count', 0)
         image_data_url = data.get('image_data_url', '')
         image_path = data.get('image_path', '')
-        # 항상 새로운 시나리오 생성 (잔여 데이터로 인한 오표시 방지)
-        scenario = f"items_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         if not image_data_url:
             return jsonify({'success': False, 'error': '이미지 데이터가 필요합니다'}), 400
@@ -888,157 +1254,173 @@ def start_step_analysis():
         if not (image_data_url.startswith('data:image/') or 
                 (image_data_url.startswith('http://') or image_data_url.startswith('https://'))):
             return jsonify({'success': False, 'error': '유효하지 않은 이미지 형식입니다.'}), 400
-        
-        # 새로운 분석 시작 시 상태 초기화 (중복 데이터 방지)
-        update_status(
-            status='processing',
-            message='분석을 시작합니다...',
-            current_step=0,
-            analysis_result={},
-            **{
-                'processing.progress': 0,
-                'processing.current_scenario': scenario,
-                'upload.scenario': scenario,
-                'upload.image_path': image_path,  # 이미지 path 저장
-                'upload.people_count': people_count,      # 인원 수 저장
-                'processing.sent_steps': {}
-            }
-        )
 
         # tetris.py의 단계별 실행 함수 import
         sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-        from tetris import run_step_by_step_analysis
+        from tetris import analysis_request_key, run_step_by_step_analysis
+        from utils.job_queue import QueueFullError
         
-        # 진행률 콜백 함수
-        def progress_callback(progress, status, message, current_step=None):
-            update_status(
-                progress=progress,
-                status=status,
-                message=message,
-                uploaded_file=True,
-                people_count=people_count,
-                current_step=current_step
-            )
-            logger.info(f"단계별 진행률: step={current_step}, {progress}% - {status}: {message}")
+        # 이미지 + 인원 수 + 프롬프트 지문이 같은 요청이 진행 중이면 (중복 클릭, 데스크탑/모바일 동시 시작) 그 작업에 합류
+        key = analysis_request_key(people_count, image_data_url)
+        with analysis_submit_lock:
+            job = get_analysis_queue().active(key)
+            if job is not None and get_analysis_queue().attach(job):
+                # 진행 중인 작업이므로 진행률/단계 결과는 초기화하지 않고 표시 작업만 지정
+                update_status(**{'processing.job_id': job.id})
+                _remember_session_job(job)
+                return jsonify({
+                    'success': True,
+                    'message': '진행 중인 동일 분석에 합류했습니다',
+                    'scenario': job.meta['scenario'],
+                    'job_id': job.id,
+                    'queue_position': get_analysis_queue().position(job.id),
+                    'deduplicated': True
+                })
             
-            # current_step 변경 로깅
-            if current_step is not None:
-                logger.info(f"상태 변경: current_step = {current_step}")
-        
-        # 분석 세션 ID 생성
-        analysis_session_id = f"analysis_{scenario}_{int(time.time())}"
-        analysis_stop_flags[analysis_session_id] = False
-        
-        # AbortController 생성
-        class AbortController:
-            def __init__(self):
-                self.aborted = False
+            # 항상 새로운 시나리오 생성 (잔여 데이터로 인한 오표시 방지)
+            scenario = _new_scenario()
             
-            def abort(self):
-                self.aborted = True
-                logger.info(f"[중지] AbortController.abort() 호출됨: {analysis_session_id}")
-        
-        abort_controller = AbortController()
-        analysis_abort_controllers[analysis_session_id] = abort_controller
-        
-        # 백그라운드에서 단계별 분석 실행
-        def run_analysis():
             try:
-                # 중지 플래그 확인 함수
-                def check_stop_flag():
-                    return analysis_stop_flags.get(analysis_session_id, False)
-                
-                logger.info(f"[시작] 분석 시작: {analysis_session_id}")
-                
-                result = run_step_by_step_analysis(
+                job = _submit_analysis_job(scenario, people_count, lambda **callbacks: run_step_by_step_analysis(
                     people_count=people_count,
                     image_data_url=image_data_url,
                     scenario=scenario,
-                    progress_callback=progress_callback,
-                    stop_callback=check_stop_flag,  # 중지 콜백 추가
-                    abort_controller=abort_controller  # AbortController 추가
-                )
-                
-                # 중지 플래그 확인
-                if check_stop_flag():
-                    logger.info(f"[중지] 분석 중지됨: {analysis_session_id}")
-                    update_status(
-                        status='cancelled',
-                        message='분석이 중지되었습니다.',
-                        uploaded_file=False
-                    )
-                    return
-                
-                # 결과가 중지된 경우인지 확인
-                if result.get('status') == 'cancelled':
-                    logger.info(f"[중지] 분석 중지됨 (결과): {analysis_session_id}")
-                    update_status(
-                        status='cancelled',
-                        message=result.get('message', '분석이 중지되었습니다.'),
-                        uploaded_file=False
-                    )
-                    return
-                
-                # 분석 완료 후 상태 업데이트
-                update_status(
-                    progress=100,
-                    status='completed',
-                    message='분석이 완료되었습니다!',
-                    uploaded_file=True,
-                    people_count=people_count,
-                    analysis_result=result.get('analysis_result', result),
-                    out_path=result.get('out_path'),
-                    total_elapsed=result.get('total_elapsed'),
-                    step_times=result.get('step_times')
-                )
-                # processing.status를 completed로 설정 (완료 타임스탬프 포함)
-                try:
-                    from web_interface.base.state_manager import state_manager
-                    state_manager.set_processing_status('completed', 100)
-                except Exception as _e:
-                    logger.warning(f"processing.status 완료 설정 실패: {_e}")
-                
-                logger.info(f"[완료] 단계별 분석 완료: {result['out_path']}")
-                
-            except Exception as e:
-                # 중지 플래그 확인
-                if analysis_stop_flags.get(analysis_session_id, False):
-                    logger.info(f"[중지] 분석 중지됨 (예외 발생): {analysis_session_id}")
-                    return
-                
-                logger.error(f"[오류] 단계별 분석 실패: {e}")
-                import traceback
-                error_details = traceback.format_exc()
-                logger.error(f"상세 오류 정보: {error_details}")
-                
-                # 오류 상태로 업데이트
-                update_status(
-                    progress=0,
-                    status='error',
-                    message=f'분석 실패: {str(e)}',
-                    uploaded_file=False,
-                    error_details=str(e)
-                )
-            finally:
-                # 스레드 및 AbortController 정리
-                if analysis_session_id in analysis_threads:
-                    del analysis_threads[analysis_session_id]
-                if analysis_session_id in analysis_abort_controllers:
-                    del analysis_abort_controllers[analysis_session_id]
-                if analysis_session_id in analysis_stop_flags:
-                    del analysis_stop_flags[analysis_session_id]
-        
-        # 별도 스레드에서 실행
-        analysis_thread = threading.Thread(target=run_analysis, daemon=True)
-        analysis_threads[analysis_session_id] = analysis_thread
-        analysis_thread.start()
+                    image_path=image_path or None,
+                    **callbacks
+                ), key=key)
+            except QueueFullError as e:
+                update_status(status='error', message=str(e))
+                return jsonify({'success': False, 'error': str(e)}), 503
+            # 새로운 분석을 화면에 표시 (이전 분석의 결과는 작업 기록에만 남음)
+            _show_analysis(job, image_path=image_path)
+            _remember_session_job(job)
         
         return jsonify({
             'success': True,
             'message': '단계별 분석이 시작되었습니다',
-            'scenario': scenario
+            'scenario': scenario,
+            'job_id': job.id,
+            'queue_position': get_analysis_queue().position(job.id),
+            'deduplicated': False
         })
         
     except Exception as e:
         logger.error(f"단계별 분석 시작 오류: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/resume_analysis', methods=['POST'])
+def resume_step_analysis():
+    """
+    체크포인트에서 단계별 AI 분석 재개
+    
+    완료된 단계(Chain 1/2/3)의 출력은 체크포인트에서 재사용하고,
+    첫 미완료 또는 실패 단계부터 분석 작업 큐에서 다시 실행
+    
+    Request Body:
+        scenario (str, optional): 재개할 시나리오 (없으면 가장 최근의 미완료 실행)
+        
+    Returns:
+        JSON: 재개 시작 응답 (시나리오, 재개 단계, 완료 단계)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+        from tetris import load_checkpoint, resume_step_by_step_analysis
+        from utils.checkpoint import STAGES
+        from utils.job_queue import QueueFullError
+        
+        checkpoint = load_checkpoint(data.get('scenario'))
+        if checkpoint is None:
+            return jsonify({'success': False, 'error': '재개할 체크포인트가 없습니다'}), 404
+        
+        scenario = checkpoint['scenario']
+        people_count = checkpoint['people_count']
+        completed = [stage for stage in STAGES if stage in checkpoint.get('stages', {})]
+        
+        with analysis_submit_lock:
+            # 같은 시나리오가 아직 대기/실행 중이면 체크포인트가 겹치므로 재개하지 않음
+            if any(not job.done for job in get_analysis_queue().find(scenario=scenario)):
+                return jsonify({'success': False, 'error': f'이미 진행 중인 분석입니다: {scenario}'}), 409
+            
+            try:
+                job = _submit_analysis_job(scenario, people_count, lambda **callbacks: resume_step_by_step_analysis(
+                    scenario=scenario,
+                    **callbacks
+                ), resumed=True)
+            except QueueFullError as e:
+                update_status(status='error', message=str(e))
+                return jsonify({'success': False, 'error': str(e)}), 503
+            _show_analysis(job)
+            _remember_session_job(job)
+        
+        return jsonify({
+            'success': True,
+            'message': '단계별 분석을 재개했습니다',
+            'scenario': scenario,
+            'failure': checkpoint.get('failure'),
+            'completed_stages': completed,
+            'job_id': job.id,
+            'queue_position': get_analysis_queue().position(job.id)
+        })
+        
+    except Exception as e:
+        logger.error(f"단계별 분석 재개 오류: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/adopt_analysis', methods=['POST'])
+def adopt_near_duplicate_analysis():
+    """
+    유사 이미지의 이전 배치 결과 채택
+    
+    업로드 시 지각 해시 인덱스에서 찾은 유사 이미지(near_duplicate)의 결과를
+    새 시나리오의 분석 결과로 사용 (AI 체인 실행 없이 작업 큐에서 단계별 진행률만 재생)
+    
+    Request Body:
+        near_duplicate_id (str): 업로드 응답의 near_duplicate.id
+        
+    Returns:
+        JSON: 채택 시작 응답 (시나리오, 작업 ID)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        entry_id = data.get('near_duplicate_id')
+        if not entry_id:
+            return jsonify({'success': False, 'error': 'near_duplicate_id가 필요합니다'}), 400
+        
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+        from tetris import adopt_previous_result
+        from utils.image_hash_index import get_phash_index
+        from utils.job_queue import QueueFullError
+        
+        index = get_phash_index()
+        entry = index.get(entry_id) if index is not None else None
+        if entry is None:
+            return jsonify({'success': False, 'error': f'유사 이미지 결과를 찾을 수 없습니다: {entry_id}'}), 404
+        
+        people_count = entry['people_count']
+        with analysis_submit_lock:
+            scenario = _new_scenario()
+            try:
+                job = _submit_analysis_job(scenario, people_count, lambda **callbacks: adopt_previous_result(
+                    people_count, scenario, entry.get('result', {}),
+                    **callbacks
+                ), adopted=entry_id)
+            except QueueFullError as e:
+                update_status(status='error', message=str(e))
+                return jsonify({'success': False, 'error': str(e)}), 503
+            _show_analysis(job)
+            _remember_session_job(job)
+        
+        return jsonify({
+            'success': True,
+            'message': '이전 배치 결과를 사용합니다',
+            'scenario': scenario,
+            'previous_scenario': entry.get('scenario'),
+            'job_id': job.id,
+            'queue_position': get_analysis_queue().position(job.id)
+        })
+        
+    except Exception as e:
+        logger.error(f"유사 이미지 결과 채택 오류: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -30,42 +30,64 @@ logger = logging.getLogger(__name__)
 # Blueprint import
 from . import user_bp
 
+def _find_near_duplicate(image_data: bytes, people_count: int):
+    """지각 해시 인덱스에서 유사한 이전 업로드의 배치 결과 조회"""
+    try:
+        from utils.image_hash_index import get_phash_index
+        index = get_phash_index()
+        if index is None:
+            return None
+        matches = index.find_similar(image_data, people_count=people_count)
+        if not matches:
+            return None
+        match = matches[0]
+        return {
+            'id': match['id'],
+            'distance': match['distance'],
+            'scenario': match.get('scenario'),
+            'image_path': match.get('image_path'),
+            'analysis_result': match.get('result', {})
+        }
+    except Exception as e:
+        logger.warning(f"[경고] 유사 이미지 조회 실패: {e}")
+        return None
+
+def _speculative_owner() -> str:
+    """추측 실행 소유자 식별자 (페이지마다 새로 만드는 session_id와 달리 브라우저 세션 동안 유지)"""
+    if 'speculative_owner' not in session:
+        session['speculative_owner'] = uuid.uuid4().hex
+    return session['speculative_owner']
+
+def _start_speculative_chain1(people_count: int, image_data_url: str, image_path: str) -> bool:
+    """업로드 직후 Chain 1 사전 실행 시작 (실패해도 업로드는 정상 처리)"""
+    try:
+        from tetris import start_speculative_chain1
+        return start_speculative_chain1(people_count, image_data_url, image_path, owner=_speculative_owner())
+    except Exception as e:
+        logger.warning(f"[경고] Chain 1 사전 실행 시작 실패: {e}")
+        return False
+
+def _discard_speculative_chain1():
+    """입력 변경 시 이 세션의 Chain 1 사전 실행 폐기 (다른 세션의 사전 실행은 유지)"""
+    try:
+        from tetris import discard_speculative_chain1
+        discard_speculative_chain1(owner=_speculative_owner())
+    except Exception as e:
+        logger.warning(f"[경고] Chain 1 사전 실행 폐기 실패: {e}")
+
 @user_bp.route('/')
 @user_bp.route('/home')
 def mobile_home():
     """모바일 홈 페이지 - 분석 중지"""
     try:
-        # 진행 중인 분석이 있다면 중지
-        from control.routes import stop_all_analysis
+        # 이 세션이 시작한 분석이 진행 중이면 중지 (다른 세션의 분석은 유지)
+        from control.routes import stop_session_analysis
         from web_interface.base.state_manager import state_manager
         
-        # 분석 상태 확인 (더 포괄적으로 체크)
         current_status = state_manager.get('processing.status', 'idle')
-        system_status = state_manager.get('system.status', 'idle')
         progress = state_manager.get('processing.progress', 0)
-        
-        # 분석이 진행 중인지 확인 (더 넓은 조건)
-        is_analysis_running = (
-            current_status in ['running', 'processing'] or
-            system_status in ['running', 'processing', '사용자 입력 분석', '최적 배치 생성', '시트 동작 계획', '최적 배치 생성'] or
-            (progress > 0 and progress < 100)
-        )
-        
-        # 항상 분석 중지 (상태와 관계없이)
-        logger.info(f"[이탈] 홈 페이지 진입으로 인한 분석 중지 (상태: {current_status}, 시스템: {system_status}, 진행률: {progress}%)")
-        stop_all_analysis()
-        
-        # 모든 분석 관련 상태 강제 초기화
-        state_manager.set('processing.status', 'idle')
-        state_manager.set('processing.progress', 0)
-        state_manager.set('processing.current_scenario', None)
-        state_manager.set('processing.started_at', None)
-        state_manager.set('processing.completed_at', None)
-        state_manager.set('current_step', 0)
-        state_manager.set('analysis_result', {})
-        state_manager.set('step_times', {})
-        state_manager.set('total_elapsed', 0)
-        state_manager.set('system.status', 'idle')
+        logger.info(f"[이탈] 홈 페이지 진입으로 인한 세션 분석 중지 (상태: {current_status}, 진행률: {progress}%)")
+        stop_session_analysis()
         
         # 업로드 관련 데이터 초기화
         state_manager.set('upload.uploaded_file', None)
@@ -146,7 +168,8 @@ def upload_file():
         validate_required_fields(request.files, ['photo'])
         
         file = request.files['photo']
-        people_count = validate_people_count(request.form.get('people_count', '0'))
+        # 모바일 입력 화면은 'people' 필드로 전송
+        people_count = validate_people_count(request.form.get('people_count', request.form.get('people', '0')))
         session_id = request.form.get('session_id')
         
         logger.info(f"업로드 파일 정보 - 파일명: {file.filename}, 크기: {file.content_length if hasattr(file, 'content_length') else 'unknown'}, 세션: {session_id}, 인원수: {people_count}")
@@ -216,8 +239,23 @@ def upload_file():
             logger.error(f"[에러] 이미지 처리 실패: {process_error}", exc_info=True)
             return handle_generic_error(process_error)
         
+        # 전처리본 생성 (EXIF 방향 보정/축소/재인코딩) - 체인 실행 시 재사용
+        preprocess_stats = None
+        try:
+            from utils.image_preprocess import preprocess_upload
+            if cfg.get('preprocess', {}).get('ENABLED', True):
+                preprocess_stats = preprocess_upload(filepath, cfg.get('preprocess'))
+                logger.info(f"[전처리] {preprocess_stats['original_bytes']} -> {preprocess_stats['processed_bytes']} bytes (절감: {preprocess_stats['bytes_saved']} bytes)")
+        except Exception as prep_error:
+            logger.warning(f"[경고] 이미지 전처리 실패 - 원본 사용: {prep_error}")
+        
         scenario = f"items_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
+        # 유사 이미지 조회: 이전 배치 결과를 즉시 제안 (새 분석은 선택)
+        near_duplicate = _find_near_duplicate(image_data, int(people_count))
+        if near_duplicate:
+            logger.info(f"[유사 이미지] 이전 분석 결과 발견 - 시나리오: {near_duplicate['scenario']}, 거리: {near_duplicate['distance']}")
+        
         # 상태 업데이트
         try:
             update_status(
@@ -230,17 +268,26 @@ def upload_file():
                 image_path=filepath,
                 scenario=scenario
             )
+            from web_interface.base.state_manager import state_manager
+            state_manager.set('upload.near_duplicate', near_duplicate)
+            state_manager.set('upload.preprocess', preprocess_stats)
             logger.info(f"[성공] 상태 업데이트 완료 - 시나리오: {scenario}, 인원수: {people_count}")
         except StateError as status_error:
             logger.warning(f"[경고] 상태 업데이트 실패: {status_error}")
             # 상태 업데이트 실패는 업로드 자체를 실패로 처리하지 않음
         
+        # 추측 실행: 시작 버튼을 누르기 전에 Chain 1을 미리 실행 (분석 시작 시 동일 입력이면 채택)
+        speculative = _start_speculative_chain1(int(people_count), image_data_url, filepath)
+        
         # 응답 생성
         response_data = {
             'filename': filename,
             'people_count': int(people_count),
             'upload_time': datetime.now().isoformat(),
-            'scenario': scenario
+            'scenario': scenario,
+            'near_duplicate': near_duplicate,
+            'preprocess': preprocess_stats,
+            'speculative_chain1': speculative
         }
         
         # logger.info(f"[성공] 업로드 성공 - 파일: {filename}, 시나리오: {scenario}")
@@ -270,6 +317,7 @@ def reset_upload():
         state_manager.set('upload.image_path', None)
         state_manager.set('upload.people_count', None)
         state_manager.set('upload.scenario', None)
+        _discard_speculative_chain1()
         
         logger.info("[초기화] 업로드 상태 초기화 완료")
         log_api_response('/mobile/api/reset-upload', 200, "Upload state reset")
@@ -285,25 +333,12 @@ def progress():
     """진행률 페이지 - 분석 내용 초기화"""
     try:
         from web_interface.base.state_manager import state_manager
-        from control.routes import stop_all_analysis
+        from control.routes import stop_session_analysis
         
-        # 진행 중인 분석이 있다면 중지
-        current_status = state_manager.get('processing.status', 'idle')
-        if current_status in ['running', 'processing']:
+        # 이 세션의 이전 분석이 진행 중이면 중지 (다른 세션의 분석은 유지)
+        if session.get('analysis_job_id'):
             logger.info("[진입] Progress 페이지 진입으로 인한 이전 분석 중지")
-            stop_all_analysis()
-        
-        # 모든 분석 관련 상태 강제 초기화
-        state_manager.set('processing.current_scenario', None)
-        state_manager.set('processing.progress', 0)
-        state_manager.set('processing.status', 'idle')
-        state_manager.set('processing.started_at', None)
-        state_manager.set('processing.completed_at', None)
-        state_manager.set('current_step', 0)
-        state_manager.set('analysis_result', {})
-        state_manager.set('step_times', {})
-        state_manager.set('total_elapsed', 0)
-        state_manager.set('system.status', 'idle')
+        stop_session_analysis()
         
         # 알림 초기화
         state_manager.set('notifications', [])
@@ -107,6 +107,13 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"성능 모니터링 오류: {e}")
     
+    # AI 체인 백그라운드 초기화 (웹 UI는 AI 스택 준비 전에도 바로 응답)
+    try:
+        from tetris import warm_up_ai_chain
+        warm_up_ai_chain()
+    except Exception as e:
+        print(f"AI 체인 사전 초기화 오류: {e}")
+    
     # 통합 설정을 사용한 웹 서버 실행
     app.run(
         host=config['web']['HOST'],